@@ -11,6 +11,10 @@ The SDK consists of the following
     VantiqException -- Exception raised from Vantiq when necessary
     VantiqResponse -- Structured response from Vantiq operations
     VantiqResources -- Names for Vantiq resources that may be used in for Vantiq operations
+    VantiqPoolConfig -- Configuration for the HTTP connection pool used by a Vantiq client
+    VantiqJsonCodec -- JSON encoder/decoder used by a Vantiq client
+    VantiqBulkResult -- Summary of a bulk insert or upsert operation
+    VantiqSubscriberConfig -- Configuration for the delivery of subscription messages
 
 The Vantiq SDK is built atop the asyncio-based aiohttp. Consequently, operations marked as async must be awaited.
 See https://docs.python.org/3/library/asyncio.html for more details.
@@ -24,30 +28,530 @@ __all__ = ['Vantiq',
            'VantiqResources',
            'VantiqResponse',
            'VantiqError',
-           'VantiqException'
+           'VantiqException',
+           'VantiqPoolConfig',
+           'VantiqJsonCodec',
+           'VantiqBulkResult',
+           'VantiqSubscriberConfig',
+           'VantiqRetryPolicy',
+           'VantiqResponseCache',
+           'VantiqLoader',
+           'VantiqMaterializedView',
+           'VantiqRecordStore',
+           'VantiqParam',
+           'VantiqPreparedSelect',
+           'VantiqPreparedExecute',
+           'VantiqExecuteResult',
+           'VantiqPublisher',
+           'VantiqConflatingPublisher',
+           'SyncVantiq'
            ]
 
 import asyncio
 import base64
+import bisect
+import collections
+import concurrent.futures
+import copy
+import csv
+import datetime
+import decimal
+import email.utils
+import itertools
 import json
 import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
 from logging import Logger
-from typing import Awaitable, Callable, List, Union, Dict
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Union, Dict
 
 import aiohttp
-import websockets
 
+if TYPE_CHECKING:
+    # websockets is imported when the subscriber transport is first used, sparing clients that never subscribe
+    import websockets
+
+_IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
 _MIMETYPE_JSON = 'application/json'
 _MIMETYPE_TEXT_PREFIX = 'text/'
 _SYSTEM_PREFIX = 'system.'
 
 
+class VantiqPoolConfig:
+    """Configuration for the HTTP connection pool used by a Vantiq client.
+
+    A VantiqPoolConfig contains the following properties:
+        limit (int) Total number of simultaneous connections.  0 means no limit.
+        limit_per_host (int) Number of simultaneous connections to a single host.  0 means no limit.
+        keepalive_timeout (float) Seconds an idle connection is kept for reuse.
+        ttl_dns_cache (int) Seconds DNS lookups are cached.  None caches forever.
+        use_dns_cache (bool) Whether DNS lookups are cached at all.
+        happy_eyeballs_delay (float) Seconds to wait before trying the next address (RFC 8305).
+                                     None disables happy eyeballs.
+        force_close (bool) Close each connection after its response rather than reusing it.
+
+    A keepalive_timeout of None uses the aiohttp default (15 seconds).  It is ignored when force_close is set.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 0,
+                 keepalive_timeout: Union[float, None] = None,
+                 ttl_dns_cache: Union[int, None] = 10,
+                 use_dns_cache: bool = True,
+                 happy_eyeballs_delay: Union[float, None] = 0.25,
+                 force_close: bool = False):
+        if limit < 0 or limit_per_host < 0:
+            raise VantiqException('io.vantiq.python.pool.invalidlimit',
+                                  'Connection pool limits must not be negative. Found limit: {0}, '
+                                  'limit_per_host: {1}.',
+                                  [limit, limit_per_host])
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.use_dns_cache = use_dns_cache
+        self.happy_eyeballs_delay = happy_eyeballs_delay
+        self.force_close = force_close
+
+    def __str__(self):
+        return f'VantiqPoolConfig: limit: {self.limit}, limit_per_host: {self.limit_per_host}, ' \
+               f'keepalive_timeout: {self.keepalive_timeout}, ttl_dns_cache: {self.ttl_dns_cache}, ' \
+               f'force_close: {self.force_close}'
+
+    def __repr__(self):
+        return f'VantiqPoolConfig(limit={self.limit}, limit_per_host={self.limit_per_host}, ' \
+               f'keepalive_timeout={self.keepalive_timeout}, ttl_dns_cache={self.ttl_dns_cache}, ' \
+               f'use_dns_cache={self.use_dns_cache}, happy_eyeballs_delay={self.happy_eyeballs_delay}, ' \
+               f'force_close={self.force_close})'
+
+    def _connector_args(self) -> dict:
+        args = {'limit': self.limit,
+                'limit_per_host': self.limit_per_host,
+                'ttl_dns_cache': self.ttl_dns_cache,
+                'use_dns_cache': self.use_dns_cache,
+                'happy_eyeballs_delay': self.happy_eyeballs_delay,
+                'force_close': self.force_close}
+        # aiohttp does not permit a keepalive timeout when connections are forcibly closed
+        if self.keepalive_timeout is not None and not self.force_close:
+            args['keepalive_timeout'] = self.keepalive_timeout
+        return args
+
+
+class VantiqRetryPolicy:
+    """Describes how a Vantiq client retries failed requests.
+
+    A request is retried when the connection to the server fails (e.g. the connection is reset or times out) before
+    the response's status is received, or when the server responds with one of the retry_statuses.  Between attempts, the client waits for the period
+    given by the response's Retry-After header or, if there is none, for an exponentially increasing backoff.
+
+    By default, only idempotent requests (GET, PUT, & DELETE -- e.g. select(), select_one(), count(), update(),
+    delete_one()) are retried.  Individual calls can override this using their `retry` parameter: True retries
+    using the client's policy (or a default VantiqRetryPolicy) even if the operation is not idempotent, False never
+    retries, and a VantiqRetryPolicy retries using that policy.
+
+    A VantiqRetryPolicy contains the following properties:
+        max_attempts (int) Total attempts made for a request, including the first.  Defaults to 3.
+        initial_backoff (float) Seconds to wait before the first retry.  Defaults to 0.2.
+        max_backoff (float) The longest wait between attempts, in seconds.  Defaults to 10.
+        backoff_multiplier (float) Factor by which the backoff grows after each attempt.  Defaults to 2.
+        jitter (bool) Randomize each wait (between half and all of the backoff) so that clients failing together
+                      do not retry together.  Defaults to True.
+        retry_statuses (tuple(int)) HTTP statuses that are retried.  Defaults to 429, 502, 503, and 504.
+        max_retry_after (float) The longest wait honored from a Retry-After header, in seconds.  Defaults to 60.
+    """
+
+    def __init__(self, max_attempts: int = 3, initial_backoff: float = 0.2, max_backoff: float = 10.0,
+                 backoff_multiplier: float = 2.0, jitter: bool = True,
+                 retry_statuses: Iterable[int] = (429, 502, 503, 504),
+                 max_retry_after: float = 60.0):
+        if max_attempts < 1 or initial_backoff < 0 or max_backoff < initial_backoff or backoff_multiplier < 1:
+            raise VantiqException('io.vantiq.python.retrypolicy.invalid',
+                                  'Retry policy requires max_attempts of at least 1, a backoff_multiplier of at '
+                                  'least 1, and 0 <= initial_backoff <= max_backoff. Found max_attempts: {0}, '
+                                  'initial_backoff: {1}, max_backoff: {2}, backoff_multiplier: {3}.',
+                                  [max_attempts, initial_backoff, max_backoff, backoff_multiplier])
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = jitter
+        self.retry_statuses = tuple(retry_statuses)
+        self.max_retry_after = max_retry_after
+
+    def __str__(self):
+        return f'VantiqRetryPolicy: max_attempts: {self.max_attempts}, initial_backoff: {self.initial_backoff}, ' \
+               f'max_backoff: {self.max_backoff}, retry_statuses: {self.retry_statuses}'
+
+    def __repr__(self):
+        return f'VantiqRetryPolicy(max_attempts={self.max_attempts}, initial_backoff={self.initial_backoff}, ' \
+               f'max_backoff={self.max_backoff}, backoff_multiplier={self.backoff_multiplier}, ' \
+               f'jitter={self.jitter}, retry_statuses={self.retry_statuses}, ' \
+               f'max_retry_after={self.max_retry_after})'
+
+    def backoff(self, attempt: int) -> float:
+        """Returns the seconds to wait after the given (1-based) failed attempt."""
+        delay = min(self.max_backoff, self.initial_backoff * self.backoff_multiplier ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+    def _delay(self, attempt: int, retry_after: Union[str, None]) -> float:
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    seconds = None
+            if seconds is not None:
+                return min(max(seconds, 0.0), self.max_retry_after)
+        return self.backoff(attempt)
+
+    @staticmethod
+    def _is_retryable_error(error: Union[BaseException, None]) -> bool:
+        # Only failures in sending a request (and receiving its status) are retried.  Errors reading the body of a
+        # response come later, once the response has been handed back.
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class VantiqResponseCache:
+    """An in-memory cache of the responses to select() and select_one() operations.
+
+    Only the resources named are cached.  Entries are keyed by the resource, the item id (for select_one()), the
+    encoded properties, where clause, sort, limit, and options, and the target namespace.  They expire ttl seconds
+    after they are fetched, and the least recently used entries are evicted to stay within max_entries and
+    max_bytes (the size of the JSON responses cached).
+
+    The cache entries for a resource are discarded whenever the client using the cache performs an insert(),
+    upsert(), update(), delete(), delete_one(), insert_many(), or upsert_many() on that resource.  Changes made by
+    other clients are seen only once the entries expire.
+
+    A VantiqResponseCache contains the following properties:
+        resources (set(str)) The names of the resources cached.
+        ttl (float) Seconds for which an entry is used.  Defaults to 30.
+        max_entries (int) The maximum number of entries held.  Defaults to 1000.
+        max_bytes (int) The maximum size of the responses held, in bytes.  Defaults to 16 MiB.
+    """
+
+    def __init__(self, resources: Iterable[str], ttl: float = 30.0, max_entries: int = 1000,
+                 max_bytes: int = 16 * 1024 * 1024):
+        if ttl <= 0 or max_entries < 1 or max_bytes < 1:
+            raise VantiqException('io.vantiq.python.responsecache.invalid',
+                                  'Response cache ttl, max_entries, and max_bytes must be positive. '
+                                  'Found ttl: {0}, max_entries: {1}, max_bytes: {2}.',
+                                  [ttl, max_entries, max_bytes])
+        self.resources = set(resources)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expiration, status, content_type, count, data), least recently used first
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._keys_by_resource: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def __str__(self):
+        return f'VantiqResponseCache: resources: {self.resources}, ttl: {self.ttl}, ' \
+               f'max_entries: {self.max_entries}, max_bytes: {self.max_bytes}'
+
+    def __repr__(self):
+        return f'VantiqResponseCache(resources={self.resources}, ttl={self.ttl}, ' \
+               f'max_entries={self.max_entries}, max_bytes={self.max_bytes})'
+
+    def caches(self, resource: str) -> bool:
+        """Returns whether responses for the resource are cached."""
+        return resource in self.resources
+
+    def invalidate(self, resource: str) -> None:
+        """Discard the entries for a resource, including those for requests currently in flight."""
+        self._generations[resource] = self._generations.get(resource, 0) + 1
+        keys = self._keys_by_resource.pop(resource, None)
+        if keys:
+            self._invalidations += len(keys)
+            for key in keys:
+                self._bytes -= len(self._entries.pop(key)[4])
+
+    def clear(self) -> None:
+        """Discard all entries."""
+        for resource in list(self._keys_by_resource):
+            self.invalidate(resource)
+
+    def stats(self) -> dict:
+        """Returns the current size of the cache and counts of its use.
+
+        The dict returned contains the following keys:
+            entries (int) Entries currently held
+            bytes (int) Size of the responses currently held
+            hits (int) Requests answered from the cache
+            misses (int) Requests sent to the server
+            evictions (int) Entries evicted to stay within max_entries or max_bytes
+            invalidations (int) Entries discarded because their resource was changed
+        """
+        return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self._hits, 'misses': self._misses,
+                'evictions': self._evictions, 'invalidations': self._invalidations}
+
+    def _generation(self, resource: str) -> int:
+        return self._generations.get(resource, 0)
+
+    def _get(self, key: tuple) -> Union[tuple, None]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry
+
+    def _put(self, key: tuple, generation: int, status: int, content_type: str, count: Union[int, None],
+             data: bytes) -> None:
+        # Skip the response if the resource changed while the request was in flight, or it would crowd out
+        # everything else
+        if generation != self._generation(key[0]) or len(data) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, status, content_type, count, data)
+        self._keys_by_resource.setdefault(key[0], set()).add(key)
+        self._bytes += len(data)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry[4])
+        keys = self._keys_by_resource[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_resource[key[0]]
+
+
+class VantiqSubscriberConfig:
+    """Configuration for the delivery of subscription messages.
+
+    Messages arriving for a subscription are placed on a queue for that subscription and delivered to its callback
+    by a set of worker tasks, so a slow callback delays only its own subscription.  The task reading the websocket
+    never waits for a queue: messages beyond a subscription's queue_size are still queued (reliable messages must
+    not be lost), but are counted as overflowed and a warning is logged.
+
+    When auto_reconnect is enabled, a lost websocket connection is re-established (using the client's current
+    access token) with jittered exponential backoff, and every subscription is resent.  Subscription callbacks
+    receive a 'connect' callback again once their subscription is reestablished.  Messages published while
+    disconnected are not delivered.
+
+    A VantiqSubscriberConfig contains the following properties:
+        workers (int) The number of worker tasks calling each subscription's callback.  With a single worker
+                      (the default), messages are delivered in the order received.
+        queue_size (int) The number of messages queued for a subscription beyond which further messages are
+                         counted as overflowed, and a warning logged, until the callback catches up.  They are still
+                         queued, so memory grows with the backlog.  0 means no limit.  Defaults to 1000.
+        auto_reconnect (bool) Reconnect and resubscribe when the connection is lost.  Defaults to False.
+        reconnect_initial_delay (float) Seconds to wait before the first reconnect attempt.  Defaults to 0.5.
+        reconnect_max_delay (float) The longest wait between reconnect attempts, in seconds.  Defaults to 30.
+        reconnect_max_attempts (int) Attempts made before giving up.  None (the default) never gives up.
+        on_reconnect (Callable[[dict], Awaitable[None]]) Called after each reconnect with a dict containing the
+                     number of `attempts` made, the `reconnect_latency` (seconds from the start of the successful
+                     attempt until authenticated), the `gap_duration` (seconds from losing the connection until the
+                     subscriptions were resent), and the number of `subscriptions` resent.
+        ack_batch_size (int) When greater than 1, acknowledgements made using Vantiq.ack() are coalesced, sending
+                             only the highest contiguous sequence id per subscription & partition once this many
+                             have accumulated.  Defaults to 1 (each acknowledgement is sent immediately).
+        ack_flush_interval (float) The longest time, in seconds, a coalesced acknowledgement waits to be sent.
+                                   Defaults to 0.5.
+        ack_gap_timeout (float) When acknowledgements are coalesced, a sequence id that has not been acknowledged
+                                holds back the acknowledgement of every later one, so that the server still
+                                redelivers it.  A gap open for 60 seconds is logged and counted as stalled.  If
+                                given, the time in seconds after which such a gap is instead acknowledged past,
+                                giving up on the missing messages.  Defaults to None (never acknowledge past a
+                                missing sequence id).
+        request_timeout (float) The longest time, in seconds, to wait for the response to an operation sent over
+                                the websocket (see the websocket_operations parameter of Vantiq).  Defaults to 30.
+    """
+
+    def __init__(self, workers: int = 1, queue_size: int = 1000, auto_reconnect: bool = False,
+                 reconnect_initial_delay: float = 0.5, reconnect_max_delay: float = 30.0,
+                 reconnect_max_attempts: Union[int, None] = None,
+                 on_reconnect: Union[Callable[[dict], Awaitable[None]], None] = None,
+                 ack_batch_size: int = 1, ack_flush_interval: float = 0.5, request_timeout: float = 30.0,
+                 ack_gap_timeout: Union[float, None] = None):
+        if workers < 1 or queue_size < 0:
+            raise VantiqException('io.vantiq.python.subscriberconfig.invalid',
+                                  'Subscriber workers must be at least 1 and queue_size must not be negative. '
+                                  'Found workers: {0}, queue_size: {1}.',
+                                  [workers, queue_size])
+        if reconnect_initial_delay <= 0 or reconnect_max_delay < reconnect_initial_delay:
+            raise VantiqException('io.vantiq.python.subscriberconfig.delay',
+                                  'Reconnect delays must be positive, with the maximum no less than the initial. '
+                                  'Found initial: {0}, maximum: {1}.',
+                                  [reconnect_initial_delay, reconnect_max_delay])
+        if ack_batch_size < 1 or ack_flush_interval <= 0 or (ack_gap_timeout is not None and ack_gap_timeout <= 0):
+            raise VantiqException('io.vantiq.python.subscriberconfig.ack',
+                                  'The ack_batch_size must be at least 1 and the ack_flush_interval and '
+                                  'ack_gap_timeout (if given) must be positive. '
+                                  'Found ack_batch_size: {0}, ack_flush_interval: {1}, ack_gap_timeout: {2}.',
+                                  [ack_batch_size, ack_flush_interval, ack_gap_timeout])
+        if request_timeout <= 0:
+            raise VantiqException('io.vantiq.python.subscriberconfig.requesttimeout',
+                                  'The request_timeout must be positive. Found {0}.', [request_timeout])
+        self.workers = workers
+        self.queue_size = queue_size
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_initial_delay = reconnect_initial_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.reconnect_max_attempts = reconnect_max_attempts
+        self.on_reconnect = on_reconnect
+        self.ack_batch_size = ack_batch_size
+        self.ack_flush_interval = ack_flush_interval
+        self.ack_gap_timeout = ack_gap_timeout
+        self.request_timeout = request_timeout
+
+    def __str__(self):
+        return f'VantiqSubscriberConfig: workers: {self.workers}, queue_size: {self.queue_size}, ' \
+               f'auto_reconnect: {self.auto_reconnect}, ack_batch_size: {self.ack_batch_size}'
+
+    def __repr__(self):
+        return f'VantiqSubscriberConfig(workers={self.workers}, queue_size={self.queue_size}, ' \
+               f'auto_reconnect={self.auto_reconnect}, reconnect_initial_delay={self.reconnect_initial_delay}, ' \
+               f'reconnect_max_delay={self.reconnect_max_delay}, ' \
+               f'reconnect_max_attempts={self.reconnect_max_attempts}, ack_batch_size={self.ack_batch_size}, ' \
+               f'ack_flush_interval={self.ack_flush_interval}, ack_gap_timeout={self.ack_gap_timeout}, ' \
+               f'request_timeout={self.request_timeout})'
+
+
+def _json_default(obj: any) -> any:
+    """Convert values the JSON encoders do not handle natively."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    # NumPy scalars and arrays both provide tolist().  Checking for it avoids a dependency on NumPy.
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class VantiqJsonCodec:
+    """JSON encoder/decoder used by a Vantiq client.
+
+    This base class uses the Python standard library `json` module.  Faster implementations based on `orjson` or
+    `msgspec` are available (when those packages are installed) via VantiqJsonCodec.create().
+
+    All codecs serialize datetime, date & time values (as ISO 8601 strings), Decimal values (as numbers), and
+    NumPy scalars and arrays.  Decoding is done directly from the bytes received.
+    """
+
+    name = 'json'
+
+    def __str__(self):
+        return f'VantiqJsonCodec: {self.name}'
+
+    def __repr__(self):
+        return f'VantiqJsonCodec({self.name})'
+
+    @staticmethod
+    def create(name: str) -> 'VantiqJsonCodec':
+        """Create a codec by name.
+
+        Parameters:
+            name : str
+                One of 'json' (the standard library), 'orjson', 'msgspec', or 'auto'.  'auto' selects the fastest
+                implementation installed.
+        Returns:
+            VantiqJsonCodec
+        Raises:
+            VantiqException if the name is unknown or the package providing it is not installed.
+        """
+        if name == 'auto':
+            for candidate in (_OrjsonCodec, _MsgspecCodec):
+                try:
+                    return candidate()
+                except ImportError:
+                    pass
+            return VantiqJsonCodec()
+        codec_classes = {'json': VantiqJsonCodec, 'orjson': _OrjsonCodec, 'msgspec': _MsgspecCodec}
+        if name not in codec_classes:
+            raise VantiqException('io.vantiq.python.codec.unknown',
+                                  'Unknown JSON codec {0}. Must be one of {1}.',
+                                  [name, ['auto'] + list(codec_classes.keys())])
+        try:
+            return codec_classes[name]()
+        except ImportError as ie:
+            raise VantiqException('io.vantiq.python.codec.unavailable',
+                                  'The JSON codec {0} requires the {0} package, which is not installed.',
+                                  [name]) from ie
+
+    def encode(self, obj: any) -> bytes:
+        """Encode a value as JSON, returning UTF-8 bytes."""
+        return json.dumps(obj, default=_json_default).encode('utf-8')
+
+    def encode_str(self, obj: any) -> str:
+        """Encode a value as JSON, returning a str."""
+        return json.dumps(obj, default=_json_default)
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str]) -> any:
+        """Decode a JSON document from bytes (or a str)."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class _OrjsonCodec(VantiqJsonCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_SERIALIZE_NUMPY
+
+    def encode(self, obj: any) -> bytes:
+        return self._orjson.dumps(obj, default=_json_default, option=self._options)
+
+    def encode_str(self, obj: any) -> str:
+        return self._orjson.dumps(obj, default=_json_default, option=self._options).decode('utf-8')
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str]) -> any:
+        return self._orjson.loads(data)
+
+
+class _MsgspecCodec(VantiqJsonCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self._encoder = msgspec.json.Encoder(enc_hook=_json_default, decimal_format='number')
+        self._decoder = msgspec.json.Decoder()
+
+    def encode(self, obj: any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def encode_str(self, obj: any) -> str:
+        return self._encoder.encode(obj).decode('utf-8')
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str]) -> any:
+        return self._decoder.decode(data)
+
+
+_DEFAULT_CODEC = VantiqJsonCodec()
+
+
 class _RestClient:
     """A generic HTTP Rest client."""
 
-    def __init__(self, url: str, **connect_args) -> None:
+    def __init__(self, url: str, pool_config: Union[VantiqPoolConfig, None] = None, **connect_args) -> None:
         self._url = url
         self._con = None
+        self._pool_config = pool_config or VantiqPoolConfig()
         self._connect_args = connect_args
 
     def __str__(self):
@@ -66,7 +570,33 @@ class _RestClient:
 
     async def connect(self):
         # set trust_env to True to enable env variable settings for network proxy support
-        self._con = aiohttp.ClientSession(base_url=self._url, trust_env=True)
+        # noinspection PyProtectedMember
+        connector = aiohttp.TCPConnector(**self._pool_config._connector_args())
+        self._con = aiohttp.ClientSession(base_url=self._url, trust_env=True, connector=connector)
+
+    def pool_stats(self) -> dict:
+        """Return the current occupancy of the connection pool."""
+        connector = self._con.connector if self._con is not None else None
+        stats = {'limit': self._pool_config.limit,
+                 'limit_per_host': self._pool_config.limit_per_host,
+                 'in_use': 0,
+                 'idle': 0,
+                 'in_use_per_host': {}}
+        if connector is None or connector.closed:
+            return stats
+        # aiohttp does not publish pool occupancy, so we read it from the connector's private bookkeeping.  Should a
+        # version of aiohttp not keep it as expected, the occupancy is reported as None rather than guessed at.
+        acquired = getattr(connector, '_acquired', None)
+        conns = getattr(connector, '_conns', None)
+        per_host = getattr(connector, '_acquired_per_host', None)
+        try:
+            stats['in_use'] = len(acquired)
+            stats['idle'] = sum(len(c) for c in conns.values())
+            stats['in_use_per_host'] = {f'{key.host}:{key.port}': len(protos)
+                                        for key, protos in per_host.items() if protos}
+        except (AttributeError, TypeError):
+            stats.update(in_use=None, idle=None, in_use_per_host=None)
+        return stats
 
     async def close(self):
         await self._con.close()
@@ -236,16 +766,47 @@ class VantiqResponse:
                     available after a count() or delete() operation.
         errors (list) A list of VantiqError entries outlining a failed operation
         body (list or dict) The results of the operation.
+        raw (bytes) The undecoded JSON body, when retained by a client created with lazy_body=True.  Otherwise None.
+
+    When the client was created with lazy_body=True, a JSON body is decoded only when `body` is first accessed.
     """
 
+    __slots__ = ('status_code', 'content_type', 'is_success', 'count', 'errors', '_body', '_raw', '_codec')
+
     def __init__(self, successful: bool, status_code: int, content_type: Union[str, None]):
         self.status_code = status_code
         self.content_type = content_type
         self.is_success = successful
-        self.body = None
+        self._body = None
+        self._raw: Union[bytes, None] = None
+        self._codec: Union[VantiqJsonCodec, None] = None
         self.count: Union[int, None] = None
         self.errors = None
 
+    @property
+    def body(self) -> any:
+        if self._codec is not None:
+            # Decode the body left undecoded by a lazy_body client.  The codec is kept until decoding succeeds, so a
+            # failure is reported on every access rather than only the first.
+            try:
+                body = self._codec.decode(self._raw) if self._raw.strip() else None
+            except Exception as e:
+                raise VantiqException('io.vantiq.python.body.decode',
+                                      'Unable to decode the response body: {0}', [e]) from e
+            self._body = body
+            self._codec = None
+        return self._body
+
+    @body.setter
+    def body(self, value: any) -> None:
+        self._body = value
+        self._raw = None
+        self._codec = None
+
+    @property
+    def raw(self) -> Union[bytes, None]:
+        return self._raw
+
     def __str__(self):
         ret_val = f'VantiqResponse: successful: {self.is_success}, status_code: {self.status_code}, ' \
                   f'content_type:{self.content_type}, count: {self.count})'
@@ -284,48 +845,88 @@ class VantiqResponse:
         if cnt is not None:
             self.count = int(cnt)
 
-    async def _populate_body(self, resp: aiohttp.ClientResponse) -> None:
+    def _set_raw_body(self, data: Union[bytes, None]) -> None:
+        # Bodies requested raw are the bytes as received, available as both body and raw
+        self._body = data
+        self._raw = data
+        self._codec = None
+
+    def _decode_body(self, data: bytes, codec: VantiqJsonCodec, lazy: bool = False) -> None:
+        if lazy:
+            # Keep the bytes, decoding them only if the body is wanted
+            self._body = None
+            self._raw = data
+            self._codec = codec
+        else:
+            # Like aiohttp's json(), an empty body decodes as None
+            self.body = codec.decode(data) if data.strip() else None
+
+    async def _populate_body(self, resp: aiohttp.ClientResponse,
+                             codec: VantiqJsonCodec = _DEFAULT_CODEC, lazy: bool = False) -> Union[bytes, None]:
+        """Populate the body from the response, returning the bytes read if the body is JSON."""
         if self.content_type == _MIMETYPE_JSON:
-            self.body = await resp.json()
+            data = await resp.read()
+            self._decode_body(data, codec, lazy)
+            return data
         elif self.content_type and self.content_type.startswith(_MIMETYPE_TEXT_PREFIX):
             self.body = await resp.text()
         else:
             # If we don't recognize the type, just return all the bytes
             self.body = await resp.read()
+        return None
 
     def _populate_streaming_body(self, resp: aiohttp.ClientResponse) -> None:
         self.body = resp.content
 
-    async def _populate_errors(self, resp: aiohttp.ClientResponse) -> None:
+    @classmethod
+    def _from_frame(cls, frame: dict) -> 'VantiqResponse':
+        """Create the response to a request made over the websocket from the (decoded) frame answering it."""
+        status = frame.get('status', 500)
+        vr = cls(status < 400, status, _MIMETYPE_JSON)
+        if vr.is_success:
+            vr.body = frame.get('body', None)
+        else:
+            # noinspection PyBroadException
+            try:
+                vr._populate_errors_from(frame.get('body', None))
+            except Exception:
+                vr.errors = [VantiqError('io.vantiq.python.parse.exception', 'Error parsing error messages: {0}',
+                                         [frame.get('body', None)])]
+        return vr
+
+    def _populate_errors_from(self, errors: Union[dict, list, None]) -> None:
+        err_list = []
+        if isinstance(errors, list):
+            for err in errors:
+                if 'code' in err.keys():
+                    err_list.append(VantiqError(err['code'], err['message'], err['params']))
+                elif 'error' in err.keys():
+                    err_list.append(VantiqError(str(self.status_code), err['error'], []))
+                else:
+                    err_list.append(VantiqError('io.vantiq.python.unknownerrorprops',
+                                                'Received error in an unknown format: {0}',
+                                                [err]))
+        elif isinstance(errors, dict):
+            if 'code' in errors.keys():
+                err_list.append(VantiqError(errors['code'], errors['message'], errors['params']))
+            elif 'error' in errors.keys():
+                err_list.append(VantiqError(str(self.status_code), errors['error'], []))
+            else:
+                err_list.append(VantiqError('io.vantiq.python.unknownerrorprops',
+                                            'Received error in an unknown format: {0}',
+                                            [errors]))
+        else:
+            err_list.append(VantiqError('io.vantiq.python.unknownerrorformat',
+                                        'Received error in an unknown format: {0}',
+                                        [errors]))
+        self.errors = err_list
+
+    async def _populate_errors(self, resp: aiohttp.ClientResponse, codec: VantiqJsonCodec = _DEFAULT_CODEC) -> None:
         # noinspection PyBroadException
         try:
             if self.content_type == _MIMETYPE_JSON:
-                errors = await resp.json()
-                err_list = []
-                if isinstance(errors, list):
-                    for err in errors:
-                        if 'code' in err.keys():
-                            err_list.append(VantiqError(err['code'], err['message'], err['params']))
-                        elif 'error' in err.keys():
-                            err_list.append(VantiqError(str(resp.status), err['error'], []))
-                        else:
-                            err_list.append(VantiqError('io.vantiq.python.unknownerrorprops',
-                                                        'Received error in an unknown format: {0}',
-                                                        [err]))
-                elif isinstance(errors, dict):
-                    if 'code' in errors.keys():
-                        err_list.append(VantiqError(errors['code'], errors['message'], errors['params']))
-                    elif 'error' in errors.keys():
-                        err_list.append(VantiqError(str(resp.status), errors['error'], []))
-                    else:
-                        err_list.append(VantiqError('io.vantiq.python.unknownerrorprops',
-                                                    'Received error in an unknown format: {0}',
-                                                    [errors]))
-                else:
-                    err_list.append(VantiqError('io.vantiq.python.unknownerrorformat',
-                                                'Received error in an unknown format: {0}',
-                                                [errors]))
-                self.errors = err_list
+                data = await resp.read()
+                self._populate_errors_from(codec.decode(data) if data.strip() else None)
             else:
                 code = "io.vantiq.python.nonjson.error"
                 msg = await resp.text()
@@ -349,6 +950,617 @@ class VantiqResponse:
             self.errors = [ve]
 
 
+class VantiqBulkResult:
+    """Summary of a bulk insert or upsert operation.
+
+    Rather than a VantiqResponse per item, a bulk operation returns the following properties:
+        operation (str) The operation performed ('insert' or 'upsert')
+        total (int) The number of items submitted
+        succeeded (int) The number of items in chunks the server accepted
+        failed (int) The number of items in chunks the server rejected (or that could not be sent)
+        failures (list) One (start_index, count, errors) tuple per failed chunk.  start_index is the position of
+                        the chunk's first item in the input, and errors is a list of VantiqError entries.
+        elapsed (float) Seconds taken by the operation
+        items_per_second (float) The throughput of the operation
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.failures: List[tuple] = []
+        self.elapsed = 0.0
+
+    def __str__(self):
+        ret_val = f'VantiqBulkResult: operation: {self.operation}, total: {self.total}, ' \
+                  f'succeeded: {self.succeeded}, failed: {self.failed}'
+        for start, count, errors in self.failures:
+            ret_val += f'\n\t items {start}-{start + count - 1}: ' + ', '.join(str(err) for err in errors)
+        return ret_val
+
+    def __repr__(self):
+        return f'VantiqBulkResult(operation={self.operation}, total={self.total}, succeeded={self.succeeded}, ' \
+               f'failed={self.failed})'
+
+    @property
+    def is_success(self) -> bool:
+        """True if every item was accepted."""
+        return self.failed == 0
+
+    @property
+    def items_per_second(self) -> float:
+        """The number of items submitted per second."""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def _record_success(self, count: int) -> None:
+        self.total += count
+        self.succeeded += count
+
+    def _record_failure(self, start: int, count: int, errors: list) -> None:
+        self.total += count
+        self.failed += count
+        self.failures.append((start, count, errors))
+        # Chunks complete in any order; keep the failures in input order
+        self.failures.sort(key=lambda failure: failure[0])
+
+
+def _path_value(record: dict, prop: str) -> any:
+    """Returns the value of a (possibly dotted) property of a record, or None if it is missing."""
+    value = record
+    for part in prop.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _has_path(record: dict, prop: str) -> bool:
+    value = record
+    for part in prop.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return False
+        value = value[part]
+    return True
+
+
+def _order_key(value: any) -> tuple:
+    """Returns a key ordering values as the server does: null, then numbers, strings, booleans, and anything else."""
+    if value is None:
+        return 0, 0
+    elif isinstance(value, bool):
+        return 3, value
+    elif isinstance(value, (int, float, decimal.Decimal)):
+        return 1, value
+    elif isinstance(value, str):
+        return 2, value
+    return 4, json.dumps(value, sort_keys=True, default=str)
+
+
+def _hashable(value: any) -> any:
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+
+def _values_equal(value: any, operand: any) -> bool:
+    """Returns whether two values are equal as the server compares them: of the same kind, so true is not 1."""
+    if isinstance(value, bool) or isinstance(operand, bool):
+        return isinstance(value, bool) and isinstance(operand, bool) and value == operand
+    elif isinstance(value, list) and isinstance(operand, list):
+        return len(value) == len(operand) and all(_values_equal(v, o) for v, o in zip(value, operand))
+    elif isinstance(value, dict) and isinstance(operand, dict):
+        return value.keys() == operand.keys() and all(_values_equal(value[k], operand[k]) for k in value)
+    return value == operand
+
+
+def _equals(value: any, operand: any) -> bool:
+    # As on the server, an array also equals any value it contains
+    return _values_equal(value, operand) or (isinstance(value, list) and any(_values_equal(v, operand)
+                                                                             for v in value))
+
+
+def _compare(value: any, operand: any, test: Callable[[tuple, tuple], bool]) -> bool:
+    # Values of different kinds (e.g. a number and a string) are never greater or less than each other
+    value_key = _order_key(value)
+    operand_key = _order_key(operand)
+    return value_key[0] == operand_key[0] and value is not None and test(value_key, operand_key)
+
+
+def _condition_matches(record: dict, prop: str, condition: any) -> bool:
+    value = _path_value(record, prop)
+    if not isinstance(condition, dict) or not any(k.startswith('$') for k in condition):
+        return _equals(value, condition)
+    for op, operand in condition.items():
+        if op == '$eq':
+            matched = _equals(value, operand)
+        elif op == '$ne':
+            matched = not _equals(value, operand)
+        elif op == '$gt':
+            matched = _compare(value, operand, lambda a, b: a > b)
+        elif op == '$gte':
+            matched = _compare(value, operand, lambda a, b: a >= b)
+        elif op == '$lt':
+            matched = _compare(value, operand, lambda a, b: a < b)
+        elif op == '$lte':
+            matched = _compare(value, operand, lambda a, b: a <= b)
+        elif op == '$in':
+            matched = any(_equals(value, o) for o in operand)
+        elif op == '$nin':
+            matched = not any(_equals(value, o) for o in operand)
+        elif op == '$exists':
+            matched = _has_path(record, prop) == bool(operand)
+        elif op == '$regex':
+            flags = re.IGNORECASE if 'i' in condition.get('$options', '') else 0
+            matched = isinstance(value, str) and re.search(operand, value, flags) is not None
+        elif op == '$options':
+            matched = True
+        elif op == '$not':
+            matched = not _condition_matches(record, prop, operand)
+        else:
+            raise VantiqException('io.vantiq.python.where.unsupported',
+                                  'The operator {0} (for property {1}) cannot be evaluated locally.',
+                                  [op, prop])
+        if not matched:
+            return False
+    return True
+
+
+_WHERE_OPERATORS = frozenset(('$eq', '$ne', '$gt', '$gte', '$lt', '$lte', '$in', '$nin', '$exists', '$regex',
+                              '$options', '$not'))
+
+
+def _validate_where(where: Union[dict, None]) -> None:
+    """Raises a VantiqException if any part of a where clause cannot be evaluated locally by _where_matches()."""
+    for prop, condition in (where or {}).items():
+        if prop in ('$and', '$or', '$nor'):
+            if not isinstance(condition, list):
+                raise VantiqException('io.vantiq.python.where.invalid',
+                                      'The operator {0} requires a list of where clauses. Found {1}.',
+                                      [prop, condition])
+            for clause in condition:
+                _validate_where(clause)
+        elif prop.startswith('$'):
+            raise VantiqException('io.vantiq.python.where.unsupported',
+                                  'The operator {0} cannot be evaluated locally.', [prop])
+        else:
+            _validate_condition(prop, condition)
+
+
+def _validate_condition(prop: str, condition: any) -> None:
+    if not isinstance(condition, dict) or not any(k.startswith('$') for k in condition):
+        return
+    for op, operand in condition.items():
+        if op not in _WHERE_OPERATORS:
+            raise VantiqException('io.vantiq.python.where.unsupported',
+                                  'The operator {0} (for property {1}) cannot be evaluated locally.',
+                                  [op, prop])
+        elif op in ('$in', '$nin') and not isinstance(operand, list):
+            raise VantiqException('io.vantiq.python.where.invalid',
+                                  'The operator {0} (for property {1}) requires a list. Found {2}.',
+                                  [op, prop, operand])
+        elif op == '$not':
+            _validate_condition(prop, operand)
+
+
+def _where_matches(record: dict, where: Union[dict, None]) -> bool:
+    """Returns whether a record satisfies a where clause (as used by Vantiq.select())."""
+    if not where:
+        return True
+    for prop, condition in where.items():
+        if prop == '$and':
+            matched = all(_where_matches(record, clause) for clause in condition)
+        elif prop == '$or':
+            matched = any(_where_matches(record, clause) for clause in condition)
+        elif prop == '$nor':
+            matched = not any(_where_matches(record, clause) for clause in condition)
+        elif prop.startswith('$'):
+            raise VantiqException('io.vantiq.python.where.unsupported',
+                                  'The operator {0} cannot be evaluated locally.', [prop])
+        else:
+            matched = _condition_matches(record, prop, condition)
+        if not matched:
+            return False
+    return True
+
+
+def _index_values(value: any) -> list:
+    # An array is found by its own value and by those of its elements, since it equals each of them
+    return [value] + value if isinstance(value, list) else [value]
+
+
+class _HashIndex:
+    # Values that are equal in Python but not on the server (e.g. true and 1) share a bucket.  Records found using
+    # the index are still checked against the where clause, so that only widens the records examined.
+    def __init__(self):
+        self._keys: Dict[any, set] = {}
+
+    def add(self, value: any, key: any) -> None:
+        for v in _index_values(value):
+            self._keys.setdefault(_hashable(v), set()).add(key)
+
+    def remove(self, value: any, key: any) -> None:
+        for v in _index_values(value):
+            bucket = _hashable(v)
+            keys = self._keys.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys[bucket]
+
+    def lookup(self, condition: any) -> Union[set, None]:
+        """Returns the keys of the records that may satisfy the condition, or None if the index can't tell."""
+        if isinstance(condition, dict) and any(k.startswith('$') for k in condition):
+            if '$eq' in condition:
+                return set(self._keys.get(_hashable(condition['$eq']), ()))
+            elif '$in' in condition:
+                found = set()
+                for value in condition['$in']:
+                    found.update(self._keys.get(_hashable(value), ()))
+                return found
+            return None
+        return set(self._keys.get(_hashable(condition), ()))
+
+
+class _SortedIndex:
+    def __init__(self):
+        # Parallel lists, ordered by the value's _order_key
+        self._values: List[tuple] = []
+        self._keys: List[any] = []
+
+    def add(self, value: any, key: any) -> None:
+        for v in _index_values(value):
+            order_key = _order_key(v)
+            position = bisect.bisect_right(self._values, order_key)
+            self._values.insert(position, order_key)
+            self._keys.insert(position, key)
+
+    def remove(self, value: any, key: any) -> None:
+        for v in _index_values(value):
+            order_key = _order_key(v)
+            start = bisect.bisect_left(self._values, order_key)
+            end = bisect.bisect_right(self._values, order_key)
+            for position in range(start, end):
+                if self._keys[position] == key:
+                    del self._values[position]
+                    del self._keys[position]
+                    break
+
+    def _range(self, low: Union[tuple, None], low_inclusive: bool, high: Union[tuple, None],
+               high_inclusive: bool) -> set:
+        start = 0 if low is None else \
+            (bisect.bisect_left if low_inclusive else bisect.bisect_right)(self._values, low)
+        end = len(self._values) if high is None else \
+            (bisect.bisect_right if high_inclusive else bisect.bisect_left)(self._values, high)
+        return set(self._keys[start:end])
+
+    def lookup(self, condition: any) -> Union[set, None]:
+        """Returns the keys of the records that may satisfy the condition, or None if the index can't tell."""
+        if not isinstance(condition, dict) or not any(k.startswith('$') for k in condition):
+            order_key = _order_key(condition)
+            return self._range(order_key, True, order_key, True)
+        if '$eq' in condition:
+            order_key = _order_key(condition['$eq'])
+            return self._range(order_key, True, order_key, True)
+        elif '$in' in condition:
+            found = set()
+            for value in condition['$in']:
+                order_key = _order_key(value)
+                found.update(self._range(order_key, True, order_key, True))
+            return found
+        low = high = None
+        low_inclusive = high_inclusive = True
+        for op, operand in condition.items():
+            order_key = _order_key(operand)
+            if op in ('$gt', '$gte'):
+                low, low_inclusive = order_key, op == '$gte'
+            elif op in ('$lt', '$lte'):
+                high, high_inclusive = order_key, op == '$lte'
+        if low is None and high is None:
+            return None
+        # Values of different kinds never compare, so stay within the operand's kind
+        kind = (low or high)[0]
+        if low is None:
+            low, low_inclusive = (kind,), True
+        if high is None:
+            high, high_inclusive = (kind + 1,), False
+        return self._range(low, low_inclusive, high, high_inclusive)
+
+
+class VantiqRecordStore:
+    """An in-memory collection of records that can be queried as Vantiq.select() would query a resource.
+
+    The where clauses, properties, sort specifications, and limits accepted by select() are evaluated locally.
+    The where clause operators supported are $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $exists, $regex (with
+    $options), $not, $and, $or, and $nor; properties may be dotted paths into nested objects.  As on the server,
+    values of different kinds (e.g. numbers and strings) are never greater or less than each other, nor equal (so
+    true does not equal 1), and sorting orders null first, then numbers, strings, booleans, and other values.  An
+    array satisfies an equality ($eq, $ne, $in, $nin, or a plain value) if it, or any of its elements, is equal.
+
+    Indexes speed up selection.  A 'hash' index answers equality and $in conditions on a property without examining
+    every record; a 'sorted' index also answers range ($gt, $gte, $lt, $lte) conditions.  Conditions that cannot use
+    an index are evaluated against every record (or every record found using an index).
+
+    Records are stored (and returned) as is; they should not be modified while in the store.
+    """
+
+    INDEX_KINDS = ('hash', 'sorted')
+
+    def __init__(self, key: str = '_id', records: Union[Iterable[dict], None] = None,
+                 indexes: Union[Dict[str, str], None] = None):
+        """Create a record store.
+
+        Parameters:
+            key : str
+                (optional) The property identifying the records.  Defaults to '_id'.
+            records : Iterable[dict]
+                (optional) The initial records.
+            indexes : dict(str: str)
+                (optional) The indexes to create, mapping property names to the kind of index ('hash' or 'sorted').
+        """
+        self.key = key
+        self._records: Dict[any, dict] = {}
+        self._indexes: Dict[str, Union[_HashIndex, _SortedIndex]] = {}
+        self._index_kinds: Dict[str, str] = {}
+        self._index_lookups = 0
+        self._scans = 0
+        for prop, kind in (indexes or {}).items():
+            self.create_index(prop, kind)
+        for record in records or ():
+            self.put(record)
+
+    def __str__(self):
+        return f'VantiqRecordStore: key: {self.key}, records: {len(self._records)}, indexes: {self._index_kinds}'
+
+    def __repr__(self):
+        return f'VantiqRecordStore(key={self.key}, indexes={self._index_kinds})'
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key_value: any) -> bool:
+        return key_value in self._records
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+    @property
+    def indexes(self) -> Dict[str, str]:
+        """The indexes of the store, mapping property names to the kind of index."""
+        return dict(self._index_kinds)
+
+    def create_index(self, prop: str, kind: str = 'hash') -> None:
+        """Create an index on a property.
+
+        Parameters:
+            prop : str
+                The (possibly dotted) name of the property to index.
+            kind : str
+                (optional) 'hash' (the default) for equality lookups, or 'sorted' for equality and range lookups.
+        """
+        if kind not in self.INDEX_KINDS:
+            raise VantiqException('io.vantiq.python.recordstore.indexkind',
+                                  'Index kind must be one of {0}. Found {1}.',
+                                  [list(self.INDEX_KINDS), kind])
+        index = _HashIndex() if kind == 'hash' else _SortedIndex()
+        for key_value, record in self._records.items():
+            index.add(_path_value(record, prop), key_value)
+        self._indexes[prop] = index
+        self._index_kinds[prop] = kind
+
+    def drop_index(self, prop: str) -> None:
+        """Remove the index on a property, if any."""
+        self._indexes.pop(prop, None)
+        self._index_kinds.pop(prop, None)
+
+    def get(self, key_value: any) -> Union[dict, None]:
+        """Returns the record whose key property has the value given, or None if there is none."""
+        return self._records.get(key_value)
+
+    def put(self, record: dict) -> None:
+        """Add a record, replacing any with the same key."""
+        key_value = record.get(self.key)
+        self.remove(key_value)
+        self._records[key_value] = record
+        for prop, index in self._indexes.items():
+            index.add(_path_value(record, prop), key_value)
+
+    def remove(self, key_value: any) -> Union[dict, None]:
+        """Remove the record whose key property has the value given, returning it (or None if there is none)."""
+        record = self._records.pop(key_value, None)
+        if record is not None:
+            for prop, index in self._indexes.items():
+                index.remove(_path_value(record, prop), key_value)
+        return record
+
+    def clear(self) -> None:
+        """Remove all records, keeping the indexes."""
+        self._records = {}
+        for prop, kind in self._index_kinds.items():
+            self._indexes[prop] = _HashIndex() if kind == 'hash' else _SortedIndex()
+
+    def select(self, where: Union[dict, None] = None, properties: Union[list, None] = None,
+               sort_spec: Union[dict, None] = None, limit: Union[int, None] = None) -> List[dict]:
+        """Return the records satisfying a where clause.
+
+        Parameters:
+            where : dict(str: *)
+                (optional) The "where clause" restricting the records returned, as for Vantiq.select().
+            properties : list(str)
+                (optional) The properties of the records to return.  If missing, the records themselves are returned.
+            sort_spec : dict(str: int)
+                (optional) The sort order (1 = ascending, -1 = descending) of the records returned.
+            limit : int
+                (optional) Limit the number of records returned.
+        Returns:
+            list of dict
+        """
+        _validate_where(where)
+        records = [record for record in self._candidates(where) if _where_matches(record, where)]
+        if sort_spec:
+            # Sort by the least significant property first; each sort preserves the order of equal records
+            for prop, direction in reversed(list(sort_spec.items())):
+                records.sort(key=lambda record: _order_key(_path_value(record, prop)), reverse=direction < 0)
+        if limit is not None and limit > 0:
+            records = records[:limit]
+        if properties:
+            records = [{prop: record[prop] for prop in properties if prop in record} for record in records]
+        return records
+
+    def count(self, where: Union[dict, None] = None) -> int:
+        """Returns the number of records satisfying a where clause."""
+        _validate_where(where)
+        return sum(1 for record in self._candidates(where) if _where_matches(record, where))
+
+    def stats(self) -> dict:
+        """Returns a dict containing the number of `records`, the `indexes`, and the number of selections answered
+        using an index (`index_lookups`) or by examining every record (`scans`)."""
+        return {'records': len(self._records), 'indexes': dict(self._index_kinds),
+                'index_lookups': self._index_lookups, 'scans': self._scans}
+
+    def _candidates(self, where: Union[dict, None]) -> Iterable[dict]:
+        """Returns the records that may satisfy the where clause, using the most selective index available."""
+        best = None
+        for prop, condition in self._conjuncts(where):
+            index = self._indexes.get(prop)
+            keys = index.lookup(condition) if index is not None else None
+            if keys is not None and (best is None or len(keys) < len(best)):
+                best = keys
+        if best is None:
+            self._scans += 1
+            return list(self._records.values())
+        self._index_lookups += 1
+        return [self._records[key_value] for key_value in best]
+
+    @classmethod
+    def _conjuncts(cls, where: Union[dict, None]) -> Iterable[tuple]:
+        """Yields the (property, condition) pairs that every matching record must satisfy."""
+        for prop, condition in (where or {}).items():
+            if prop == '$and':
+                for clause in condition:
+                    yield from cls._conjuncts(clause)
+            elif not prop.startswith('$'):
+                yield prop, condition
+
+
+class VantiqParam:
+    """A placeholder for a value supplied each time a prepared query is run.
+
+    See Vantiq.prepare_select() and Vantiq.prepare_execute().
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self):
+        return f'VantiqParam: {self.name}'
+
+    def __repr__(self):
+        return f'VantiqParam({self.name!r})'
+
+
+class _JsonTemplate:
+    """A JSON document containing VantiqParam placeholders, encoded once.
+
+    The document is encoded with a unique marker string standing in for each placeholder, then split around the
+    (encoded) markers.  Rendering encodes just the values bound to the placeholders and joins them with the
+    pieces of the document.
+    """
+
+    def __init__(self, template: any, codec: VantiqJsonCodec):
+        self._codec = codec
+        self.names: List[str] = []
+        marker = f'vantiq-param-{random.getrandbits(64):016x}-'
+        encoded = codec.encode_str(self._mark(template, marker))
+        pieces = re.split(re.escape(codec.encode_str(marker))[:-1] + r'(\d+)"', encoded)
+        # Pieces alternate between the encoded document and the index of the placeholder that follows
+        self._pieces = pieces[0::2]
+        self._slots = [self.names[int(index)] for index in pieces[1::2]]
+
+    def _mark(self, value: any, marker: str) -> any:
+        if isinstance(value, VantiqParam):
+            if value.name not in self.names:
+                self.names.append(value.name)
+            return marker + str(self.names.index(value.name))
+        elif isinstance(value, dict):
+            return {k: self._mark(v, marker) for k, v in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [self._mark(v, marker) for v in value]
+        return value
+
+    def render(self, values: dict) -> str:
+        unknown = [name for name in values if name not in self.names]
+        if unknown:
+            raise VantiqException('io.vantiq.python.prepared.unknownparam',
+                                  'The parameter(s) {0} do not appear in the prepared query.', [unknown])
+        if not self._slots:
+            return self._pieces[0]
+        missing = [name for name in self.names if name not in values]
+        if missing:
+            raise VantiqException('io.vantiq.python.prepared.missingparam',
+                                  'No value was provided for the parameter(s) {0}.', [missing])
+        encoded = {name: self._codec.encode_str(values[name]) for name in self.names}
+        parts = [self._pieces[0]]
+        for name, piece in zip(self._slots, self._pieces[1:]):
+            parts.append(encoded[name])
+            parts.append(piece)
+        return ''.join(parts)
+
+
+class VantiqExecuteResult:
+    """The result of one procedure execution made by Vantiq.execute_many().
+
+    A VantiqExecuteResult contains the following properties:
+        index (int) The position of the execution's parameters in the input
+        params (dict) The parameters of the execution
+        response (VantiqResponse) The response to the execution, or None if it could not be made
+        error (VantiqException) Why the execution could not be made, or None
+        latency (float) Seconds from sending the request until its response was received
+    """
+
+    def __init__(self, index: int, params: dict, response: Union[VantiqResponse, None], latency: float,
+                 error: Union[VantiqException, None] = None):
+        self.index = index
+        self.params = params
+        self.response = response
+        self.latency = latency
+        self.error = error
+
+    def __str__(self):
+        return f'VantiqExecuteResult: index: {self.index}, latency: {self.latency:.3f}, ' \
+               f'response: {self.response}, error: {self.error}'
+
+    def __repr__(self):
+        return f'VantiqExecuteResult(index={self.index}, latency={self.latency}, response={self.response!r}, ' \
+               f'error={self.error!r})'
+
+    @property
+    def is_success(self) -> bool:
+        """True if the execution was made and succeeded."""
+        return self.response is not None and self.response.is_success
+
+
+async def _aiter_chunks(items: Union[Iterable, AsyncIterable], chunk_size: int) -> AsyncIterator[list]:
+    """Group the items of a (sync or async) iterable into lists of at most chunk_size items."""
+    chunk = []
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
 class Vantiq:
     """The interface for working with the Vantiq System.
 
@@ -368,7 +1580,19 @@ class Vantiq:
 
     """
 
-    def __init__(self, server: str, api_version: Union[str, None] = None, **connect_args):
+    WEBSOCKET_OPERATIONS = frozenset(('publish', 'execute'))
+    MIN_REFRESH_DELAY = 5.0
+
+    def __init__(self, server: str, api_version: Union[str, None] = None, *,
+                 pool_config: Union[VantiqPoolConfig, None] = None,
+                 json_codec: Union[str, VantiqJsonCodec, None] = None,
+                 subscriber_config: Union[VantiqSubscriberConfig, None] = None,
+                 retry_policy: Union[VantiqRetryPolicy, None] = None,
+                 response_cache: Union[VantiqResponseCache, None] = None,
+                 coalesce_reads: bool = False,
+                 websocket_operations: Union[Iterable[str], None] = None,
+                 lazy_body: bool = False,
+                 **connect_args):
         """Create a Vantiq client object.
 
         Parameters:
@@ -378,6 +1602,37 @@ class Vantiq:
             api_version : str (optional)
                 Version of the API to use. Defaults to '1'
 
+            pool_config : VantiqPoolConfig (optional)
+                Configuration of the HTTP connection pool.  Defaults to the aiohttp connection pool defaults.
+
+            json_codec : str | VantiqJsonCodec (optional)
+                The JSON codec used for requests, responses, and subscription messages.  Either a codec instance or
+                one of the names accepted by VantiqJsonCodec.create().  Defaults to the standard library codec.
+
+            subscriber_config : VantiqSubscriberConfig (optional)
+                Configuration for the delivery of subscription messages.
+
+            retry_policy : VantiqRetryPolicy (optional)
+                How failed requests are retried.  Defaults to None (requests are not retried).
+
+            response_cache : VantiqResponseCache (optional)
+                Cache of select() and select_one() responses.  Defaults to None (responses are not cached).
+
+            coalesce_reads : bool (optional)
+                Whether identical select(), select_one(), and count() requests made while one is already in flight
+                share its response rather than making their own request.  Defaults to False.
+
+            websocket_operations : Iterable[str] (optional)
+                The operations ('publish' and/or 'execute') sent over the websocket connection used for
+                subscriptions rather than as HTTP requests.  The connection is started if need be; while it is
+                unavailable, the operations are sent as HTTP requests.  Operations sent over the websocket are not
+                retried, so calls given a retry argument (and executions with headers) always use HTTP.  Defaults
+                to None (all operations use HTTP).
+
+            lazy_body : bool (optional)
+                Whether JSON response bodies are kept as bytes (available as VantiqResponse.raw) and decoded only
+                when VantiqResponse.body is first accessed.  Defaults to False (bodies are decoded when received).
+
             connect_args : the set of named connection arguments (optional)
                 These are passed through to the aiohttp and websockets connect calls
 
@@ -403,6 +1658,10 @@ class Vantiq:
             ::
                 client = Vantiq('https://dev.vantiq.com', '1', ssl=False)
 
+            to size the connection pool
+            ::
+                client = Vantiq('https://dev.vantiq.com', pool_config=VantiqPoolConfig(limit=200, limit_per_host=50))
+
         """
         self._vlog: Logger = logging.getLogger(self.__class__.__name__)
 
@@ -421,9 +1680,33 @@ class Vantiq:
         self._auth_header = None
         self._connection = None
         self._is_connected = False
-        self._connection = _RestClient(self._server, **connect_args)
+        if isinstance(json_codec, VantiqJsonCodec):
+            self._json_codec = json_codec
+        else:
+            self._json_codec = VantiqJsonCodec.create(json_codec) if json_codec else _DEFAULT_CODEC
+        self._connection = _RestClient(self._server, pool_config, **connect_args)
         self._base_path = '/api/v' + self._api_version + '/'
         self._subscriber: Union[_VantiqSubscriber, None] = None
+        self._subscriber_config = subscriber_config or VantiqSubscriberConfig()
+        self._auto_refresh = False
+        self._refresh_margin: Union[float, None] = None
+        self._refresh_margin_warned = False
+        self._token_provider: Union[Callable[[], Awaitable[str]], None] = None
+        self._refresh_task: Union[asyncio.Task, None] = None
+        self._proactive_refresh_task: Union[asyncio.Task, None] = None
+        self._retry_policy = retry_policy
+        self._response_cache = response_cache
+        self._coalesce_reads = coalesce_reads
+        self._in_flight_reads: Dict[tuple, asyncio.Future] = {}
+        self._lazy_body = lazy_body
+        self._websocket_operations = frozenset(websocket_operations or ())
+        if not self._websocket_operations <= self.WEBSOCKET_OPERATIONS:
+            raise VantiqException('io.vantiq.python.websocketoperations.invalid',
+                                  'The websocket_operations may include only {0}. Found {1}.',
+                                  [sorted(self.WEBSOCKET_OPERATIONS), sorted(self._websocket_operations)])
+        self._request_stats = {'token_refreshes': 0, 'token_refresh_failures': 0, 'replayed_after_401': 0,
+                               'retries': 0, 'retried_requests': 0, 'retries_exhausted': 0, 'coalesced_reads': 0,
+                               'websocket_requests': 0}
 
     def __str__(self):
         return f'Vantiq connection to {self._server}, is_connected: {self._is_connected}, ' \
@@ -466,6 +1749,27 @@ class Vantiq:
         """Returns the API version used for this connection."""
         return self._api_version
 
+    def get_json_codec(self) -> VantiqJsonCodec:
+        """Returns the JSON codec used for this connection."""
+        return self._json_codec
+
+    def get_pool_stats(self) -> dict:
+        """Returns the current occupancy of the HTTP connection pool.
+
+        The dict returned contains the following keys:
+            limit (int) The configured total connection limit
+            limit_per_host (int) The configured per-host connection limit
+            in_use (int) The number of connections currently carrying a request
+            idle (int) The number of open connections waiting to be reused
+            in_use_per_host (dict) The number of connections in use, keyed by 'host:port'
+
+        aiohttp does not publish the occupancy of its pool, so it is read from the connector's internals.  If the
+        version of aiohttp installed does not keep them as expected, in_use, idle, and in_use_per_host are None.
+        """
+        if self._connection is None:
+            return {}
+        return self._connection.pool_stats()
+
     async def set_access_token(self, access_token: str) -> None:
         """Set the access token for server access.
 
@@ -481,6 +1785,7 @@ class Vantiq:
         self._access_token = access_token
         self._auth_header = 'Bearer ' + self._access_token
         self._is_authenticated = True  # We have an access token, we'll figure we're OK til we're not
+        self._schedule_proactive_refresh()
 
     def get_access_token(self) -> str:
         """Returns the access token currently in use."""
@@ -534,16 +1839,17 @@ class Vantiq:
         ret_val = VantiqResponse(resp.ok, resp.status, resp.content_type)
         if not resp.ok:
             # noinspection PyProtectedMember
-            await ret_val._populate_errors(resp)
+            await ret_val._populate_errors(resp, self._json_codec)
             self._vlog.error('Authentication to server %s failed: %s', self._server, resp)
-            raise VantiqException(resp.errors[0].code, resp.errors[0].message, resp.errors[0].params)
+            raise VantiqException(ret_val.errors[0].code, ret_val.errors[0].message, ret_val.errors[0].params)
         # noinspection PyProtectedMember
-        await ret_val._populate_body(resp)
+        await ret_val._populate_body(resp, self._json_codec)
         self._access_token = ret_val.body['accessToken']
         self._username = username
         self._id_token = ret_val.body['idToken']
         self._is_authenticated = True
         self._auth_header = 'Bearer ' + self._access_token
+        self._schedule_proactive_refresh()
 
     async def refresh(self) -> None:
         """(Async) Refresh the access token with the Vantiq Server."""
@@ -555,21 +1861,180 @@ class Vantiq:
             if not resp.ok:
                 self._vlog.error('Authentication/refresh to server %s failed: %s', self._server, resp)
                 # noinspection PyProtectedMember
-                await ret_val._populate_errors(resp)
-                raise VantiqException(resp.errors[0].code, resp.errors[0].message, resp.errors[0].params)
+                await ret_val._populate_errors(resp, self._json_codec)
+                raise VantiqException(ret_val.errors[0].code, ret_val.errors[0].message, ret_val.errors[0].params)
             # noinspection PyProtectedMember
-            await ret_val._populate_body(resp)
+            await ret_val._populate_body(resp, self._json_codec)
             self._access_token = ret_val.body['accessToken']
             self._id_token = ret_val.body['idToken']
             self._is_authenticated = True
             self._auth_header = 'Bearer ' + self._access_token
+            self._schedule_proactive_refresh()
         else:
             raise VantiqException('io.vantiq.python.refreshnotauthenticated',
                                   'Cannot refresh access token as this session is not authenticated.',
                                   [])
 
+    def set_auto_refresh(self, enabled: bool = True, refresh_margin: Union[float, None] = 60.0,
+                         token_provider: Union[Callable[[], Awaitable[str]], None] = None) -> None:
+        """Enable (or disable) the automatic refresh of the access token.
+
+        When enabled, a request for a GET, PUT, or DELETE operation (e.g. select(), count(), update(),
+        delete_one()) rejected by the server as unauthorized (HTTP status 401) is replayed once after the access
+        token is refreshed.  However many requests are rejected at once, a single refresh is performed and shared
+        by all of them.
+
+        If the access token is a JWT, it is also refreshed in the background `refresh_margin` seconds before it
+        expires, so that requests do not see it expire.  A token whose remaining lifetime is no longer than the
+        margin is refreshed halfway through it instead (but no sooner than MIN_REFRESH_DELAY seconds).
+
+        Parameters:
+            enabled : bool
+                Whether to refresh the access token automatically.  Defaults to True.
+            refresh_margin : float
+                (optional) Seconds before the access token expires to refresh it.  None disables the background
+                refresh.  Defaults to 60.
+            token_provider : Callable[[], Awaitable[str]]
+                (optional) Called to obtain a new access token (e.g. by authenticating again).  If not provided,
+                refresh() is used.
+        """
+        self._auto_refresh = enabled
+        self._refresh_margin = refresh_margin
+        self._token_provider = token_provider
+        self._schedule_proactive_refresh()
+
+    def get_request_stats(self) -> dict:
+        """Returns counts describing the handling of requests made by this client.
+
+        The dict returned contains the following keys:
+            token_refreshes (int) Access token refreshes made by the automatic refresh
+            token_refresh_failures (int) Automatic refreshes that failed
+            replayed_after_401 (int) Requests replayed after being rejected as unauthorized
+            retries (int) Attempts made to retry failed requests
+            retried_requests (int) Requests that were retried at least once
+            retries_exhausted (int) Requests that still failed after the retry policy's max_attempts
+            coalesced_reads (int) Requests answered by sharing an identical request already in flight
+            websocket_requests (int) Operations sent over the websocket connection rather than as HTTP requests
+        """
+        return dict(self._request_stats)
+
+    async def _websocket_request(self, operation: str, resource: str, resource_id: str,
+                                 instance: Union[dict, list, None]) -> Union[VantiqResponse, None]:
+        """Send the operation over the subscription websocket if so configured, returning None if it was not sent."""
+        if operation not in self._websocket_operations:
+            return None
+        if self._subscriber is None:
+            # noinspection PyBroadException
+            try:
+                await self.start_subscriber_transport()
+            except Exception:
+                self._vlog.warning('Unable to start the websocket connection for %s; using HTTP.', operation,
+                                   exc_info=True)
+                return None
+        if not self._subscriber.connected:
+            # Reconnecting (or closed), so don't wait for it
+            return None
+        self._request_stats['websocket_requests'] += 1
+        try:
+            return await self._subscriber.request(operation, resource[len(_SYSTEM_PREFIX):], resource_id, instance)
+        except VantiqException:
+            raise
+        except Exception as e:
+            raise VantiqException('io.vantiq.python.operationerror',
+                                  'Error performing {0} operation over the websocket: {1}',
+                                  [operation, e]) from e
+
+    def get_cache_stats(self) -> Union[dict, None]:
+        """Returns the statistics of the response cache (see VantiqResponseCache.stats()), or None if there is none."""
+        return self._response_cache.stats() if self._response_cache is not None else None
+
+    async def _refresh_after_unauthorized(self, failed_auth_header: str) -> bool:
+        # If the token changed while the request was in flight, just try again with the new one
+        if self._auth_header == failed_auth_header:
+            # noinspection PyBroadException
+            try:
+                await self._refresh_token()
+            except Exception:
+                self._vlog.exception('Unable to refresh the access token for server %s', self._server)
+                return False
+        return True
+
+    async def _refresh_token(self) -> None:
+        # Everyone needing a refresh waits on the same one
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._do_refresh())
+        # Shielded so that one waiter being cancelled doesn't cancel the refresh for the others
+        await asyncio.shield(self._refresh_task)
+
+    async def _do_refresh(self) -> None:
+        try:
+            if self._token_provider is not None:
+                access_token = await self._token_provider()
+                self._access_token = access_token
+                self._auth_header = 'Bearer ' + self._access_token
+                self._is_authenticated = True
+                self._schedule_proactive_refresh()
+            else:
+                await self.refresh()
+            self._request_stats['token_refreshes'] += 1
+        except Exception:
+            self._request_stats['token_refresh_failures'] += 1
+            raise
+
+    @staticmethod
+    def _token_expiration(token: Union[str, None]) -> Union[float, None]:
+        """Returns the expiration time (in seconds since the epoch) of a JWT, or None if unknown."""
+        if not token or token.count('.') != 2:
+            return None
+        # noinspection PyBroadException
+        try:
+            payload = token.split('.')[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+            expiration = claims.get('exp') if isinstance(claims, dict) else None
+            return float(expiration) if isinstance(expiration, (int, float)) else None
+        except Exception:
+            return None
+
+    def _schedule_proactive_refresh(self) -> None:
+        if self._proactive_refresh_task is not None:
+            if self._proactive_refresh_task is not asyncio.current_task():
+                self._proactive_refresh_task.cancel()
+            self._proactive_refresh_task = None
+        if not self._auto_refresh or self._refresh_margin is None:
+            return
+        expiration = self._token_expiration(self._access_token)
+        if expiration is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Not running yet.  We'll schedule this when the token is next set.
+            return
+        remaining = expiration - time.time()
+        if remaining > self._refresh_margin:
+            delay = remaining - self._refresh_margin
+        else:
+            # Refreshing at once would (if each new token lives no longer than the margin) refresh continually
+            if not self._refresh_margin_warned:
+                self._refresh_margin_warned = True
+                self._vlog.warning('The refresh margin (%s seconds) is longer than the remaining lifetime of the '
+                                   'access token (%.1f seconds).  It will be refreshed halfway through its '
+                                   'lifetime instead.', self._refresh_margin, remaining)
+            delay = max(self.MIN_REFRESH_DELAY, remaining / 2)
+        self._proactive_refresh_task = asyncio.create_task(self._refresh_later(delay))
+
+    async def _refresh_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # noinspection PyBroadException
+        try:
+            await self._refresh_token()
+        except Exception:
+            self._vlog.exception('Unable to refresh the access token for server %s', self._server)
+
     async def close(self):
         """(Async) End the Vantiq session"""
+        self._auto_refresh = False
+        self._schedule_proactive_refresh()
         self._is_authenticated = False
         self._access_token = None
         self._id_token = None
@@ -628,32 +2093,94 @@ class Vantiq:
 
     async def _perform_operation(self, operation: str, method: str, path: str,
                                  query_params: Union[dict, None], is_streaming: bool,
-                                 instance: Union[dict, None] = None, headers: Union[dict, None] = None) -> VantiqResponse:
+                                 instance: Union[dict, list, bytes, None] = None,
+                                 headers: Union[dict, None] = None,
+                                 retry: Union[VantiqRetryPolicy, bool, None] = None,
+                                 cache_resource: Union[str, None] = None,
+                                 coalesce: bool = False,
+                                 discard_body: bool = False,
+                                 raw: bool = False) -> VantiqResponse:
         if self._is_authenticated:
+            cache = self._response_cache
+            if cache is None or cache_resource is None or not cache.caches(cache_resource):
+                cache = None
+            elif method != 'GET':
+                try:
+                    return await self._perform_operation(operation, method, path, query_params, is_streaming,
+                                                         instance, headers, retry)
+                finally:
+                    # Even a failed change may have been partially applied
+                    cache.invalidate(cache_resource)
+            cache_key = None
+            generation = 0
+            if cache is not None:
+                cache_key = (cache_resource, path, tuple(sorted((query_params or {}).items())),
+                             self._target_namespace)
+                # noinspection PyProtectedMember
+                entry = cache._get(cache_key)
+                if entry is not None:
+                    _, status, content_type, count, data = entry
+                    ret_val = VantiqResponse(True, status, content_type)
+                    ret_val.count = count
+                    if raw:
+                        # The bytes cannot be changed, so can be shared
+                        # noinspection PyProtectedMember
+                        ret_val._set_raw_body(data)
+                    else:
+                        # Each caller gets its own copy of the body to do with as it pleases
+                        # noinspection PyProtectedMember
+                        ret_val._decode_body(data, self._json_codec, self._lazy_body)
+                    return ret_val
+                # noinspection PyProtectedMember
+                generation = cache._generation(cache_resource)
             try:
                 headers = headers or {}
-                headers.update(self._get_auth_headers())
                 if instance is None:
                     # When no parameters are passed at all, we get 404's back.  So None as parameters == {}.
                     instance = {}
 
-                body = json.dumps(instance)
+                # Instances already encoded (e.g. by a prepared query) are sent as is
+                body = instance if isinstance(instance, bytes) else self._json_codec.encode(instance)
                 headers[aiohttp.hdrs.CONTENT_TYPE] = 'application/json'
-                resp: aiohttp.ClientResponse = await self._connection.request(method, path, headers=headers,
-                                                                              query_param=query_params, body=body)
-                ret_val = VantiqResponse(resp.ok, resp.status, resp.content_type)
-                if resp.ok:
-                    # noinspection PyProtectedMember
-                    ret_val._populate_count(resp)
-                    if is_streaming:
+                policy = self._resolve_retry_policy(method, retry)
+
+                async def exchange() -> (VantiqResponse, Union[bytes, None]):
+                    resp = await self._send_request(method, path, query_params, headers, body, policy)
+                    ret_val = VantiqResponse(resp.ok, resp.status, resp.content_type)
+                    data = None
+                    if resp.ok:
                         # noinspection PyProtectedMember
-                        ret_val._populate_streaming_body(resp)
+                        ret_val._populate_count(resp)
+                        if is_streaming:
+                            # noinspection PyProtectedMember
+                            ret_val._populate_streaming_body(resp)
+                        elif discard_body:
+                            # Read the body (without decoding it) so that the connection can be reused
+                            await resp.read()
+                        elif raw:
+                            # noinspection PyProtectedMember
+                            ret_val._set_raw_body(await resp.read())
+                            if ret_val.content_type == _MIMETYPE_JSON:
+                                data = ret_val.raw
+                                if cache_key is not None:
+                                    # noinspection PyProtectedMember
+                                    cache._put(cache_key, generation, ret_val.status_code, ret_val.content_type,
+                                               ret_val.count, data)
+                        else:
+                            # noinspection PyProtectedMember
+                            data = await ret_val._populate_body(resp, self._json_codec, self._lazy_body)
+                            if cache_key is not None and data is not None:
+                                # noinspection PyProtectedMember
+                                cache._put(cache_key, generation, ret_val.status_code, ret_val.content_type,
+                                           ret_val.count, data)
                     else:
                         # noinspection PyProtectedMember
-                        await ret_val._populate_body(resp)
-                else:
-                    # noinspection PyProtectedMember
-                    await ret_val._populate_errors(resp)
+                        await ret_val._populate_errors(resp, self._json_codec)
+                    return ret_val, data
+
+                if coalesce and self._coalesce_reads and method == 'GET' and not is_streaming:
+                    return await self._coalesce(path, query_params, exchange, raw)
+                ret_val, _ = await exchange()
                 return ret_val
             except Exception as e:
                 raise VantiqException('io.vantiq.python.operationerror',
@@ -665,12 +2192,121 @@ class Vantiq:
                                   'A {0} request was made on a session that is not connected.',
                                   [operation])
 
+    async def _coalesce(self, path: str, query_params: Union[dict, None],
+                        exchange: Callable[[], Awaitable[tuple]], raw: bool = False) -> VantiqResponse:
+        # Requests are identical only if made to the same place, by the same user, in the same namespace, and
+        # wanting the body in the same form (non-JSON bodies are shared as decoded, so raw & decoded can't mix)
+        key = (path, tuple(sorted((query_params or {}).items())), self._auth_header, self._target_namespace,
+               self._username if self._impersonate else None, raw)
+        shared = self._in_flight_reads.get(key)
+        if shared is None:
+            # The request is run as its own task so that cancelling the caller that started it doesn't
+            # cancel it for everyone else
+            shared = asyncio.ensure_future(exchange())
+            self._in_flight_reads[key] = shared
+            shared.add_done_callback(lambda _: self._in_flight_reads.pop(key, None))
+            ret_val, _ = await asyncio.shield(shared)
+            return ret_val
+        self._request_stats['coalesced_reads'] += 1
+        shared_val, data = await asyncio.shield(shared)
+        # Each caller gets its own response to do with as it pleases
+        ret_val = VantiqResponse(shared_val.is_success, shared_val.status_code, shared_val.content_type)
+        ret_val.count = shared_val.count
+        ret_val.errors = list(shared_val.errors) if shared_val.errors is not None else None
+        if raw:
+            # Only raw requests share this one, so its body is the bytes as received
+            # noinspection PyProtectedMember
+            ret_val._set_raw_body(shared_val.raw)
+        elif data is not None:
+            # noinspection PyProtectedMember
+            ret_val._decode_body(data, self._json_codec, self._lazy_body)
+        else:
+            ret_val.body = shared_val.body
+        return ret_val
+
+    def _resolve_retry_policy(self, method: str,
+                              retry: Union[VantiqRetryPolicy, bool, None]) -> Union[VantiqRetryPolicy, None]:
+        if isinstance(retry, VantiqRetryPolicy):
+            return retry
+        elif retry is None:
+            return self._retry_policy if method in _IDEMPOTENT_METHODS else None
+        elif retry:
+            return self._retry_policy or VantiqRetryPolicy()
+        return None
+
+    async def _send_request(self, method: str, path: str, query_params: Union[dict, None], headers: dict,
+                            body: bytes, policy: Union[VantiqRetryPolicy, None]) -> aiohttp.ClientResponse:
+        replayed = False
+        attempt = 1
+        while True:
+            auth_header = self._auth_header
+            headers.update(self._get_auth_headers())
+            try:
+                resp: aiohttp.ClientResponse = await self._connection.request(method, path, headers=headers,
+                                                                              query_param=query_params, body=body)
+            except VantiqException as e:
+                # noinspection PyProtectedMember
+                if policy is None or not VantiqRetryPolicy._is_retryable_error(e.__cause__):
+                    raise
+                if attempt >= policy.max_attempts:
+                    self._request_stats['retries_exhausted'] += 1
+                    raise
+                delay = policy.backoff(attempt)
+            else:
+                if resp.status == 401 and self._auto_refresh and not replayed and method in _IDEMPOTENT_METHODS:
+                    if await self._refresh_after_unauthorized(auth_header):
+                        resp.release()
+                        replayed = True
+                        self._request_stats['replayed_after_401'] += 1
+                        continue
+                if policy is None or resp.status not in policy.retry_statuses:
+                    return resp
+                if attempt >= policy.max_attempts:
+                    self._request_stats['retries_exhausted'] += 1
+                    return resp
+                # noinspection PyProtectedMember
+                delay = policy._delay(attempt, resp.headers.get(aiohttp.hdrs.RETRY_AFTER))
+                resp.release()
+            self._request_stats['retries'] += 1
+            if attempt == 1:
+                self._request_stats['retried_requests'] += 1
+            attempt += 1
+            self._vlog.debug('Retrying %s %s (attempt %s) in %.3f seconds', method, path, attempt, delay)
+            await asyncio.sleep(delay)
+
+    def _build_select_params(self, properties: Union[list, None], where: Union[dict, None],
+                             sort_spec: Union[dict, None], limit: Union[int, None], options: Union[dict, None],
+                             with_count: bool = True) -> dict:
+        query_params = {}
+        if properties:
+            query_params['props'] = self._json_codec.encode_str(properties)
+        if where is not None:
+            query_params['where'] = self._json_codec.encode_str(where)
+        if sort_spec:
+            query_params['sort'] = self._json_codec.encode_str(sort_spec)
+        if limit is not None and limit > 0:
+            query_params['limit'] = limit
+            if with_count:
+                query_params['count'] = 'true'
+        if options:
+            for key, value in options.items():
+                if isinstance(key, str) and isinstance(value, str):
+                    query_params[key] = value
+                else:
+                    raise VantiqException('io.vantiq.python.option.stringsrequired',
+                                          'Options to queries must be of type str. ' +
+                                          'Found key {0}:{1} and value {2}:{3}.',
+                                          [key, type(key).__name__, value, type(value).__name__])
+        return query_params
+
     async def select(self, resource: str,
                      properties: Union[list, None] = None,
                      where: Union[dict, None] = None,
                      sort_spec: Union[dict, None] = None,
                      limit: Union[int, None] = None,
-                     options: Union[dict, None] = None) -> VantiqResponse:
+                     options: Union[dict, None] = None,
+                     retry: Union[VantiqRetryPolicy, bool, None] = None,
+                     raw: bool = False) -> VantiqResponse:
         """(Async) Return items from a Vantiq resource.
 
         Select specific items from a Vantiq resource. Selection and details of the return are controlled
@@ -693,6 +2329,11 @@ class Vantiq:
                 (optional) Limit the number of records returned
             options : dict (str, *)
                 (optional) Additional query parameter options
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  Selects are idempotent, so the client's
+                policy applies unless False is given.  See VantiqRetryPolicy.
+            raw : bool
+                (optional) Return the body as the bytes received, without decoding them.  Defaults to False.
         Returns:
             VantiqResponse
 
@@ -704,28 +2345,11 @@ class Vantiq:
         """
         operation = 'select'
         try:
-            query_params = {}
-            if properties:
-                query_params['props'] = json.dumps(properties)
-            if where is not None:
-                query_params['where'] = json.dumps(where)
-            if sort_spec:
-                query_params['sort'] = json.dumps(sort_spec)
-            if limit is not None and limit > 0:
-                query_params['limit'] = limit
-                query_params['count'] = 'true'
-            if options:
-                for key, value in options.items():
-                    if isinstance(key, str) and isinstance(value, str):
-                        query_params[key] = value
-                    else:
-                        raise VantiqException('io.vantiq.python.option.stringsrequired',
-                                              'Options to queries must be of type str. ' +
-                                              'Found key {0}:{1} and value {2}:{3}.',
-                                              [key, type(key).__name__, value, type(value).__name__])
+            query_params = self._build_select_params(properties, where, sort_spec, limit, options)
             method = 'GET'
             path = self._build_path(resource, None)
-            resp = await self._perform_operation(operation, method, path, query_params, False)
+            resp = await self._perform_operation(operation, method, path, query_params, False, retry=retry,
+                                                 cache_resource=resource, coalesce=True, raw=raw)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -735,7 +2359,8 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def select_one(self, resource: str, resource_id: str = None) -> VantiqResponse:
+    async def select_one(self, resource: str, resource_id: str = None,
+                         retry: Union[VantiqRetryPolicy, bool, None] = None, raw: bool = False) -> VantiqResponse:
         """(Async) Select a single item from a Vantiq resource
 
         Parameters:
@@ -743,6 +2368,11 @@ class Vantiq:
                 The name of the resource from which to select.
             resource_id : str
                 The identifier for the specific item within the resource.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  Selects are idempotent, so the client's
+                policy applies unless False is given.  See VantiqRetryPolicy.
+            raw : bool
+                (optional) Return the body as the bytes received, without decoding them.  Defaults to False.
         Returns:
             VantiqResponse object
 
@@ -757,7 +2387,8 @@ class Vantiq:
             method = 'GET'
             query_params = {}
             path = self._build_path(resource, resource_id)
-            resp = await self._perform_operation(operation, method, path, query_params, False)
+            resp = await self._perform_operation(operation, method, path, query_params, False, retry=retry,
+                                                 cache_resource=resource, coalesce=True, raw=raw)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -767,7 +2398,171 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def delete(self, resource: str, where: Union[dict, None]) -> VantiqResponse:
+    async def select_iter(self, resource: str,
+                          properties: Union[list, None] = None,
+                          where: Union[dict, None] = None,
+                          sort_spec: Union[dict, None] = None,
+                          page_size: int = 1000,
+                          options: Union[dict, None] = None) -> AsyncIterator[dict]:
+        """(Async iterator) Return items from a Vantiq resource one page at a time.
+
+        The items are fetched in pages of `page_size` using keyset pagination: each page is selected using the
+        `_id` (and sort property, if any) of the last item of the previous page.  The next page is fetched while
+        the caller is working on the current one, so no more than two pages are held in memory at a time.
+
+        Parameters:
+            resource : str
+                The name of the resource to be returned.  System resource names are provided via the VantiqResource
+                class.
+            properties : list(str)
+                (optional) The list of properties for the resource to be returned. If missing, return all properties.
+            where : dict(str: *)
+                (optional) The "where clause" to be used to restrict the selection.  The contents are defined
+                in the API Reference Guide.
+            sort_spec : dict(str: int)
+                (optional) Defines the sort order of the returned values.  At most one property other than `_id`
+                may be used.  Items without a value for it (missing or null) sort before those with one.  Defaults
+                to sorting by `_id`.
+            page_size : int
+                (optional) The number of items fetched per request.  Defaults to 1000.
+            options : dict (str, *)
+                (optional) Additional query parameter options
+        Returns:
+            An async iterator over the items selected.
+        Raises:
+            VantiqException if the arguments are invalid or a page cannot be fetched.
+
+        Examples:
+        ::
+            async for record in client.select_iter('myType', where={'status': 'open'}, page_size=500):
+                ...
+        """
+        if page_size is None or page_size <= 0:
+            raise VantiqException('io.vantiq.python.selectiter.pagesize',
+                                  'The page size for select_iter() must be a positive integer. Found {0}.',
+                                  [page_size])
+        sort_spec = dict(sort_spec) if sort_spec else {'_id': 1}
+        sort_keys = [key for key in sort_spec.keys() if key != '_id']
+        if len(sort_keys) > 1:
+            raise VantiqException('io.vantiq.python.selectiter.sortspec',
+                                  'select_iter() supports sorting on at most one property other than _id. '
+                                  'Found {0}.',
+                                  [list(sort_spec.keys())])
+        sort_key = sort_keys[0] if sort_keys else None
+        direction = sort_spec[sort_key] if sort_key else sort_spec['_id']
+        if sort_spec.get('_id', direction) != direction:
+            raise VantiqException('io.vantiq.python.selectiter.sortdirection',
+                                  'select_iter() requires _id to be sorted in the same direction as {0}.',
+                                  [sort_key])
+        # Order by _id within equal sort values so that each item has a unique position
+        page_sort = {sort_key: direction, '_id': direction} if sort_key else {'_id': direction}
+        comparison = '$gt' if direction >= 0 else '$lt'
+
+        # Pagination needs _id & the sort property.  Remove them afterward if the caller did not ask for them.
+        page_props = None
+        added_props = []
+        if properties:
+            page_props = list(properties)
+            for prop in ('_id', sort_key):
+                if prop and prop not in page_props:
+                    page_props.append(prop)
+                    added_props.append(prop)
+
+        async def fetch_page(last: Union[tuple, None]) -> list:
+            page_where = where
+            if last is not None:
+                last_value, last_id = last
+                if sort_key and last_value is None:
+                    # Items without a sort value (missing or null) sort before those with one.  After the last one,
+                    # ascending, come the rest without a value and then every item with one; descending, only the
+                    # rest without a value.
+                    after = {sort_key: None, '_id': {comparison: last_id}}
+                    if direction >= 0:
+                        after = {'$or': [after, {sort_key: {'$ne': None}}]}
+                elif sort_key:
+                    after = {'$or': [{sort_key: {comparison: last_value}},
+                                     {sort_key: last_value, '_id': {comparison: last_id}}]}
+                    if direction < 0:
+                        # Descending, the items without a sort value come last, and the comparison never matches them
+                        after['$or'].append({sort_key: None})
+                else:
+                    after = {'_id': {comparison: last_id}}
+                page_where = after if where is None else {'$and': [where, after]}
+            query_params = self._build_select_params(page_props, page_where, page_sort, page_size, options,
+                                                     with_count=False)
+            path = self._build_path(resource, None)
+            vr = await self._perform_operation('select', 'GET', path, query_params, False)
+            if not vr.is_success:
+                err = vr.errors[0]
+                raise VantiqException(err.code, err.message, err.params)
+            return vr.body or []
+
+        next_page = asyncio.create_task(fetch_page(None))
+        try:
+            while next_page is not None:
+                page = await next_page
+                next_page = None
+                if len(page) >= page_size:
+                    # Start on the next page while the caller works through this one
+                    last = page[-1]
+                    next_page = asyncio.create_task(fetch_page((last.get(sort_key) if sort_key else None,
+                                                                last['_id'])))
+                for record in page:
+                    for prop in added_props:
+                        record.pop(prop, None)
+                    yield record
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+                try:
+                    await next_page
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    def prepare_select(self, resource: str,
+                       properties: Union[list, None] = None,
+                       where: Union[dict, None] = None,
+                       sort_spec: Union[dict, None] = None,
+                       limit: Union[int, None] = None,
+                       options: Union[dict, None] = None,
+                       retry: Union[VantiqRetryPolicy, bool, None] = None) -> 'VantiqPreparedSelect':
+        """Prepare a select() to be run repeatedly.
+
+        The path, properties, sort specification, limit, and options are validated and encoded once.  The where
+        clause may contain VantiqParam placeholders; it is encoded once, and each time the query is run only the
+        values bound to the placeholders are encoded.
+
+        Parameters:
+            resource : str
+                The name of the resource to be returned.
+            properties : list(str)
+                (optional) The list of properties for the resource to be returned. If missing, return all properties.
+            where : dict(str: *)
+                (optional) The "where clause" to be used to restrict the selection, possibly containing VantiqParam
+                placeholders.
+            sort_spec : dict(str: int)
+                (optional) Defines the sort order of the returned values.
+            limit : int
+                (optional) Limit the number of records returned
+            options : dict (str, *)
+                (optional) Additional query parameter options
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each run of the query.
+        Returns:
+            VantiqPreparedSelect
+
+        Example:
+        ::
+            query = client.prepare_select('Reading', where={'sensor': VantiqParam('sensor')},
+                                          sort_spec={'ts': -1}, limit=1)
+            vr: VantiqResponse = await query.select(sensor='s1')
+        """
+        query_params = self._build_select_params(properties, None, sort_spec, limit, options)
+        return VantiqPreparedSelect(self, resource, self._build_path(resource, None), query_params,
+                                    _JsonTemplate(where, self._json_codec) if where is not None else None, retry)
+
+    async def delete(self, resource: str, where: Union[dict, None],
+                     retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Delete item(s) from a Vantiq resource.
 
         Parameters:
@@ -777,6 +2572,9 @@ class Vantiq:
                 The "where clause" to be used to determine which items to delete. The contents are defined
                 in the API Reference Guide.
                 Note that if where is None, this may delete all objects in the resource type.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  Deletes are idempotent, so the client's
+                policy applies unless False is given.  See VantiqRetryPolicy.
         Returns:
             VantiqResponse.  The count property of the VantiqResponse will provide the number of objects deleted.
 
@@ -791,10 +2589,11 @@ class Vantiq:
         try:
             query_params = {'count': 'true'}
             if where is not None:
-                query_params['where'] = json.dumps(where)
+                query_params['where'] = self._json_codec.encode_str(where)
             method = 'DELETE'
             path = self._build_path(resource, None)
-            resp = await self._perform_operation(operation, method, path, query_params, False)
+            resp = await self._perform_operation(operation, method, path, query_params, False, retry=retry,
+                                                 cache_resource=resource)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -804,7 +2603,8 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def delete_one(self, resource: str, resource_id: str) -> VantiqResponse:
+    async def delete_one(self, resource: str, resource_id: str,
+                         retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Delete a single item from a resource.
 
         Parameters:
@@ -812,6 +2612,9 @@ class Vantiq:
                 The name of the Vantiq resource from which to delete.
             resource_id : str
                 The key for the item to delete.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  Deletes are idempotent, so the client's
+                policy applies unless False is given.  See VantiqRetryPolicy.
 
         Returns:
             VantiqResponse indicating success of the operation
@@ -821,7 +2624,8 @@ class Vantiq:
         try:
             method = 'DELETE'
             path = self._build_path(resource, resource_id)
-            resp = await self._perform_operation(operation, method, path, None, False)
+            resp = await self._perform_operation(operation, method, path, None, False, retry=retry,
+                                                 cache_resource=resource)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -831,7 +2635,8 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def insert(self, resource: str, instance: dict) -> VantiqResponse:
+    async def insert(self, resource: str, instance: dict,
+                     retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Insert an item into Vantiq Resource.
 
         Parameters:
@@ -840,6 +2645,9 @@ class Vantiq:
             instance : dict
                 The values to be inserted.  The key names in the _instance_ parameter
                 must match the property names in the Vantiq object.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  A retried insert may create the item
+                twice, so inserts are retried only when True or a VantiqRetryPolicy is given.
 
         Returns:
             VantiqResponse indicating success/failure of the operation and the value inserted.
@@ -852,7 +2660,8 @@ class Vantiq:
         try:
             method = 'POST'
             path = self._build_path(resource, None)
-            resp = await self._perform_operation(operation, method, path, None, False, instance)
+            resp = await self._perform_operation(operation, method, path, None, False, instance, retry=retry,
+                                                 cache_resource=resource)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -862,7 +2671,8 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def upsert(self, resource: str, instance: dict) -> VantiqResponse:
+    async def upsert(self, resource: str, instance: dict,
+                     retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Upsert an item into Vantiq Resource.
 
             Parameters:
@@ -871,6 +2681,9 @@ class Vantiq:
                 instance : dict
                     The values to be upserted.   The key names in the _instance_ parameter
                     must match the property names in the Vantiq object.
+                retry : VantiqRetryPolicy | bool
+                    (optional) Overrides the client's retry policy for this call.  Upserts are not retried unless
+                    True or a VantiqRetryPolicy is given, which is safe when the type has natural keys.
 
             Returns:
                 VantiqResponse indicating success/failure of the operation and the value upserted.
@@ -885,7 +2698,8 @@ class Vantiq:
             query_params = {'upsert': 'true'}
             method = 'POST'
             path = self._build_path(resource, None)
-            resp = await self._perform_operation(operation, method, path, query_params, False, instance)
+            resp = await self._perform_operation(operation, method, path, query_params, False, instance, retry=retry,
+                                                 cache_resource=resource)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -895,7 +2709,188 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def update(self, resource: str, resource_id: str, instance: dict) -> VantiqResponse:
+    async def insert_many(self, resource: str, instances: Union[Iterable[dict], AsyncIterable[dict]],
+                          chunk_size: int = 500, concurrency: int = 4,
+                          retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqBulkResult:
+        """(Async) Insert many items into a Vantiq Resource.
+
+        The items are sent in chunks of up to `chunk_size` items, each chunk being a single request.  Up to
+        `concurrency` chunks are in flight at a time.
+
+        Parameters:
+            resource : str
+                Name of the Vantiq resource into which to insert.
+            instances : Iterable[dict] | AsyncIterable[dict]
+                The items to be inserted.  The items are consumed as they are sent, so generators can be used to
+                avoid holding all the items in memory.
+            chunk_size : int
+                (optional) The maximum number of items sent per request.  Defaults to 500.
+            concurrency : int
+                (optional) The maximum number of requests in flight at a time.  Defaults to 4.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each chunk.  True retries even though
+                the operation is not idempotent, False never retries.
+
+        Returns:
+            VantiqBulkResult summarizing the items inserted and any chunks that failed.
+
+        Example:
+        ::
+            result: VantiqBulkResult = await client.insert_many('myType', ({'id': i} for i in range(100000)))
+            if not result.is_success:
+                for start, count, errors in result.failures:
+                    ...
+        """
+        if instances is None:
+            raise VantiqException('io.vantiq.python.insert.none',
+                                  'The objects to be inserted cannot be None.', [])
+        return await self._perform_bulk('insert', resource, instances, None, chunk_size, concurrency, retry)
+
+    async def upsert_many(self, resource: str, instances: Union[Iterable[dict], AsyncIterable[dict]],
+                          chunk_size: int = 500, concurrency: int = 4,
+                          retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqBulkResult:
+        """(Async) Upsert many items into a Vantiq Resource.
+
+        The items are sent in chunks of up to `chunk_size` items, each chunk being a single request.  Up to
+        `concurrency` chunks are in flight at a time.  As with upsert(), any `_id` property is removed from
+        the items.
+
+        Parameters:
+            resource : str
+                Name of the Vantiq resource into which to upsert.
+            instances : Iterable[dict] | AsyncIterable[dict]
+                The items to be upserted.
+            chunk_size : int
+                (optional) The maximum number of items sent per request.  Defaults to 500.
+            concurrency : int
+                (optional) The maximum number of requests in flight at a time.  Defaults to 4.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each chunk.  True retries even though
+                the operation is not idempotent, False never retries.
+
+        Returns:
+            VantiqBulkResult summarizing the items upserted and any chunks that failed.
+        """
+        if instances is None:
+            raise VantiqException('io.vantiq.python.upsert.none',
+                                  'The objects to be upserted cannot be None.', [])
+        return await self._perform_bulk('upsert', resource, instances, {'upsert': 'true'}, chunk_size, concurrency,
+                                        retry)
+
+    async def _perform_bulk(self, operation: str, resource: str,
+                            instances: Union[Iterable[dict], AsyncIterable[dict]],
+                            query_params: Union[dict, None], chunk_size: int, concurrency: int,
+                            retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqBulkResult:
+        if chunk_size is None or chunk_size <= 0 or concurrency is None or concurrency <= 0:
+            raise VantiqException('io.vantiq.python.bulk.invalidsize',
+                                  'The chunk_size and concurrency for a bulk {0} must be positive integers. '
+                                  'Found {1} and {2}.',
+                                  [operation, chunk_size, concurrency])
+        result = VantiqBulkResult(operation)
+        started = time.perf_counter()
+        path = self._build_path(resource, None)
+
+        async def send_chunk(start: int, chunk: list) -> None:
+            try:
+                vr = await self._perform_operation(operation, 'POST', path, query_params, False, chunk, retry=retry,
+                                                   cache_resource=resource)
+                if vr.is_success:
+                    # noinspection PyProtectedMember
+                    result._record_success(len(chunk))
+                else:
+                    # noinspection PyProtectedMember
+                    result._record_failure(start, len(chunk), vr.errors or [])
+            except VantiqException as ve:
+                # noinspection PyProtectedMember
+                result._record_failure(start, len(chunk), [VantiqError(ve.code, ve.message, ve.params)])
+
+        in_flight = set()
+        try:
+            start = 0
+            async for chunk in _aiter_chunks(instances, chunk_size):
+                if operation == 'upsert':
+                    for instance in chunk:
+                        instance.pop('_id', None)
+                if len(in_flight) >= concurrency:
+                    _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.add(asyncio.create_task(send_chunk(start, chunk)))
+                start += len(chunk)
+            if in_flight:
+                await asyncio.wait(in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    async def bulk_load(self, resource: str, file_path: str, file_format: Union[str, None] = None,
+                        operation: str = 'insert', processes: Union[int, None] = None, chunk_size: int = 500,
+                        concurrency: int = 4, retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqBulkResult:
+        """(Async) Load the items in a file into a Vantiq Resource, using a pool of processes.
+
+        Encoding large numbers of items is CPU bound, limiting insert_many() and upsert_many() to a single core.
+        Instead, this reads the file's records and hands them out, in slices of chunk_size * concurrency records,
+        to a pool of worker processes.  Each worker runs its own Vantiq client, using this client's server,
+        access token, target namespace, JSON codec, retry policy, and connection arguments (which must be
+        picklable), so no worker authenticates on its own.  Each worker sends its slices as insert_many() or
+        upsert_many() would.
+
+        Parameters:
+            resource : str
+                Name of the Vantiq resource into which to load the items.
+            file_path : str
+                The file containing the items.
+            file_format : str
+                (optional) 'ndjson' (one JSON object per line) or 'csv' (a header row naming the properties,
+                followed by one row per item; the values are strings).  Defaults to 'csv' for files whose names
+                end in '.csv', and 'ndjson' otherwise.
+            operation : str
+                (optional) 'insert' (the default) or 'upsert'.
+            processes : int
+                (optional) The number of worker processes.  Defaults to the number of CPUs.
+            chunk_size : int
+                (optional) The maximum number of items sent per request.  Defaults to 500.
+            concurrency : int
+                (optional) The maximum number of requests in flight at a time in each worker.  Defaults to 4.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each chunk.
+        Returns:
+            VantiqBulkResult summarizing the items loaded, any that failed, and the throughput.  The start index of
+            a failure is the position of the record in the file (not counting blank lines or the CSV header).
+            Records that cannot be parsed are reported as failures of a single item.
+
+        The worker processes are started using the spawn start method, so each imports the calling script's main
+        module.  A script calling bulk_load() must therefore do so only from within an
+        `if __name__ == '__main__':` block, as for any use of multiprocessing with spawn.
+
+        Example:
+        ::
+            result: VantiqBulkResult = await client.bulk_load('Reading', 'readings.ndjson', processes=8)
+            print(f'{result.succeeded} items loaded at {result.items_per_second:.0f} items/second')
+        """
+        if not self._access_token:
+            raise VantiqException('io.vantiq.python.bulkload.notauthenticated',
+                                  'The client must be authenticated before a bulk load.', [])
+        if file_format is None:
+            file_format = 'csv' if file_path.lower().endswith('.csv') else 'ndjson'
+        if operation not in ('insert', 'upsert') or file_format not in ('ndjson', 'csv'):
+            raise VantiqException('io.vantiq.python.bulkload.invalid',
+                                  'A bulk load operation must be insert or upsert, and the format ndjson or csv. '
+                                  'Found {0} and {1}.', [operation, file_format])
+        if chunk_size is None or chunk_size <= 0 or concurrency is None or concurrency <= 0 \
+                or (processes is not None and processes <= 0):
+            raise VantiqException('io.vantiq.python.bulk.invalidsize',
+                                  'The chunk_size, concurrency, and processes for a bulk load must be positive '
+                                  'integers. Found {0}, {1}, and {2}.', [chunk_size, concurrency, processes])
+        client_args = (self._server, self._api_version, self._access_token, self._target_namespace,
+                       self._json_codec.name, self._retry_policy, self._connect_args)
+        # The parent only reads the file, so it runs in a thread to keep this event loop free
+        return await asyncio.get_running_loop().run_in_executor(
+            None, _bulk_load, client_args, resource, file_path, file_format, operation,
+            processes or os.cpu_count() or 1, chunk_size, concurrency, retry)
+
+    async def update(self, resource: str, resource_id: str, instance: dict,
+                     retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Update an item in a  Vantiq Resource.
 
             Parameters:
@@ -906,6 +2901,9 @@ class Vantiq:
                 instance : dict
                     The values to be updated. The key names in the _instance_ parameter
                     must match the property names being updated in the Vantiq object.
+                retry : VantiqRetryPolicy | bool
+                    (optional) Overrides the client's retry policy for this call.  Updates are idempotent, so the
+                    client's policy applies unless False is given.  See VantiqRetryPolicy.
 
             Returns:
                 VantiqResponse indicating success/failure of the operation and the value updated.
@@ -920,7 +2918,8 @@ class Vantiq:
             query_params = {}
             method = 'PUT'
             path = self._build_path(resource, resource_id)
-            resp = await self._perform_operation(operation, method, path, query_params, False, instance)
+            resp = await self._perform_operation(operation, method, path, query_params, False, instance, retry=retry,
+                                                 cache_resource=resource)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -1042,7 +3041,7 @@ class Vantiq:
             # noinspection PyProtectedMember
             ret_val._populate_count(resp)
             # noinspection PyProtectedMember
-            await ret_val._populate_body(resp)
+            await ret_val._populate_body(resp, self._json_codec)
             return ret_val
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -1052,7 +3051,8 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   ['upload']) from e
 
-    async def count(self, resource: str, where: Union[dict, None] = None) -> VantiqResponse:
+    async def count(self, resource: str, where: Union[dict, None] = None,
+                    retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Return the number of items in a Vantiq resource that satisfy the where clause
 
         Parameters:
@@ -1062,6 +3062,9 @@ class Vantiq:
             where : dict(str: *)
                 (optional) The "where clause" to be used to restrict the counting.  The where clause is defined
                 in the API Reference Guide.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  Counts are idempotent, so the client's
+                policy applies unless False is given.  See VantiqRetryPolicy.
         Returns:
             VantiqResponse where the `count` field contains the count requested.
         """
@@ -1072,12 +3075,13 @@ class Vantiq:
             # the return to a single row & limit the properties returned
             query_params = {'count': 'true', 'limit': 1}
             if where is not None:
-                query_params['where'] = json.dumps(where)
+                query_params['where'] = self._json_codec.encode_str(where)
             props = ['_id']  # Since we don't care about the data, return the least we can
-            query_params['props'] = json.dumps(props)
+            query_params['props'] = self._json_codec.encode_str(props)
             method = 'GET'
             path = self._build_path(resource, None)
-            resp = await self._perform_operation(operation, method, path, query_params, False)
+            resp = await self._perform_operation(operation, method, path, query_params, False, retry=retry,
+                                                 coalesce=True, discard_body=True)
             resp.body = {}  # After a count, we don't need to return the data fetched (since we decided it anyway)
             return resp
         except VantiqException:
@@ -1088,7 +3092,43 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def query(self, source_id: str, query: dict) -> VantiqResponse:
+    async def count_many(self, resource: str, wheres: Iterable[Union[dict, None]], concurrency: int = 8,
+                         retry: Union[VantiqRetryPolicy, bool, None] = None) -> List[VantiqResponse]:
+        """(Async) Return the number of items in a Vantiq resource satisfying each of several where clauses
+
+        The counts are requested concurrently, with up to `concurrency` requests in flight at a time.
+
+        Parameters:
+            resource : str
+                The name of the resource to be counted.
+            wheres : Iterable[dict(str: *)]
+                The "where clauses" for which to count.  None counts every item.
+            concurrency : int
+                (optional) The maximum number of requests in flight at a time.  Defaults to 8.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for these calls.
+        Returns:
+            list of VantiqResponse, one per where clause in the order given, where the `count` field contains the
+            count requested.
+
+        Example:
+        ::
+            open_vr, closed_vr = await client.count_many('Ticket', [{'status': 'open'}, {'status': 'closed'}])
+        """
+        if concurrency is None or concurrency <= 0:
+            raise VantiqException('io.vantiq.python.countmany.concurrency',
+                                  'The concurrency for count_many must be a positive integer. Found {0}.',
+                                  [concurrency])
+        limiter = asyncio.Semaphore(concurrency)
+
+        async def count_one(where: Union[dict, None]) -> VantiqResponse:
+            async with limiter:
+                return await self.count(resource, where, retry=retry)
+
+        return list(await asyncio.gather(*(count_one(where) for where in wheres)))
+
+    async def query(self, source_id: str, query: dict,
+                    retry: Union[VantiqRetryPolicy, bool, None] = None, raw: bool = False) -> VantiqResponse:
         """(Async) Send a query message to a Vantiq source
 
         Parameters:
@@ -1096,6 +3136,11 @@ class Vantiq:
                 Name of the source to which to send the query
             query : dict
                 The message describing the query to be sent.  These messages are source specific.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  The source may act on each query it
+                receives, so queries are retried only when True or a VantiqRetryPolicy is given.
+            raw : bool
+                (optional) Return the body as the bytes received, without decoding them.  Defaults to False.
 
         Returns:
             VantiqResponse indicating the success or failure of the query.  The body field will contain the results
@@ -1107,7 +3152,8 @@ class Vantiq:
             query_params = {}
             method = 'POST'
             path = self._build_path(VantiqResources.SOURCES, source_id, 'query')
-            resp = await self._perform_operation(operation, method, path, query_params, False, query)
+            resp = await self._perform_operation(operation, method, path, query_params, False, query, retry=retry,
+                                                 raw=raw)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -1117,7 +3163,8 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def execute(self, procedure_id: str, params: dict, headers: Union[dict, None] = None) -> VantiqResponse:
+    async def execute(self, procedure_id: str, params: dict, headers: Union[dict, None] = None,
+                      retry: Union[VantiqRetryPolicy, bool, None] = None, raw: bool = False) -> VantiqResponse:
         """(Async) Execute a Vantiq procedure.
 
         Parameters:
@@ -1126,6 +3173,11 @@ class Vantiq:
             params : dict
                 The parameters provided for the procedure's execution.  The key names are the parameter names,
                 and the values their values.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  Procedures may have side effects, so
+                executions are retried only when True or a VantiqRetryPolicy is given.
+            raw : bool
+                (optional) Return the body as the bytes received, without decoding them.  Defaults to False.
         Returns:
             VantiqResponse where the body contains the results of the procedure execution, if any.
 
@@ -1133,10 +3185,17 @@ class Vantiq:
 
         operation = 'execute'
         try:
+            if not headers and not raw and retry is None:
+                # Websocket responses arrive decoded, so raw results come over HTTP.  So do executions asking to be
+                # retried, since only HTTP requests are.
+                resp = await self._websocket_request(operation, _SYSTEM_PREFIX + 'procedures', procedure_id, params)
+                if resp is not None:
+                    return resp
             query_params = {}
             method = 'POST'
             path = self._build_path(_SYSTEM_PREFIX + 'procedures', procedure_id)
-            resp = await self._perform_operation(operation, method, path, query_params, False, params, headers)
+            resp = await self._perform_operation(operation, method, path, query_params, False, params, headers,
+                                                 retry=retry, raw=raw)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -1146,7 +3205,110 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
-    async def publish(self, resource: str, resource_id: str, msg: dict) -> VantiqResponse:
+    def prepare_execute(self, procedure_id: str, params: Union[dict, None] = None,
+                        headers: Union[dict, None] = None,
+                        retry: Union[VantiqRetryPolicy, bool, None] = None) -> 'VantiqPreparedExecute':
+        """Prepare the execution of a procedure to be run repeatedly.
+
+        The parameters may contain VantiqParam placeholders.  They are encoded once, and each time the procedure is
+        executed only the values bound to the placeholders are encoded.
+
+        Parameters:
+            procedure_id : str
+                The name of the procedure to execute.
+            params : dict
+                (optional) The parameters provided for the procedure's execution, possibly containing VantiqParam
+                placeholders.
+            headers : dict
+                (optional) Additional HTTP headers sent with each execution.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each execution.
+        Returns:
+            VantiqPreparedExecute
+
+        Example:
+        ::
+            record = client.prepare_execute('recordReading', {'sensor': 's1', 'value': VantiqParam('value')})
+            vr: VantiqResponse = await record.execute(value=42)
+        """
+        return VantiqPreparedExecute(self, self._build_path(_SYSTEM_PREFIX + 'procedures', procedure_id),
+                                     _JsonTemplate(params or {}, self._json_codec), headers, retry)
+
+    async def execute_many(self, procedure_id: str, params: Union[Iterable[dict], AsyncIterable[dict]],
+                           concurrency: int = 8, ordered: bool = True, headers: Union[dict, None] = None,
+                           retry: Union[VantiqRetryPolicy, bool, None] = None) -> AsyncIterator[VantiqExecuteResult]:
+        """(Async iterator) Execute a Vantiq procedure once for each of many sets of parameters.
+
+        Up to `concurrency` executions are in flight at a time, sharing the client's pooled connections.  The
+        parameters are read from `params` only as the executions proceed, so it may be a generator producing
+        more sets of parameters than fit in memory.
+
+        Parameters:
+            procedure_id : str
+                The name of the procedure to execute.
+            params : Iterable[dict] | AsyncIterable[dict]
+                The parameters for each execution.
+            concurrency : int
+                (optional) The maximum number of executions in flight at a time.  Defaults to 8.
+            ordered : bool
+                (optional) Yield the results in the order of their parameters (the default), or as they complete.
+                When ordered, no more than 2 * concurrency executions are held awaiting a slower predecessor.
+            headers : dict
+                (optional) Additional HTTP headers sent with each execution.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each execution.
+        Returns:
+            An async iterator over the VantiqExecuteResult of each execution.  An execution that cannot be made
+            is reported in its result's `error` rather than raised.
+
+        Example:
+        ::
+            async for result in client.execute_many('scoreReading', readings, concurrency=16):
+                if not result.is_success:
+                    ...
+        """
+        if concurrency is None or concurrency <= 0:
+            raise VantiqException('io.vantiq.python.executemany.concurrency',
+                                  'The concurrency for execute_many must be a positive integer. Found {0}.',
+                                  [concurrency])
+        limiter = asyncio.Semaphore(concurrency)
+        window = concurrency * 2
+
+        async def run(index: int, call_params: dict) -> VantiqExecuteResult:
+            async with limiter:
+                started = time.perf_counter()
+                try:
+                    vr = await self.execute(procedure_id, call_params, dict(headers) if headers else None,
+                                            retry=retry)
+                    return VantiqExecuteResult(index, call_params, vr, time.perf_counter() - started)
+                except VantiqException as e:
+                    return VantiqExecuteResult(index, call_params, None, time.perf_counter() - started, e)
+
+        async def next_result() -> VantiqExecuteResult:
+            if ordered:
+                return await tasks.popleft()
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            task = done.pop()
+            tasks.remove(task)
+            return task.result()
+
+        tasks = collections.deque()
+        try:
+            position = 0
+            async for chunk in _aiter_chunks(params, 1):
+                tasks.append(asyncio.create_task(run(position, chunk[0])))
+                position += 1
+                while len(tasks) >= window:
+                    yield await next_result()
+            while tasks:
+                yield await next_result()
+        finally:
+            # The caller stopped early
+            for task in tasks:
+                task.cancel()
+
+    async def publish(self, resource: str, resource_id: str, msg: dict,
+                      retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
         """(Async) Publish a message to a Vantiq Service (event), Source, or Topic.
 
         Parameters:
@@ -1159,6 +3321,9 @@ class Vantiq:
                 the inbound events for the service in question.
             msg : dict
                 The message to publish
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for this call.  A retried publish may deliver the
+                message twice, so publishes are retried only when True or a VantiqRetryPolicy is given.
         Returns:
             VantiqResponse
 
@@ -1171,10 +3336,14 @@ class Vantiq:
                               [[VantiqResources.SERVICES, VantiqResources.SOURCES, VantiqResources.TOPICS]])
             return VantiqResponse.from_error(err)
         try:
+            # Only HTTP requests are retried, so publishes asking to be are sent that way
+            resp = await self._websocket_request(operation, resource, resource_id, msg) if retry is None else None
+            if resp is not None:
+                return resp
             query_params = {}
             method = 'POST'
             path = self._build_path(resource, resource_id)
-            resp = await self._perform_operation(operation, method, path, query_params, False, msg)
+            resp = await self._perform_operation(operation, method, path, query_params, False, msg, retry=retry)
             return resp
         except VantiqException:
             # If we've already handled or wrapped it, just pass it along
@@ -1184,6 +3353,77 @@ class Vantiq:
                                   'Unexpected error during {0} operation.',
                                   [operation]) from e
 
+    def publisher(self, max_batch_size: int = 100, linger: float = 0.005, max_in_flight: int = 8,
+                  queue_size: int = 10000, batch_mode: str = 'concurrent',
+                  on_error: Union[Callable[[str, str, list, Union[VantiqResponse, Exception]], Awaitable[None]],
+                                  None] = None,
+                  retry: Union[VantiqRetryPolicy, bool, None] = None) -> 'VantiqPublisher':
+        """Create a publisher that publishes messages in the background, in batches.
+
+        See VantiqPublisher for details.
+
+        Parameters:
+            max_batch_size : int
+                (optional) The most messages sent together.  Defaults to 100.
+            linger : float
+                (optional) Seconds to wait for a batch to fill before sending it.  Defaults to 0.005.
+            max_in_flight : int
+                (optional) The maximum number of publish requests in flight at a time.  Defaults to 8.
+            queue_size : int
+                (optional) The number of messages queued before publishing waits for room.  Defaults to 10000.
+            batch_mode : str
+                (optional) 'concurrent' (the default) publishes each message of a batch in its own request.  'array'
+                publishes the messages of a batch for the same destination as a single message containing a list
+                of them; the recipients must expect this.
+            on_error : Callable[[str, str, list, VantiqResponse | Exception], Awaitable[None]]
+                (optional) Called with the resource, resource id, messages, and failing response (or exception)
+                when a publish fails.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each publish request.
+        Returns:
+            VantiqPublisher
+
+        Example:
+        ::
+            async with client.publisher(linger=0.01) as publisher:
+                for reading in readings:
+                    await publisher.publish(VantiqResources.TOPICS, '/readings', reading)
+        """
+        return VantiqPublisher(self, max_batch_size, linger, max_in_flight, queue_size, batch_mode, on_error, retry)
+
+    def conflating_publisher(self, key: Union[str, None] = None, max_rate: Union[float, None] = None,
+                             max_in_flight: int = 8,
+                             on_error: Union[Callable[[str, str, list, Union[VantiqResponse, Exception]],
+                                                      Awaitable[None]], None] = None,
+                             retry: Union[VantiqRetryPolicy, bool, None] = None) -> 'VantiqConflatingPublisher':
+        """Create a publisher that publishes only the latest pending message for each key.
+
+        See VantiqConflatingPublisher for details.
+
+        Parameters:
+            key : str
+                (optional) The (possibly dotted) property of the messages identifying the value they carry, such as
+                a sensor id.  Defaults to None, keeping only the latest message for each resource & resource id.
+            max_rate : float
+                (optional) The most messages published per second.  Defaults to None (no limit).
+            max_in_flight : int
+                (optional) The maximum number of publish requests in flight at a time.  Defaults to 8.
+            on_error : Callable[[str, str, list, VantiqResponse | Exception], Awaitable[None]]
+                (optional) Called with the resource, resource id, messages, and failing response (or exception)
+                when a publish fails.
+            retry : VantiqRetryPolicy | bool
+                (optional) Overrides the client's retry policy for each publish request.
+        Returns:
+            VantiqConflatingPublisher
+
+        Example:
+        ::
+            async with client.conflating_publisher(key='sensorId', max_rate=50) as publisher:
+                async for reading in readings:
+                    await publisher.publish(VantiqResources.TOPICS, '/readings', reading)
+        """
+        return VantiqConflatingPublisher(self, key, max_rate, max_in_flight, on_error, retry)
+
     async def get_namespace_users(self, namespace: str) -> VantiqResponse:
         """(Async) Returns a JsonArray containing objects which map between "username" and "preferredUsername"
 
@@ -1256,7 +3496,8 @@ class Vantiq:
 
     async def subscribe(self, resource: str, resource_id: str, operation: Union[str, None],
                         callback: Callable[[str, dict], Awaitable[None]], params: Union[dict, None] = None,
-                        target_namespace: Union[str, None] = None) -> VantiqResponse:
+                        target_namespace: Union[str, None] = None,
+                        workers: Union[int, None] = None) -> VantiqResponse:
         """(Async) Subscribe to an event from the Vantiq server.
 
         Subscribes to a specific topic, source, service, or type event.
@@ -1295,9 +3536,16 @@ class Vantiq:
                 (optional) Parameters for the subscription. May be subscription dependent, but can usually be ignored.
             target_namespace : str
                 (optional) The namespace in which to subscribe.  If not provided, the current namespace is used.
+            workers : int
+                (optional) The number of worker tasks calling the callback for this subscription.  Defaults to the
+                `workers` value of the client's VantiqSubscriberConfig.
         Returns:
             VantiqResponse indicating the success of the operation.
 
+        Messages are delivered to the callback from a queue for this subscription, so a slow callback does not
+        delay the delivery of messages to other subscriptions.  A backlog longer than the queue_size of the
+        client's VantiqSubscriberConfig is reported as overflowed.  Exceptions raised by the callback are logged.
+
         For details, see the Vantiq API Reference Guide.
         """
 
@@ -1325,7 +3573,11 @@ class Vantiq:
         if self._subscriber is None:
             await self.start_subscriber_transport()
 
-        vr = await self._subscriber.subscribe(path, params, callback, target_namespace)
+        if workers is not None and workers < 1:
+            raise VantiqException('io.vantiq.python.subscribe.workers',
+                                  'A subscription requires at least 1 worker. Found {0}.',
+                                  [workers])
+        vr = await self._subscriber.subscribe(path, params, callback, target_namespace, workers)
         return vr
 
     async def ack(self, request_id: str, subscription_id: str, msg: dict) -> None:
@@ -1341,6 +3593,9 @@ class Vantiq:
                 message being acknowledged
         Raises:
             VantiqException
+
+        When the client's VantiqSubscriberConfig has an ack_batch_size greater than 1, the acknowledgement is
+        coalesced with others for the same subscription & partition and sent later.
         """
         if 'partitionId' not in msg.keys():
             raise VantiqException('io.vantiq.python.ack.nopartitionid',
@@ -1356,6 +3611,31 @@ class Vantiq:
         await self._subscriber.ack(request_id, subscription_id, sequence_id, partition_id)
         return
 
+    def get_subscriber_stats(self) -> dict:
+        """Returns the state of the subscription transport.
+
+        The dict returned contains the following keys:
+            connected (bool) Whether the subscription transport is connected
+            reconnecting (bool) Whether the subscription transport is trying to reestablish a lost connection
+            reconnects (int) The number of times the connection has been reestablished
+            last_reconnect (dict) The details (as passed to VantiqSubscriberConfig.on_reconnect) of the most recent
+                                  reconnect, or None
+            acks_received (int) The number of acknowledgements made using ack()
+            ack_frames_sent (int) The number of acknowledgements sent to the server
+            ack_gaps_stalled (int) The number of times coalesced acknowledgements were held back by a missing
+                                   sequence id for long enough to be reported
+            ack_gaps_skipped (int) The number of times coalesced acknowledgements went past missing sequence ids
+                                   (see VantiqSubscriberConfig.ack_gap_timeout)
+            subscriptions (dict) Keyed by subscription request id, a dict containing the number of `workers`, the
+                                 number of messages `queued`, `delivered`, whose callback `failed`, and that
+                                 arrived beyond the queue_size (`overflowed`).
+        """
+        if self._subscriber is None:
+            return {'connected': False, 'reconnecting': False, 'reconnects': 0, 'last_reconnect': None,
+                    'acks_received': 0, 'ack_frames_sent': 0, 'ack_gaps_stalled': 0, 'ack_gaps_skipped': 0,
+                    'subscriptions': {}}
+        return self._subscriber.stats()
+
     def register_subscriber_on_close(self, callback: Callable[[], Awaitable[None]]):
         """ Register a callback to be called when the subscriber is closed.
 
@@ -1365,6 +3645,1424 @@ class Vantiq:
         """
         self._subscriber.on_close_handler = callback
 
+    def loader(self, resource: str, key: str = '_id', max_batch_size: int = 100,
+               batch_delay: float = 0.0) -> 'VantiqLoader':
+        """Create a loader that batches the lookup of individual items of a resource.
+
+        See VantiqLoader for details.
+
+        Parameters:
+            resource : str
+                The name of the resource from which to load items.
+            key : str
+                (optional) The property identifying the items.  Defaults to '_id'.
+            max_batch_size : int
+                (optional) The most items fetched in a single request.  Defaults to 100.
+            batch_delay : float
+                (optional) Seconds to wait for further lookups before fetching.  Defaults to 0, which collects
+                the lookups made until the event loop next runs the loader.
+        Returns:
+            VantiqLoader
+
+        Example:
+        ::
+            loader = client.loader('myType', key='name')
+            responses = await asyncio.gather(*(loader.load(name) for name in names))
+        """
+        return VantiqLoader(self, resource, key, max_batch_size, batch_delay)
+
+    async def materialize(self, type_name: str, where: Union[dict, None] = None, key: str = '_id',
+                          page_size: int = 1000,
+                          indexes: Union[Dict[str, str], None] = None) -> 'VantiqMaterializedView':
+        """(Async) Create an in-process replica of the items of a type, kept up to date as they change.
+
+        The items are loaded using select_iter(), then kept in sync using subscriptions to the type's insert,
+        update, and delete events.  See VantiqMaterializedView for details.
+
+        Parameters:
+            type_name : str
+                The name of the type to replicate.
+            where : dict(str: *)
+                (optional) Restricts the items replicated.  The operators supported are those of VantiqRecordStore.
+            key : str
+                (optional) The property identifying the items.  Defaults to '_id'.
+            page_size : int
+                (optional) The number of items fetched per request when (re)loading the items.  Defaults to 1000.
+            indexes : dict(str: str)
+                (optional) Indexes used when selecting from the view, mapping property names to the kind of index
+                ('hash' or 'sorted').  See VantiqRecordStore.
+        Returns:
+            VantiqMaterializedView, once the items have been loaded.
+        Raises:
+            VantiqException
+
+        Example:
+        ::
+            view = await client.materialize('Region', key='name')
+            west = view.get('west')
+        """
+        view = VantiqMaterializedView(self, type_name, where, key, page_size, indexes)
+        # noinspection PyProtectedMember
+        await view._start()
+        return view
+
+
+class VantiqLoader:
+    """Batches the lookup of individual items of a resource.
+
+    Lookups made using load() are collected until the event loop next runs the loader (or for batch_delay seconds),
+    then fetched using a single select() whose where clause is `{key: {'$in': [...]}}`.  Each lookup receives a
+    VantiqResponse like that of select_one(): the item as its body or, if there is no such item, a 404 status with
+    an 'io.vantiq.python.loader.notfound' error.  If the select() fails, each lookup receives its errors.
+
+    Loaders are created using Vantiq.loader().
+    """
+
+    def __init__(self, client: Vantiq, resource: str, key: str = '_id', max_batch_size: int = 100,
+                 batch_delay: float = 0.0):
+        if max_batch_size < 1 or batch_delay < 0:
+            raise VantiqException('io.vantiq.python.loader.invalid',
+                                  'Loader max_batch_size must be at least 1 and batch_delay must not be negative. '
+                                  'Found max_batch_size: {0}, batch_delay: {1}.',
+                                  [max_batch_size, batch_delay])
+        self.resource = resource
+        self.key = key
+        self.max_batch_size = max_batch_size
+        self.batch_delay = batch_delay
+        self._client = client
+        self._pending: Dict[any, List[asyncio.Future]] = {}
+        self._handle: Union[asyncio.Handle, None] = None
+        self._tasks = set()
+        self._loads = 0
+        self._batches = 0
+
+    def __str__(self):
+        return f'VantiqLoader: resource: {self.resource}, key: {self.key}, max_batch_size: {self.max_batch_size}'
+
+    def __repr__(self):
+        return f'VantiqLoader(resource={self.resource}, key={self.key}, max_batch_size={self.max_batch_size}, ' \
+               f'batch_delay={self.batch_delay})'
+
+    async def load(self, key_value: any) -> VantiqResponse:
+        """(Async) Return the item whose key property has the value given.
+
+        Parameters:
+            key_value : any
+                The value of the key property of the item.
+        Returns:
+            VantiqResponse
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._loads += 1
+        self._pending.setdefault(key_value, []).append(future)
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            if self.batch_delay > 0:
+                self._handle = loop.call_later(self.batch_delay, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+        return await future
+
+    async def load_many(self, key_values: Iterable) -> List[VantiqResponse]:
+        """(Async) Return the items whose key properties have the values given, in the same order.
+
+        Parameters:
+            key_values : Iterable
+                The values of the key properties of the items.
+        Returns:
+            list of VantiqResponse
+        """
+        return list(await asyncio.gather(*(self.load(key_value) for key_value in key_values)))
+
+    def stats(self) -> dict:
+        """Returns a dict containing the number of `loads` requested and the number of `batches` fetched."""
+        return {'loads': self._loads, 'batches': self._batches}
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            self._batches += 1
+            task = asyncio.create_task(self._fetch(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, pending: Dict[any, List[asyncio.Future]]) -> None:
+        try:
+            vr = await self._client.select(self.resource, where={self.key: {'$in': list(pending)}})
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        rows = {}
+        if vr.is_success and isinstance(vr.body, list):
+            for row in vr.body:
+                rows.setdefault(row.get(self.key), row)
+        for key_value, futures in pending.items():
+            for index, future in enumerate(futures):
+                if future.done():
+                    # The caller gave up waiting
+                    continue
+                if not vr.is_success:
+                    ret_val = VantiqResponse(False, vr.status_code, vr.content_type)
+                    ret_val.errors = list(vr.errors or [])
+                elif key_value in rows:
+                    ret_val = VantiqResponse(True, vr.status_code, vr.content_type)
+                    # Callers asking for the same item each get their own copy
+                    ret_val.body = rows[key_value] if index == 0 else copy.deepcopy(rows[key_value])
+                else:
+                    ret_val = VantiqResponse(False, 404, vr.content_type)
+                    ret_val.errors = [VantiqError('io.vantiq.python.loader.notfound',
+                                                  'No item in resource {0} has {1} {2}.',
+                                                  [self.resource, self.key, key_value])]
+                future.set_result(ret_val)
+
+
+class VantiqPreparedSelect:
+    """A select() prepared by Vantiq.prepare_select() to be run repeatedly."""
+
+    def __init__(self, client: Vantiq, resource: str, path: str, query_params: dict,
+                 where: Union[_JsonTemplate, None], retry: Union[VantiqRetryPolicy, bool, None]):
+        self.resource = resource
+        self._client = client
+        self._path = path
+        self._query_params = query_params
+        self._where = where
+        self._retry = retry
+
+    def __str__(self):
+        return f'VantiqPreparedSelect: resource: {self.resource}, params: {self.param_names}'
+
+    def __repr__(self):
+        return f'VantiqPreparedSelect(resource={self.resource}, query_params={self._query_params})'
+
+    @property
+    def param_names(self) -> List[str]:
+        """The names of the VantiqParam placeholders in the where clause."""
+        return list(self._where.names) if self._where is not None else []
+
+    async def select(self, **params) -> VantiqResponse:
+        """(Async) Run the query, binding the keyword arguments to the VantiqParam placeholders of the same name.
+
+        Returns:
+            VantiqResponse
+        """
+        operation = 'select'
+        try:
+            query_params = dict(self._query_params)
+            if self._where is not None:
+                query_params['where'] = self._where.render(params)
+            # noinspection PyProtectedMember
+            return await self._client._perform_operation(operation, 'GET', self._path, query_params, False,
+                                                         retry=self._retry, cache_resource=self.resource,
+                                                         coalesce=True)
+        except VantiqException:
+            # If we've already handled or wrapped it, just pass it along
+            raise
+        except Exception as e:
+            raise VantiqException('io.vantiq.python.operation.unexpectederror',
+                                  'Unexpected error during {0} operation.',
+                                  [operation]) from e
+
+
+class VantiqPreparedExecute:
+    """A procedure execution prepared by Vantiq.prepare_execute() to be run repeatedly."""
+
+    def __init__(self, client: Vantiq, path: str, params: _JsonTemplate, headers: Union[dict, None],
+                 retry: Union[VantiqRetryPolicy, bool, None]):
+        self._client = client
+        self._path = path
+        self._params = params
+        self._headers = headers
+        self._retry = retry
+
+    def __str__(self):
+        return f'VantiqPreparedExecute: path: {self._path}, params: {self.param_names}'
+
+    def __repr__(self):
+        return f'VantiqPreparedExecute(path={self._path})'
+
+    @property
+    def param_names(self) -> List[str]:
+        """The names of the VantiqParam placeholders in the parameters."""
+        return list(self._params.names)
+
+    async def execute(self, **params) -> VantiqResponse:
+        """(Async) Execute the procedure, binding the keyword arguments to the VantiqParam placeholders of the
+        same name.
+
+        Returns:
+            VantiqResponse
+        """
+        operation = 'execute'
+        try:
+            body = self._params.render(params).encode('utf-8')
+            # noinspection PyProtectedMember
+            return await self._client._perform_operation(operation, 'POST', self._path, {}, False, body,
+                                                         dict(self._headers) if self._headers else None,
+                                                         retry=self._retry)
+        except VantiqException:
+            # If we've already handled or wrapped it, just pass it along
+            raise
+        except Exception as e:
+            raise VantiqException('io.vantiq.python.operation.unexpectederror',
+                                  'Unexpected error during {0} operation.',
+                                  [operation]) from e
+
+
+class VantiqPublisher:
+    """Publishes messages in the background, in batches.
+
+    publish() queues a message and returns at once unless the queue is full, in which case it waits for room
+    (publish_nowait() raises instead).  Queued messages are collected into batches of up to max_batch_size messages,
+    waiting up to linger seconds for a batch to fill, and sent with up to max_in_flight requests in flight.
+
+    In 'concurrent' batch mode (the default), each message of a batch is published in its own request, so that
+    recipients see the messages exactly as they would from Vantiq.publish().  In 'array' batch mode, the messages of
+    a batch for the same destination are published as a single message containing the list of them, so that a
+    batch costs a single request; the recipients must expect this.
+
+    Failures are counted (see stats()) and reported to the on_error callback, if any; publish() does not wait to
+    find out whether its message was published.  flush() waits until every message queued has been sent, and
+    close() flushes, then stops the publisher.  A publisher can be used as an async context manager, closing it on
+    exit.
+
+    Publishers are created using Vantiq.publisher().
+    """
+
+    BATCH_MODES = ('concurrent', 'array')
+
+    def __init__(self, client: Vantiq, max_batch_size: int = 100, linger: float = 0.005, max_in_flight: int = 8,
+                 queue_size: int = 10000, batch_mode: str = 'concurrent',
+                 on_error: Union[Callable[[str, str, list, Union[VantiqResponse, Exception]], Awaitable[None]],
+                                 None] = None,
+                 retry: Union[VantiqRetryPolicy, bool, None] = None):
+        if max_batch_size < 1 or linger < 0 or max_in_flight < 1 or queue_size < 0 \
+                or batch_mode not in self.BATCH_MODES:
+            raise VantiqException('io.vantiq.python.publisher.invalid',
+                                  'Publisher requires max_batch_size and max_in_flight of at least 1, non-negative '
+                                  'linger and queue_size, and a batch_mode of {0}. Found max_batch_size: {1}, '
+                                  'linger: {2}, max_in_flight: {3}, queue_size: {4}, batch_mode: {5}.',
+                                  [list(self.BATCH_MODES), max_batch_size, linger, max_in_flight, queue_size,
+                                   batch_mode])
+        self.max_batch_size = max_batch_size
+        self.linger = linger
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.batch_mode = batch_mode
+        self.on_error = on_error
+        self._client = client
+        self._vlog = logging.getLogger(self.__class__.__name__)
+        self._retry = retry
+        self._queue: Union[asyncio.Queue, None] = None
+        self._limiter: Union[asyncio.Semaphore, None] = None
+        self._runner: Union[asyncio.Task, None] = None
+        self._sends = set()
+        self._closed = False
+        self._sent = 0
+        self._failed = 0
+        self._batches = 0
+        self._requests = 0
+
+    def __str__(self):
+        return f'VantiqPublisher: batch_mode: {self.batch_mode}, max_batch_size: {self.max_batch_size}, ' \
+               f'linger: {self.linger}, max_in_flight: {self.max_in_flight}'
+
+    def __repr__(self):
+        return f'VantiqPublisher(max_batch_size={self.max_batch_size}, linger={self.linger}, ' \
+               f'max_in_flight={self.max_in_flight}, queue_size={self.queue_size}, batch_mode={self.batch_mode})'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def publish(self, resource: str, resource_id: str, msg: dict) -> None:
+        """(Async) Queue a message to be published, waiting for room if the queue is full.
+
+        Parameters:
+            resource : str
+                VantiqResources.SERVICES, VantiqResources.SOURCES, or VantiqResources.TOPICS
+            resource_id : str
+                The specific service event, source, or topic to which to publish.  See Vantiq.publish().
+            msg : dict
+                The message to publish
+        """
+        self._start()
+        await self._queue.put((resource, resource_id, msg))
+
+    def publish_nowait(self, resource: str, resource_id: str, msg: dict) -> None:
+        """Queue a message to be published, raising a VantiqException if the queue is full.
+
+        The parameters are those of publish().
+        """
+        self._start()
+        try:
+            self._queue.put_nowait((resource, resource_id, msg))
+        except asyncio.QueueFull:
+            raise VantiqException('io.vantiq.python.publisher.full',
+                                  'The publisher queue is full ({0} messages).', [self.queue_size]) from None
+
+    async def flush(self) -> None:
+        """(Async) Wait until every message queued has been sent (successfully or not)."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """(Async) Send the messages queued, then stop the publisher."""
+        if self._closed:
+            return
+        await self.flush()
+        self._closed = True
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        """Returns counts describing the publisher's progress.
+
+        The dict returned contains the following keys:
+            queued (int) Messages waiting to be sent
+            sent (int) Messages published successfully
+            failed (int) Messages whose publish failed
+            batches (int) Batches sent
+            requests (int) Publish requests made
+        """
+        return {'queued': self._queue.qsize() if self._queue is not None else 0, 'sent': self._sent,
+                'failed': self._failed, 'batches': self._batches, 'requests': self._requests}
+
+    def _start(self) -> None:
+        if self._closed:
+            raise VantiqException('io.vantiq.python.publisher.closed', 'The publisher has been closed.', [])
+        if self._runner is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._limiter = asyncio.Semaphore(self.max_in_flight)
+            self._runner = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # A get() left waiting when the linger ends is kept for the next batch.  (Cancelling it instead, as
+        # wait_for() does on timeout, can lose an item it has already taken from the queue.)
+        getter: Union[asyncio.Future, None] = None
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(self._queue.get())
+                batch = [await getter]
+                getter = None
+                deadline = loop.time() + self.linger
+                while len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        pass
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    getter = asyncio.ensure_future(self._queue.get())
+                    done, _ = await asyncio.wait((getter,), timeout=remaining)
+                    if not done:
+                        break
+                    batch.append(getter.result())
+                    getter = None
+                self._batches += 1
+                await self._send_batch(batch)
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+    async def _send_batch(self, batch: list) -> None:
+        if self.batch_mode == 'array':
+            destinations: Dict[tuple, list] = {}
+            for resource, resource_id, msg in batch:
+                destinations.setdefault((resource, resource_id), []).append(msg)
+            requests = [(resource, resource_id, msgs) for (resource, resource_id), msgs in destinations.items()]
+        else:
+            requests = [(resource, resource_id, [msg]) for resource, resource_id, msg in batch]
+        for resource, resource_id, msgs in requests:
+            # Waiting here for a free slot holds back the next batch, and so (once the queue fills) publish()
+            await self._limiter.acquire()
+            task = asyncio.create_task(self._send(resource, resource_id, msgs))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, resource: str, resource_id: str, msgs: list) -> None:
+        try:
+            self._requests += 1
+            msg = msgs if self.batch_mode == 'array' else msgs[0]
+            try:
+                vr = await self._client.publish(resource, resource_id, msg, retry=self._retry)
+                failure = None if vr.is_success else vr
+            except Exception as e:
+                failure = e
+            if failure is None:
+                self._sent += len(msgs)
+            else:
+                self._failed += len(msgs)
+                self._vlog.error('Unable to publish %s message(s) to %s %s: %s', len(msgs), resource, resource_id,
+                                 failure)
+                if self.on_error is not None:
+                    # noinspection PyBroadException
+                    try:
+                        await self.on_error(resource, resource_id, msgs, failure)
+                    except Exception:
+                        self._vlog.exception('Publisher on_error callback failed.')
+        finally:
+            self._limiter.release()
+            for _ in msgs:
+                self._queue.task_done()
+
+
+class VantiqConflatingPublisher:
+    """Publishes only the latest pending message for each key, at a limited rate.
+
+    Suited to telemetry where only the most recent value matters: publish() replaces any message still waiting to be
+    sent for the same resource, resource id, and value of the key property, so when messages are published faster
+    than they can be (or are allowed to be) sent, the intermediate values are dropped rather than queued.  A replaced
+    message keeps its predecessor's place, so frequently updated keys do not hold back the others.  publish() never
+    waits: the number of messages pending is bounded by the number of keys.
+
+    Messages are sent with up to max_in_flight requests in flight, and no more than max_rate per second.  As with
+    VantiqPublisher, failures are counted and reported to on_error, flush() waits until the pending messages have
+    been sent, and close() flushes, then stops the publisher.
+
+    Conflating publishers are created using Vantiq.conflating_publisher().
+    """
+
+    def __init__(self, client: Vantiq, key: Union[str, None] = None, max_rate: Union[float, None] = None,
+                 max_in_flight: int = 8,
+                 on_error: Union[Callable[[str, str, list, Union[VantiqResponse, Exception]], Awaitable[None]],
+                                 None] = None,
+                 retry: Union[VantiqRetryPolicy, bool, None] = None):
+        if (max_rate is not None and max_rate <= 0) or max_in_flight < 1:
+            raise VantiqException('io.vantiq.python.publisher.invalid',
+                                  'Conflating publisher requires a positive max_rate and max_in_flight of at least 1. '
+                                  'Found max_rate: {0}, max_in_flight: {1}.', [max_rate, max_in_flight])
+        self.key = key
+        self.max_rate = max_rate
+        self.max_in_flight = max_in_flight
+        self.on_error = on_error
+        self._client = client
+        self._vlog = logging.getLogger(self.__class__.__name__)
+        self._retry = retry
+        self._pending: collections.OrderedDict = collections.OrderedDict()
+        self._ready: Union[asyncio.Event, None] = None
+        self._idle: Union[asyncio.Event, None] = None
+        self._limiter: Union[asyncio.Semaphore, None] = None
+        self._runner: Union[asyncio.Task, None] = None
+        self._sends = set()
+        self._in_flight = 0
+        self._next_send = 0.0
+        self._closed = False
+        self._published = 0
+        self._conflated = 0
+        self._sent = 0
+        self._failed = 0
+
+    def __str__(self):
+        return f'VantiqConflatingPublisher: key: {self.key}, max_rate: {self.max_rate}, ' \
+               f'max_in_flight: {self.max_in_flight}'
+
+    def __repr__(self):
+        return f'VantiqConflatingPublisher(key={self.key}, max_rate={self.max_rate}, ' \
+               f'max_in_flight={self.max_in_flight})'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def publish(self, resource: str, resource_id: str, msg: dict) -> None:
+        """(Async) Publish a message, replacing any message pending for the same key.
+
+        Parameters:
+            resource : str
+                VantiqResources.SERVICES, VantiqResources.SOURCES, or VantiqResources.TOPICS
+            resource_id : str
+                The specific service event, source, or topic to which to publish.  See Vantiq.publish().
+            msg : dict
+                The message to publish
+        """
+        if self._closed:
+            raise VantiqException('io.vantiq.python.publisher.closed', 'The publisher has been closed.', [])
+        if self._runner is None:
+            self._ready = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._limiter = asyncio.Semaphore(self.max_in_flight)
+            self._runner = asyncio.create_task(self._run())
+        key = (resource, resource_id, _hashable(_path_value(msg, self.key)) if self.key is not None else None)
+        self._published += 1
+        if key in self._pending:
+            self._conflated += 1
+        # Assigning to an existing key leaves it in place
+        self._pending[key] = msg
+        self._idle.clear()
+        self._ready.set()
+
+    async def flush(self) -> None:
+        """(Async) Wait until every pending message has been sent (successfully or not)."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self) -> None:
+        """(Async) Send the pending messages, then stop the publisher."""
+        if self._closed:
+            return
+        await self.flush()
+        self._closed = True
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        """Returns counts describing the publisher's progress.
+
+        The dict returned contains the following keys:
+            published (int) Calls made to publish()
+            conflated (int) Messages replaced by a later message before being sent
+            pending (int) Messages waiting to be sent
+            sent (int) Messages published successfully
+            failed (int) Messages whose publish failed
+        """
+        return {'published': self._published, 'conflated': self._conflated, 'pending': len(self._pending),
+                'sent': self._sent, 'failed': self._failed}
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            if self.max_rate is not None:
+                # Wait before taking the message, so that it can still be replaced while waiting
+                delay = self._next_send - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self._limiter.acquire()
+            (resource, resource_id, _), msg = self._pending.popitem(last=False)
+            if not self._pending:
+                self._ready.clear()
+            if self.max_rate is not None:
+                self._next_send = max(self._next_send, loop.time()) + 1.0 / self.max_rate
+            self._in_flight += 1
+            task = asyncio.create_task(self._send(resource, resource_id, msg))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, resource: str, resource_id: str, msg: dict) -> None:
+        try:
+            try:
+                vr = await self._client.publish(resource, resource_id, msg, retry=self._retry)
+                failure = None if vr.is_success else vr
+            except Exception as e:
+                failure = e
+            if failure is None:
+                self._sent += 1
+            else:
+                self._failed += 1
+                self._vlog.error('Unable to publish message to %s %s: %s', resource, resource_id, failure)
+                if self.on_error is not None:
+                    # noinspection PyBroadException
+                    try:
+                        await self.on_error(resource, resource_id, [msg], failure)
+                    except Exception:
+                        self._vlog.exception('Publisher on_error callback failed.')
+        finally:
+            self._limiter.release()
+            self._in_flight -= 1
+            if not self._pending and not self._in_flight:
+                self._idle.set()
+
+
+class VantiqMaterializedView:
+    """An in-process replica of the items of a type, kept up to date as they change.
+
+    Once loaded, the items of the type (restricted by the where clause given) are kept in sync by applying the
+    type's insert, update, and delete events as they arrive.  Reading the view makes no requests of the server.
+    Events arriving while the items are being (re)loaded are applied once the load completes.
+
+    The items are reloaded (resynchronized) whenever an event may have been missed: when a subscription is
+    reestablished after the subscription transport reconnects, when a subscription reports an error, or when the
+    sequence ids of the events (if present) show a gap.
+
+    The view can be queried locally using select() and count(), which accept the same where clauses, properties,
+    sort specifications, and limits as Vantiq.select() (see VantiqRecordStore).
+
+    Views are created using Vantiq.materialize().  As subscriptions to a type's events are unique to a client,
+    a client can have only one view of a type.  The items returned belong to the view and should not be modified.
+    """
+
+    _OPERATIONS = ('insert', 'update', 'delete')
+
+    def __init__(self, client: Vantiq, type_name: str, where: Union[dict, None] = None, key: str = '_id',
+                 page_size: int = 1000, indexes: Union[Dict[str, str], None] = None):
+        where = where or {}
+        # Check now that the where clause can be evaluated locally, rather than as each event arrives
+        _validate_where(where)
+        self.type_name = type_name
+        self.where = where
+        self.key = key
+        self.page_size = page_size
+        self._client = client
+        self._vlog = logging.getLogger(self.__class__.__name__)
+        self._store = VantiqRecordStore(key, indexes=indexes)
+        # Events arriving during a load, applied once it completes.  None when not loading.
+        self._buffer: Union[List[tuple], None] = None
+        self._connected = set()
+        self._sequences: Dict[tuple, any] = {}
+        self._resync_task: Union[asyncio.Task, None] = None
+        self._resync_wanted = False
+        self._closed = False
+        self._events = 0
+        self._resyncs = 0
+        self._gaps = 0
+        self._last_sync: Union[float, None] = None
+
+    def __str__(self):
+        return f'VantiqMaterializedView: type: {self.type_name}, where: {self.where}, records: {len(self._store)}'
+
+    def __repr__(self):
+        return f'VantiqMaterializedView(type_name={self.type_name}, where={self.where}, key={self.key}, ' \
+               f'page_size={self.page_size})'
+
+    def __len__(self):
+        return len(self._store)
+
+    def __contains__(self, key_value: any) -> bool:
+        return key_value in self._store
+
+    def __iter__(self):
+        return iter(self._store)
+
+    def get(self, key_value: any) -> Union[dict, None]:
+        """Returns the item whose key property has the value given, or None if there is none."""
+        return self._store.get(key_value)
+
+    def values(self) -> List[dict]:
+        """Returns a list of the items in the view."""
+        return list(self._store)
+
+    def select(self, where: Union[dict, None] = None, properties: Union[list, None] = None,
+               sort_spec: Union[dict, None] = None, limit: Union[int, None] = None) -> List[dict]:
+        """Return the items of the view satisfying a where clause.  See VantiqRecordStore.select()."""
+        return self._store.select(where, properties, sort_spec, limit)
+
+    def count(self, where: Union[dict, None] = None) -> int:
+        """Returns the number of items of the view satisfying a where clause."""
+        return self._store.count(where)
+
+    def create_index(self, prop: str, kind: str = 'hash') -> None:
+        """Create an index on a property.  See VantiqRecordStore.create_index()."""
+        self._store.create_index(prop, kind)
+
+    def stats(self) -> dict:
+        """Returns the state of the view.
+
+        The dict returned contains the following keys:
+            records (int) The number of items in the view
+            events (int) The number of events applied
+            resyncs (int) The number of times the items were reloaded after the initial load
+            gaps (int) The number of gaps detected in the events' sequence ids
+            last_sync (float) When (in seconds since the epoch) the items were last loaded
+        """
+        return {'records': len(self._store), 'events': self._events, 'resyncs': self._resyncs,
+                'gaps': self._gaps, 'last_sync': self._last_sync}
+
+    async def resync(self) -> None:
+        """(Async) Reload the items of the view."""
+        self._resyncs += 1
+        await self._load()
+
+    async def close(self) -> None:
+        """(Async) Stop keeping the view up to date and discard its items.
+
+        The subscriptions to the type's events remain until the client is closed, but their events are ignored.
+        """
+        self._closed = True
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+        self._store.clear()
+
+    async def _start(self) -> None:
+        # Subscribe first so that no change made during the load is missed
+        subscribed = []
+        try:
+            for operation in self._OPERATIONS:
+                vr = await self._client.subscribe(VantiqResources.TYPES, self.type_name, operation,
+                                                  self._callback_for(operation))
+                if not vr.is_success:
+                    raise VantiqException(vr.errors[0].code, vr.errors[0].message, vr.errors[0].params)
+                subscribed.append(operation)
+            await self._load()
+        except BaseException:
+            # Don't leave subscriptions behind for a view that was never returned
+            self._closed = True
+            for operation in subscribed:
+                # noinspection PyProtectedMember
+                await self._client._subscriber.unsubscribe('/types/{0}/{1}'.format(self.type_name, operation))
+            raise
+
+    def _callback_for(self, operation: str) -> Callable[[str, dict], Awaitable[None]]:
+        async def callback(what: str, msg: dict) -> None:
+            self._on_event(operation, what, msg)
+        return callback
+
+    async def _load(self) -> None:
+        self._buffer = []
+        self._sequences = {}
+        try:
+            store = VantiqRecordStore(self.key, indexes=self._store.indexes)
+            async for record in self._client.select_iter(self.type_name, where=self.where or None,
+                                                         page_size=self.page_size):
+                store.put(record)
+            self._store = store
+            self._last_sync = time.time()
+        finally:
+            buffer, self._buffer = self._buffer, None
+        # Events arriving during the load may be older or newer than what was loaded.  Applying them all
+        # leaves the items as of the most recent change.
+        for operation, value in buffer:
+            self._apply(operation, value)
+
+    def _on_event(self, operation: str, what: str, msg: dict) -> None:
+        if self._closed:
+            return
+        if what == _VantiqSubscriber.CONNECT:
+            if operation in self._connected:
+                # The subscription was reestablished, so events may have been missed while disconnected
+                self._request_resync('subscription to {0} events reestablished'.format(operation))
+            self._connected.add(operation)
+        elif what == _VantiqSubscriber.ERROR:
+            self._request_resync('error from subscription to {0} events: {1}'.format(operation, msg))
+        else:
+            body = msg.get('body')
+            if not isinstance(body, dict):
+                return
+            if 'sequenceId' in body:
+                seq_key = (operation, body.get('partitionId'))
+                last = self._sequences.get(seq_key)
+                sequence_id = body['sequenceId']
+                if last is not None and sequence_id <= last:
+                    # Already seen
+                    return
+                self._sequences[seq_key] = sequence_id
+                if last is not None and sequence_id > last + 1:
+                    self._gaps += 1
+                    self._request_resync('{0} events {1} to {2} missing'.format(operation, last + 1,
+                                                                                 sequence_id - 1))
+            value = body.get('value')
+            if self._buffer is not None:
+                self._buffer.append((operation, value))
+            else:
+                self._apply(operation, value)
+
+    def _apply(self, operation: str, value: Union[dict, list, None]) -> None:
+        for record in (value if isinstance(value, list) else [value]):
+            if not isinstance(record, dict):
+                continue
+            self._events += 1
+            if operation != 'delete' and _where_matches(record, self.where):
+                self._store.put(record)
+            else:
+                # Deleted, or updated so that it no longer belongs in the view
+                self._store.remove(record.get(self.key))
+
+    def _request_resync(self, reason: str) -> None:
+        self._vlog.info('Resynchronizing view of %s: %s', self.type_name, reason)
+        if self._resync_task is not None and not self._resync_task.done():
+            # Reload again once the current one is done, as it may have started before the problem
+            self._resync_wanted = True
+            return
+        self._resync_task = asyncio.create_task(self._resync_later())
+
+    async def _resync_later(self) -> None:
+        self._resync_wanted = True
+        while self._resync_wanted and not self._closed:
+            self._resync_wanted = False
+            # noinspection PyBroadException
+            try:
+                await self.resync()
+            except Exception:
+                self._vlog.exception('Unable to resynchronize view of %s', self.type_name)
+
+
+class _SubscriptionDispatcher:
+    """Delivers the messages for one subscription to its callback using a queue and a set of worker tasks."""
+
+    def __init__(self, request_id: str, callback: Callable[[str, dict], Awaitable[None]], workers: int,
+                 queue_size: int):
+        self.request_id = request_id
+        self.callback = callback
+        # The queue itself is unbounded, so that the receive loop never waits on one subscription.  Messages beyond
+        # queue_size are counted (and reported) as overflowed.
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queue_size = queue_size
+        self.delivered = 0
+        self.failed = 0
+        self.overflowed = 0
+        self._overflowing = False
+        self._vlog = logging.getLogger(self.__class__.__name__)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    def __repr__(self):
+        return f'_SubscriptionDispatcher({self.request_id}, workers={len(self._workers)})'
+
+    def put(self, what: str, msg: dict) -> None:
+        self.queue.put_nowait((what, msg))
+        if self.queue_size and self.queue.qsize() > self.queue_size:
+            self.overflowed += 1
+            if not self._overflowing:
+                self._overflowing = True
+                self._vlog.warning('The subscription callback for %s is not keeping up: more than %s messages are '
+                                   'queued.', self.request_id, self.queue_size)
+
+    async def _work(self) -> None:
+        while True:
+            item = await self.queue.get()
+            if self._overflowing and self.queue.qsize() <= self.queue_size // 2:
+                self._overflowing = False
+                self._vlog.info('The subscription callback for %s has caught up.', self.request_id)
+            try:
+                if item is None:
+                    return
+                what, msg = item
+                try:
+                    await self.callback(what, msg)
+                    self.delivered += 1
+                except Exception:
+                    # A failing callback must not stop delivery of the messages behind it
+                    self.failed += 1
+                    self._vlog.exception('Subscription callback for %s failed.', self.request_id)
+            finally:
+                self.queue.task_done()
+
+    async def stop(self) -> None:
+        """Stop the workers once the messages already queued have been delivered."""
+        for _ in self._workers:
+            self.queue.put_nowait(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def cancel(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+    def stats(self) -> dict:
+        return {'workers': len(self._workers),
+                'queued': self.queue.qsize(),
+                'delivered': self.delivered,
+                'failed': self.failed,
+                'overflowed': self.overflowed}
+
+
+class _AckBatcher:
+    """Coalesces acknowledgements of reliable messages.
+
+    For each subscription & partition, only the highest sequence id for which every earlier id has been
+    acknowledged is sent.  Pending acknowledgements are sent once batch_size have accumulated or flush_interval
+    seconds have passed since the first of them.
+
+    The contiguous run starts from the first sequence id delivered by the receive loop (see delivered()), since
+    callbacks running on several workers acknowledge out of order.  A missing id holds back the acknowledgement of
+    every later one, since acknowledging past it would keep the server from redelivering it.  A gap still open
+    after STALL_TIMEOUT seconds (or once MAX_PENDING later ids accumulate) is reported as stalled.  Only if a
+    gap_timeout is given is a gap open that long given up on and acknowledged past.
+    """
+
+    STALL_TIMEOUT = 60.0
+    MAX_PENDING = 10000
+
+    def __init__(self, subscriber: '_VantiqSubscriber', batch_size: int, flush_interval: float,
+                 gap_timeout: Union[float, None] = None):
+        self._subscriber = subscriber
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._gap_timeout = gap_timeout
+        # (request id, subscription name, partition id) -> [highest id acknowledged, set of ids not yet contiguous,
+        #                                                   time at which the current gap was first seen,
+        #                                                   whether the current gap has been reported as stalled]
+        self._partitions: Dict[tuple, list] = {}
+        self._count = 0
+        self._timer: Union[asyncio.Task, None] = None
+        self.gaps_stalled = 0
+        self.gaps_skipped = 0
+
+    def delivered(self, request_id: str, subscription_id: str, sequence_id: float, partition_id: float) -> None:
+        """Note a reliable message delivered, so that the first delivered for a partition starts its run."""
+        key = (request_id, subscription_id, partition_id)
+        if key not in self._partitions:
+            self._partitions[key] = [sequence_id - 1, set(), None, False]
+
+    async def add(self, request_id: str, subscription_id: str, sequence_id: float, partition_id: float) -> None:
+        state = self._partitions.setdefault((request_id, subscription_id, partition_id), [None, set(), None, False])
+        state[1].add(sequence_id)
+        self._count += 1
+        if self._count >= self._batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        self._timer = None
+        # noinspection PyBroadException
+        try:
+            await self.flush()
+        except Exception:
+            logging.getLogger(self.__class__.__name__).exception('Unable to send acknowledgements.')
+
+    async def flush(self) -> None:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        self._count = 0
+        target_namespace = self._subscriber.parent.get_target_namespace()
+        for (request_id, subscription_id, partition_id), state in list(self._partitions.items()):
+            acked_through, pending, gap_since, reported = state
+            if not pending:
+                continue
+            if acked_through is None:
+                # No delivery was seen (e.g. the message arrived before the batcher existed), so the lowest id
+                # acknowledged starts the contiguous run
+                acked_through = min(pending) - 1
+            highest = acked_through
+            while highest + 1 in pending:
+                highest += 1
+            # Drop the ids now covered (along with any duplicates of ids already acknowledged)
+            pending = {seq for seq in pending if seq > highest}
+            if pending:
+                now = time.monotonic()
+                stall_timeout = self._gap_timeout if self._gap_timeout is not None else self.STALL_TIMEOUT
+                if gap_since is None or highest != acked_through:
+                    gap_since = now
+                    reported = False
+                elif now - gap_since >= stall_timeout or len(pending) >= self.MAX_PENDING:
+                    if self._gap_timeout is not None:
+                        # As configured, the missing ids are taken to be lost rather than holding back every
+                        # later acknowledgement
+                        logging.getLogger(self.__class__.__name__).warning(
+                            'Acknowledging past missing sequence ids %s-%s of %s partition %s.', highest + 1,
+                            min(pending) - 1, subscription_id, partition_id)
+                        self.gaps_skipped += 1
+                        highest = min(pending)
+                        while highest + 1 in pending:
+                            highest += 1
+                        pending = {seq for seq in pending if seq > highest}
+                        gap_since = now if pending else None
+                        reported = False
+                    elif not reported:
+                        logging.getLogger(self.__class__.__name__).warning(
+                            'Acknowledgements of %s partition %s are held back by sequence id %s, which has not '
+                            'been acknowledged (%s later ids are waiting).', subscription_id, partition_id,
+                            highest + 1, len(pending))
+                        self.gaps_stalled += 1
+                        reported = True
+            else:
+                gap_since = None
+                reported = False
+            state[1] = pending
+            state[2] = gap_since
+            state[3] = reported
+            if highest != acked_through:
+                state[0] = highest
+                # noinspection PyProtectedMember
+                await self._subscriber._send_ack(request_id, subscription_id, highest, partition_id,
+                                                 target_namespace)
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class SyncVantiq:
+    """A blocking interface to a Vantiq client, for use from code that is not async.
+
+    A SyncVantiq owns a Vantiq client running on an event loop in a dedicated thread.  Its methods submit the
+    corresponding Vantiq operation to that loop and wait for the result, so a single SyncVantiq (and its pool of
+    connections) can be shared by many threads at once, reusing connections across calls rather than creating a
+    new event loop, session, and TLS handshake for each.  Call close() (or use it as a context manager) when done.
+
+    The constructor accepts the same parameters as Vantiq, and connects.  Operations not provided here can be run
+    using run(), given a function that takes the underlying Vantiq client and returns the coroutine to run.
+
+    Example:
+    ::
+        client = SyncVantiq('https://dev.vantiq.com')
+        client.set_access_token(token)
+        vr: VantiqResponse = client.select(VantiqResources.TYPES)
+        ...
+        client.close()
+    """
+
+    # The longest time, in seconds, that close() waits for the tasks it cancels to finish
+    STOP_TIMEOUT = 5.0
+
+    def __init__(self, server: str, api_version: Union[str, None] = None, *, timeout: Union[float, None] = None,
+                 **kwargs):
+        """Create a blocking Vantiq client, connected to the server.
+
+        Parameters:
+            server : str
+                URL String at which to find the Vantiq Server
+            api_version : str (optional)
+                Version of the API to use. Defaults to '1'
+            timeout : float (optional)
+                The longest time, in seconds, to wait for an operation to complete.  Defaults to None (no limit).
+            kwargs :
+                (optional) Passed to the Vantiq constructor.
+        """
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='SyncVantiq-' + server, daemon=True)
+        self._thread.start()
+        # Guards _closed, so that no operation is submitted to the loop once close() has begun
+        self._lock = threading.Lock()
+        self._closed = False
+
+        async def create() -> Vantiq:
+            client = Vantiq(server, api_version, **kwargs)
+            await client.connect()
+            return client
+        try:
+            self.client: Vantiq = self._call(create())
+        except BaseException:
+            self._stop_loop()
+            raise
+
+    def __str__(self):
+        return f'SyncVantiq for {str(self.client)}'
+
+    def __repr__(self):
+        return f'SyncVantiq({repr(self.client)})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _call(self, coro: Awaitable) -> any:
+        return self._wait(self._submit(coro))
+
+    def _submit(self, coro: Awaitable, closing: bool = False) -> concurrent.futures.Future:
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise VantiqException('io.vantiq.python.sync.reentrant',
+                                  'SyncVantiq operations cannot be called from its own event loop.', [])
+        with self._lock:
+            if self._closed:
+                coro.close()
+                raise VantiqException('io.vantiq.python.sync.closed', 'The SyncVantiq client has been closed.', [])
+            if closing:
+                self._closed = True
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _wait(self, future: concurrent.futures.Future) -> any:
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise VantiqException('io.vantiq.python.sync.timeout',
+                                  'The operation did not complete within {0} seconds.', [self.timeout]) from None
+        except concurrent.futures.CancelledError:
+            if not self._closed:
+                raise
+            # Cancelled by a close() in another thread
+            raise VantiqException('io.vantiq.python.sync.closed', 'The SyncVantiq client has been closed.',
+                                  []) from None
+
+    def _stop_loop(self) -> None:
+        async def cancel_remaining():
+            # Tasks left running (e.g. by an operation that timed out) would otherwise be destroyed while pending
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._loop.shutdown_asyncgens()
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_remaining(), self._loop).result(self.STOP_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            logging.getLogger(self.__class__.__name__).warning(
+                'Tasks still running %s seconds after being cancelled.', self.STOP_TIMEOUT)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def run(self, operation: Callable[[Vantiq], Awaitable]) -> any:
+        """Run an operation of the underlying Vantiq client, waiting for its result.
+
+        Parameters:
+            operation : Callable[[Vantiq], Awaitable]
+                Called (on the client's event loop) with the Vantiq client, returning the awaitable to run.
+        Returns:
+            The result of the awaitable.
+
+        Example:
+        ::
+            vr = client.run(lambda vantiq: vantiq.upsert(VantiqResources.TYPES, my_type))
+        """
+        async def call():
+            return await operation(self.client)
+        return self._call(call())
+
+    def set_access_token(self, access_token: str) -> None:
+        """Set the access token for use with the Vantiq server.  See Vantiq.set_access_token()."""
+        self._call(self.client.set_access_token(access_token))
+
+    def authenticate(self, username: str, password: str) -> None:
+        """Authenticate with the Vantiq server.  See Vantiq.authenticate()."""
+        self._call(self.client.authenticate(username, password))
+
+    def select(self, resource: str,
+               properties: Union[list, None] = None,
+               where: Union[dict, None] = None,
+               sort_spec: Union[dict, None] = None,
+               limit: Union[int, None] = None,
+               options: Union[dict, None] = None,
+               retry: Union[VantiqRetryPolicy, bool, None] = None,
+               raw: bool = False) -> VantiqResponse:
+        """Return items from a Vantiq resource.  See Vantiq.select()."""
+        return self._call(self.client.select(resource, properties, where, sort_spec, limit, options, retry=retry,
+                                             raw=raw))
+
+    def select_one(self, resource: str, resource_id: str,
+                   retry: Union[VantiqRetryPolicy, bool, None] = None, raw: bool = False) -> VantiqResponse:
+        """Return a single item from a Vantiq resource.  See Vantiq.select_one()."""
+        return self._call(self.client.select_one(resource, resource_id, retry=retry, raw=raw))
+
+    def count(self, resource: str, where: Union[dict, None] = None,
+              retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
+        """Return the number of items in a Vantiq resource.  See Vantiq.count()."""
+        return self._call(self.client.count(resource, where, retry=retry))
+
+    def insert(self, resource: str, instance: dict,
+               retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
+        """Insert an item into a Vantiq resource.  See Vantiq.insert()."""
+        return self._call(self.client.insert(resource, instance, retry=retry))
+
+    def upsert(self, resource: str, instance: dict,
+               retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
+        """Insert or update an item of a Vantiq resource.  See Vantiq.upsert()."""
+        return self._call(self.client.upsert(resource, instance, retry=retry))
+
+    def update(self, resource: str, resource_id: str, instance: dict,
+               retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
+        """Update an item of a Vantiq resource.  See Vantiq.update()."""
+        return self._call(self.client.update(resource, resource_id, instance, retry=retry))
+
+    def delete(self, resource: str, where: Union[dict, None],
+               retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
+        """Delete items from a Vantiq resource.  See Vantiq.delete()."""
+        return self._call(self.client.delete(resource, where, retry=retry))
+
+    def execute(self, procedure_id: str, params: dict, headers: Union[dict, None] = None,
+                retry: Union[VantiqRetryPolicy, bool, None] = None, raw: bool = False) -> VantiqResponse:
+        """Execute a Vantiq procedure.  See Vantiq.execute()."""
+        return self._call(self.client.execute(procedure_id, params, headers, retry=retry, raw=raw))
+
+    def publish(self, resource: str, resource_id: str, msg: dict,
+                retry: Union[VantiqRetryPolicy, bool, None] = None) -> VantiqResponse:
+        """Publish a message to a Vantiq Service (event), Source, or Topic.  See Vantiq.publish()."""
+        return self._call(self.client.publish(resource, resource_id, msg, retry=retry))
+
+    def close(self) -> None:
+        """Close the Vantiq client, cancel any tasks still running on its event loop, and stop its thread."""
+        try:
+            future = self._submit(self.client.close(), closing=True)
+        except VantiqException as e:
+            if e.code == 'io.vantiq.python.sync.closed':
+                return
+            raise
+        try:
+            self._wait(future)
+        finally:
+            self._stop_loop()
+
+
+def _bulk_load(client_args: tuple, resource: str, file_path: str, file_format: str, operation: str, processes: int,
+               chunk_size: int, concurrency: int, retry: Union[VantiqRetryPolicy, bool, None]) -> VantiqBulkResult:
+    """Run a bulk load (see Vantiq.bulk_load()), handing slices of the file's records to a pool of processes."""
+    import multiprocessing
+
+    result = VantiqBulkResult(operation)
+    started = time.perf_counter()
+    slice_size = chunk_size * concurrency
+
+    def collect(done: Iterable[concurrent.futures.Future]) -> None:
+        for future in done:
+            try:
+                succeeded, failures = future.result()
+            except Exception as e:
+                raise VantiqException('io.vantiq.python.bulkload.failed',
+                                      'A bulk load worker failed: {0}', [e]) from e
+            # noinspection PyProtectedMember
+            result._record_success(succeeded)
+            for start, count, errors in failures:
+                # noinspection PyProtectedMember
+                result._record_failure(start, count, errors)
+
+    # Spawned (rather than forked) workers do not inherit the parent's event loop or threads
+    with concurrent.futures.ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=_bulk_load_init, initargs=client_args) as pool:
+        # The csv module does its own newline handling, including of newlines within quoted values
+        with open(file_path, 'r', newline='') if file_format == 'csv' else open(file_path, 'rb') as f:
+            if file_format == 'csv':
+                reader = csv.reader(f)
+                header = next(reader, [])
+                records = (row for row in reader if row)
+            else:
+                header = None
+                records = (line for line in f if line.strip())
+            pending = set()
+            start = 0
+            while True:
+                records_slice = list(itertools.islice(records, slice_size))
+                if not records_slice:
+                    break
+                # Keep a bounded number of slices waiting, so the file is read no faster than it is loaded
+                if len(pending) >= processes * 2:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+                pending.add(pool.submit(_bulk_load_slice, operation, resource, header, start, records_slice,
+                                        chunk_size, concurrency, retry))
+                start += len(records_slice)
+            collect(concurrent.futures.wait(pending).done)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# The event loop & client of a bulk load worker process
+_bulk_load_worker: Union[tuple, None] = None
+
+
+def _bulk_load_init(server: str, api_version: str, access_token: str, target_namespace: Union[str, None],
+                    codec_name: str, retry_policy: Union[VantiqRetryPolicy, None], connect_args: dict) -> None:
+    global _bulk_load_worker
+    try:
+        codec = VantiqJsonCodec.create(codec_name)
+    except VantiqException:
+        # A custom codec; the records are still encoded correctly, if more slowly
+        codec = _DEFAULT_CODEC
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    client = Vantiq(server, api_version, json_codec=codec, retry_policy=retry_policy, **connect_args)
+    loop.run_until_complete(client.set_access_token(access_token))
+    client.set_target_namespace(target_namespace)
+    _bulk_load_worker = (loop, client)
+    # Pool workers exit without running atexit handlers, but do run multiprocessing's finalizers
+    import multiprocessing.util
+    multiprocessing.util.Finalize(None, _bulk_load_close, exitpriority=10)
+
+
+def _bulk_load_close() -> None:
+    """Close the client & event loop of a bulk load worker process as it exits."""
+    global _bulk_load_worker
+    if _bulk_load_worker is not None:
+        loop, client = _bulk_load_worker
+        _bulk_load_worker = None
+        try:
+            loop.run_until_complete(client.close())
+        finally:
+            loop.close()
+
+
+def _bulk_load_slice(operation: str, resource: str, header: Union[list, None], start: int, records: list,
+                     chunk_size: int, concurrency: int, retry: Union[VantiqRetryPolicy, bool, None]) -> tuple:
+    """Load a slice of a bulk load's records, returning the number that succeeded and the failures."""
+    loop, client = _bulk_load_worker
+    items = []
+    positions = []
+    failures = []
+    for offset, record in enumerate(records):
+        try:
+            # noinspection PyProtectedMember
+            items.append(dict(zip(header, record)) if header is not None else client._json_codec.decode(record))
+            positions.append(start + offset)
+        except Exception as e:
+            failures.append((start + offset, 1, [VantiqError('io.vantiq.python.bulkload.parse',
+                                                             'Unable to parse record {0}: {1}',
+                                                             [start + offset, str(e)])]))
+    # noinspection PyProtectedMember
+    result = loop.run_until_complete(client._perform_bulk(operation, resource, items, None, chunk_size,
+                                                          concurrency, retry))
+    # Report the failures by their position in the file.  A chunk's items need not be contiguous in the file (the
+    # records between them may not have parsed), so each failed chunk is split into its contiguous ranges.
+    for failed_start, count, errors in result.failures:
+        range_start = positions[failed_start]
+        range_count = 0
+        for position in positions[failed_start:failed_start + count]:
+            if position != range_start + range_count:
+                failures.append((range_start, range_count, errors))
+                range_start = position
+                range_count = 0
+            range_count += 1
+        failures.append((range_start, range_count, errors))
+    return result.succeeded, failures
+
+
+def _main(argv: Union[List[str], None] = None) -> int:
+    """The command line interface, run as `python -m vantiqsdk`."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m vantiqsdk', description='Vantiq SDK command line tools.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    load = commands.add_parser('load', help='Load the items in an NDJSON or CSV file into a Vantiq resource, '
+                                            'using a pool of processes.')
+    load.add_argument('resource', help='The resource (e.g., type name) into which to load the items.')
+    load.add_argument('file', help='The file containing the items.')
+    load.add_argument('--server', default=os.environ.get('VANTIQ_URL'),
+                      help='The Vantiq server URL.  Defaults to $VANTIQ_URL.')
+    load.add_argument('--token', default=os.environ.get('VANTIQ_ACCESS_TOKEN'),
+                      help='The access token.  Defaults to $VANTIQ_ACCESS_TOKEN.')
+    load.add_argument('--username', default=os.environ.get('VANTIQ_USERNAME'),
+                      help='The username, if no token is given.  Defaults to $VANTIQ_USERNAME.')
+    load.add_argument('--password', default=os.environ.get('VANTIQ_PASSWORD'),
+                      help='The password, if no token is given.  Defaults to $VANTIQ_PASSWORD.')
+    load.add_argument('--namespace', help='The target namespace.')
+    load.add_argument('--format', choices=['ndjson', 'csv'], dest='file_format',
+                      help='The format of the file.  Defaults to csv for .csv files, and ndjson otherwise.')
+    load.add_argument('--upsert', action='store_true', help='Upsert rather than insert the items.')
+    load.add_argument('--processes', type=int, help='The number of worker processes.  Defaults to the CPU count.')
+    load.add_argument('--chunk-size', type=int, default=500, help='Items per request.  Defaults to 500.')
+    load.add_argument('--concurrency', type=int, default=4,
+                      help='Requests in flight per worker process.  Defaults to 4.')
+    load.add_argument('--json-codec', default='auto', help='The JSON codec to use.  Defaults to auto.')
+    args = parser.parse_args(argv)
+    if not args.server or not (args.token or (args.username and args.password)):
+        parser.error('a server and either a token or a username & password are required')
+
+    async def run_load() -> VantiqBulkResult:
+        async with Vantiq(args.server, json_codec=args.json_codec) as client:
+            # The token is obtained once, here, and shared by every worker
+            if args.token:
+                await client.set_access_token(args.token)
+            else:
+                await client.authenticate(args.username, args.password)
+            if args.namespace:
+                client.set_target_namespace(args.namespace)
+            return await client.bulk_load(args.resource, args.file, args.file_format,
+                                          'upsert' if args.upsert else 'insert', args.processes, args.chunk_size,
+                                          args.concurrency)
+
+    result = asyncio.run(run_load())
+    print(result)
+    print(f'{result.succeeded} of {result.total} items loaded in {result.elapsed:.2f} seconds '
+          f'({result.items_per_second:.0f} items/second).')
+    return 0 if result.is_success else 1
+
 
 class _VantiqSubscriber:
     CONNECT = 'connect'
@@ -1373,16 +5071,40 @@ class _VantiqSubscriber:
 
     def __init__(self, parent: Vantiq, **connect_args):
         self.parent: Vantiq = parent
+        self._codec: VantiqJsonCodec = parent.get_json_codec()
         self._connect_args = connect_args
         self.connected = False
         self.connected_future: asyncio.Future = asyncio.get_running_loop().create_future()
         # noinspection PyTypeChecker
-        self.connection: websockets.ClientProtocol = None
+        self.connection: 'websockets.ClientProtocol' = None
         self.url = None
         self._vlog = logging.getLogger(self.__class__.__name__)
         self.subscriptions: Dict[str, bool] = {}
         self.callbacks: Dict[str, Callable[[str, dict], Awaitable[None]]] = {}
+        # noinspection PyProtectedMember
+        self._config: VantiqSubscriberConfig = parent._subscriber_config
+        self._dispatchers: Dict[str, _SubscriptionDispatcher] = {}
+        self._stopping = set()
+        self._sub_msgs: Dict[str, dict] = {}
+        self._closing = False
+        self._closed = False
+        # The task running connect(), which reconnects lost connections
+        self._connect_task: Union[asyncio.Task, None] = None
+        self._lost_at: Union[float, None] = None
+        self._attempt_started = 0.0
+        self._reconnect_attempts = 0
+        self._reconnects = 0
+        self._last_reconnect: Union[dict, None] = None
+        self._ack_frames_sent = 0
+        self._ack_batcher: Union[_AckBatcher, None] = None
+        if self._config.ack_batch_size > 1:
+            self._ack_batcher = _AckBatcher(self, self._config.ack_batch_size, self._config.ack_flush_interval,
+                                            self._config.ack_gap_timeout)
+        self._acks_received = 0
         self.is_authenticated = False
+        # Operations sent over the websocket, awaiting their responses
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._request_count = 0
         # noinspection PyTypeChecker
         self.on_close_handler: Callable[[], Awaitable[None]] = None
 
@@ -1407,81 +5129,193 @@ class _VantiqSubscriber:
         if not self.connected:
             self.url = self.parent.get_server().replace("http", "ws") + "/api/v" + self.parent.get_api_version() + \
                   "/wsock/websocket"
-            async with websockets.connect(uri=self.url,
-                                          ping_interval=20 if do_pings else None,
-                                          ping_timeout=20 if do_pings else None,
-                                          **self._connect_args) as websocket:
-                try:
-                    if not self.connected:
-                        auth_msg = {
-                            'op': 'validate',
-                            'resourceName': 'system.credentials',
-                            'object': self.parent.get_access_token()
-                        }
-                        await websocket.send(json.dumps(auth_msg))
-
-                    # Read from the socket until it closes
-                    async for raw in websocket:
-                        # Decode the message
-                        resp = json.loads(raw)
-                        request_id = None
-                        if 'headers' in resp.keys():
-                            hdrs = resp['headers']
-                            if 'X-Request-Id' in hdrs.keys():
-                                request_id = hdrs['X-Request-Id']
-                        else:
-                            pass
-
-                        # Using request id, track back to request for which this is a response
-                        if 'status' in resp.keys():
-                            if resp['status'] == 200:
-                                if not self.is_authenticated:
-                                    self.connection = websocket
-                                    self.connected = True
-                                    self.is_authenticated = True
-                                    self.connected_future.set_result('OK')
-                                    self._vlog.debug('Authentication completed.')
-                                else:
-                                    if request_id:
-                                        if request_id in self.subscriptions.keys():
-                                            if not self.subscriptions[request_id]:
-                                                # Then this is our response for our subscription.
-                                                self.subscriptions[request_id] = True
-                                                self._vlog.debug('Subscription requested accepted.')
-                                                callback = self.callbacks[request_id]
-                                                await callback(self.CONNECT, resp)
-                                            elif request_id in self.callbacks.keys():
-                                                callback = self.callbacks[request_id]
-                                                body = resp.get('body', None)
-                                                if body is not None and isinstance(body, dict) and body.get('op', None) == 'unsubscribe':
-                                                    self.subscriptions.pop(request_id)
-                                                    self.callbacks.pop(request_id)
-                                                await callback(self.MESSAGE, resp)
-                            elif resp['status'] >= 400:
-                                if not self.connected:
-                                    self._vlog.error('Connect call failed: %s :: %s:%s', resp['status'],
-                                                     resp['body'][0]['code'], resp['body'][0]['message'])
-                                    ve = VantiqException('io.vantiq.python.connect.failed',
-                                                         'Connect call failed: {0} :: {1}:{2}',
-                                                         [resp['status'], resp['body'][0]['code'],
-                                                          resp['body'][0]['message']])
-                                    self.connected_future.set_exception(ve)
-                                    raise ve
-                                else:
-                                    if request_id and request_id in self.callbacks.keys():
-                                        callback = self.callbacks[request_id]
-                                        await callback(self.ERROR, resp)
-                            elif resp['status'] == 100:
-                                if request_id and request_id in self.callbacks.keys():
-                                    self._vlog.debug('Message received via subscription.')
-                                    callback = self.callbacks[request_id]
-                                    await callback(self.MESSAGE, resp)
-                finally:
-                    # Once we get here, any transient subscriptions will be gone, so we should reset our side as well
-                    await self.unsubscribe_all()
+            self._connect_task = asyncio.current_task()
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        await self._run_connection(do_pings)
+                    except Exception as e:
+                        if not self._can_reconnect():
+                            if not self.connected_future.done():
+                                # Let start_subscriber_transport() know that we never got started
+                                self.connected_future.set_exception(e)
+                            raise
+                        self._vlog.warning('Subscription transport to %s lost: %s', self.url, e)
+                    if not self._can_reconnect():
+                        break
+                    if self._lost_at is None:
+                        # The connection that just ended was established, so this begins a new outage
+                        self._lost_at = time.monotonic()
+                        attempt = 0
+                    attempt += 1
+                    max_attempts = self._config.reconnect_max_attempts
+                    if max_attempts is not None and attempt > max_attempts:
+                        self._vlog.error('Giving up reconnecting subscription transport to %s after %s attempts.',
+                                         self.url, max_attempts)
+                        break
+                    await asyncio.sleep(self._reconnect_delay(attempt))
+                    if self._closing:
+                        break
+                    self._reconnect_attempts = attempt
+                    self._vlog.info('Reconnecting subscription transport to %s (attempt %s).', self.url, attempt)
+            finally:
+                # Once we get here, any transient subscriptions will be gone, so we should reset our side as well
+                await self.unsubscribe_all()
+
+    async def _run_connection(self, do_pings: bool) -> None:
+        import websockets
+
+        self._attempt_started = time.monotonic()
+        async with websockets.connect(uri=self.url,
+                                      ping_interval=20 if do_pings else None,
+                                      ping_timeout=20 if do_pings else None,
+                                      **self._connect_args) as websocket:
+            try:
+                auth_msg = {
+                    'op': 'validate',
+                    'resourceName': 'system.credentials',
+                    'object': self.parent.get_access_token()
+                }
+                await websocket.send(self._codec.encode_str(auth_msg))
+
+                # Read from the socket until it closes
+                while True:
+                    try:
+                        # Fetch the frame undecoded so the codec can work from the bytes
+                        raw = await websocket.recv(decode=False)
+                    except websockets.ConnectionClosedOK:
+                        break
+                    # Decode the message & route it to the subscription concerned
+                    await self._process_message(websocket, self._codec.decode(raw))
+            finally:
+                self.connected = False
+                self.is_authenticated = False
+                self.connection = None
+                self._fail_pending('The websocket connection was closed before the response was received.')
+
+    def _can_reconnect(self) -> bool:
+        # Reconnect only connections that were once established, and never after close() was called
+        return self._config.auto_reconnect and not self._closing and self.connected_future.done() \
+            and not self.connected_future.cancelled() and self.connected_future.exception() is None
+
+    def _reconnect_delay(self, attempt: int) -> float:
+        delay = min(self._config.reconnect_max_delay, self._config.reconnect_initial_delay * (2 ** (attempt - 1)))
+        # Jitter keeps many clients dropped at the same time from reconnecting in lockstep
+        return random.uniform(delay / 2, delay)
+
+    async def _resubscribe(self, websocket) -> None:
+        now = time.monotonic()
+        reconnect_latency = now - self._attempt_started
+        # Send every subscription back to back rather than waiting for each to be accepted
+        for request_id, sub_msg in self._sub_msgs.items():
+            self.subscriptions[request_id] = False
+            await websocket.send(self._codec.encode_str(sub_msg))
+        gap_duration = time.monotonic() - self._lost_at
+        self._lost_at = None
+        self._reconnects += 1
+        self._last_reconnect = {'attempts': self._reconnect_attempts,
+                                'reconnect_latency': reconnect_latency,
+                                'gap_duration': gap_duration,
+                                'subscriptions': len(self._sub_msgs)}
+        self._vlog.info('Subscription transport reconnected after %.3f seconds; %s subscriptions resent.',
+                        gap_duration, len(self._sub_msgs))
+        if self._config.on_reconnect is not None:
+            try:
+                await self._config.on_reconnect(dict(self._last_reconnect))
+            except Exception:
+                self._vlog.exception('on_reconnect callback failed.')
+
+    async def _process_message(self, websocket, resp: dict) -> None:
+        request_id = None
+        if 'headers' in resp.keys():
+            hdrs = resp['headers']
+            if 'X-Request-Id' in hdrs.keys():
+                request_id = hdrs['X-Request-Id']
+
+        if request_id is not None and request_id in self._pending:
+            # The response to an operation sent by request()
+            future = self._pending.pop(request_id)
+            if not future.done():
+                future.set_result(resp)
+            return
+
+        # Using request id, track back to request for which this is a response
+        if 'status' in resp.keys():
+            if resp['status'] == 200:
+                if not self.is_authenticated:
+                    self.connection = websocket
+                    self.connected = True
+                    self.is_authenticated = True
+                    self._vlog.debug('Authentication completed.')
+                    if not self.connected_future.done():
+                        self.connected_future.set_result('OK')
+                    elif self._lost_at is not None:
+                        await self._resubscribe(websocket)
+                else:
+                    if request_id:
+                        if request_id in self.subscriptions.keys():
+                            if not self.subscriptions[request_id]:
+                                # Then this is our response for our subscription.
+                                self.subscriptions[request_id] = True
+                                self._vlog.debug('Subscription requested accepted.')
+                                self._dispatch(request_id, self.CONNECT, resp)
+                            elif request_id in self.callbacks.keys():
+                                self._dispatch(request_id, self.MESSAGE, resp)
+                                body = resp.get('body', None)
+                                if body is not None and isinstance(body, dict) and body.get('op', None) == 'unsubscribe':
+                                    self.subscriptions.pop(request_id)
+                                    self.callbacks.pop(request_id)
+                                    self._sub_msgs.pop(request_id, None)
+                                    # Let the workers deliver what they have queued (including this message), then stop
+                                    dispatcher = self._dispatchers.pop(request_id)
+                                    stopping = asyncio.create_task(dispatcher.stop())
+                                    self._stopping.add(stopping)
+                                    stopping.add_done_callback(self._stopping.discard)
+            elif resp['status'] >= 400:
+                if not self.connected:
+                    self._vlog.error('Connect call failed: %s :: %s:%s', resp['status'],
+                                     resp['body'][0]['code'], resp['body'][0]['message'])
+                    ve = VantiqException('io.vantiq.python.connect.failed',
+                                         'Connect call failed: {0} :: {1}:{2}',
+                                         [resp['status'], resp['body'][0]['code'],
+                                          resp['body'][0]['message']])
+                    if not self.connected_future.done():
+                        self.connected_future.set_exception(ve)
+                    raise ve
+                else:
+                    if request_id and request_id in self.callbacks.keys():
+                        self._dispatch(request_id, self.ERROR, resp)
+            elif resp['status'] == 100:
+                if request_id and request_id in self.callbacks.keys():
+                    self._vlog.debug('Message received via subscription.')
+                    body = resp.get('body', None)
+                    if self._ack_batcher is not None and isinstance(body, dict) and 'sequenceId' in body \
+                            and 'partitionId' in body:
+                        # Seen before any callback can acknowledge it, however the workers run
+                        self._ack_batcher.delivered(request_id, body.get('name'), body['sequenceId'],
+                                                    body['partitionId'])
+                    self._dispatch(request_id, self.MESSAGE, resp)
+
+    def _dispatch(self, request_id: str, what: str, resp: dict) -> None:
+        # Hand the message to the subscription's workers so the receive loop never waits on a callback, nor on one
+        # subscription's backlog
+        self._dispatchers[request_id].put(what, resp)
+
+    def stats(self) -> dict:
+        return {'connected': self.connected,
+                'reconnecting': self._lost_at is not None,
+                'reconnects': self._reconnects,
+                'last_reconnect': dict(self._last_reconnect) if self._last_reconnect else None,
+                'acks_received': self._acks_received,
+                'ack_frames_sent': self._ack_frames_sent,
+                'ack_gaps_stalled': self._ack_batcher.gaps_stalled if self._ack_batcher else 0,
+                'ack_gaps_skipped': self._ack_batcher.gaps_skipped if self._ack_batcher else 0,
+                'subscriptions': {request_id: dispatcher.stats()
+                                  for request_id, dispatcher in self._dispatchers.items()}}
 
     async def subscribe(self, path: str, params: dict, callback: Callable[[str, dict], Awaitable[None]],
-                        target_namespace: Union[str, None] = None) -> VantiqResponse:
+                        target_namespace: Union[str, None] = None, workers: Union[int, None] = None) -> VantiqResponse:
         # If we aren't connected, complain
         if not self.connected:
             self._vlog.error('No transport for subscriptions established.')
@@ -1507,6 +5341,12 @@ class _VantiqSubscriber:
             vr.errors = [ve]
             return vr
         self.callbacks[request_id] = callback
+        if request_id in self._dispatchers:
+            # An earlier subscription for this path that was never accepted
+            self._dispatchers.pop(request_id).cancel()
+        self._dispatchers[request_id] = _SubscriptionDispatcher(request_id, callback,
+                                                                workers or self._config.workers,
+                                                                self._config.queue_size)
         self.subscriptions[request_id] = False  # Will be set to true when the server responds
         if params is None:
             params = {}
@@ -1517,34 +5357,136 @@ class _VantiqSubscriber:
                    'parameters': params}
         if target_namespace is not None:
             sub_msg['targetNamespace'] = target_namespace
+        # Kept so that the subscription can be resent after a reconnect
+        self._sub_msgs[request_id] = sub_msg
         # noinspection PyUnresolvedReferences
-        await self.connection.send(json.dumps(sub_msg))
+        await self.connection.send(self._codec.encode_str(sub_msg))
         self._vlog.debug('Subscription request sent.')
         return VantiqResponse(True, 204, None)
 
+    async def unsubscribe(self, path: str, target_namespace: Union[str, None] = None) -> None:
+        target_namespace = target_namespace or self.parent.get_target_namespace()
+        request_id = path
+        if target_namespace is not None:
+            request_id += '@' + target_namespace
+        if self.subscriptions.pop(request_id, None) is None:
+            return
+        self.callbacks.pop(request_id, None)
+        sub_msg = self._sub_msgs.pop(request_id, None)
+        dispatcher = self._dispatchers.pop(request_id, None)
+        if dispatcher is not None:
+            dispatcher.cancel()
+        if sub_msg is not None and self.connected and self.connection is not None:
+            unsub_msg = dict(sub_msg, op='unsubscribe')
+            # noinspection PyBroadException
+            try:
+                # noinspection PyUnresolvedReferences
+                await self.connection.send(self._codec.encode_str(unsub_msg))
+            except Exception:
+                # The subscription is forgotten here whatever the server makes of it
+                self._vlog.debug('Unable to send unsubscribe request for %s', request_id)
+
     async def ack(self, request_id: str, subscription_id: str, sequence_id: float, partition_id: float):
+        self._acks_received += 1
+        if self._ack_batcher is not None:
+            await self._ack_batcher.add(request_id, subscription_id, sequence_id, partition_id)
+        else:
+            await self._send_ack(request_id, subscription_id, sequence_id, partition_id,
+                                 self.parent.get_target_namespace())
+
+    async def _send_ack(self, request_id: str, subscription_id: str, sequence_id: float, partition_id: float,
+                        target_namespace: Union[str, None]):
         params = {'requestId': request_id,
                   'subscriptionName': subscription_id, 'sequenceId': sequence_id, 'partitionId': partition_id}
         msg = {'op': 'acknowledge', 'resourceName': 'events', 'resourceId': request_id,
                'parameters': params}
-        if self.parent.get_target_namespace() is not None:
-            msg['targetNamespace'] = self.parent.get_target_namespace()
-        raw = json.dumps(msg)
+        if target_namespace is not None:
+            msg['targetNamespace'] = target_namespace
+        raw = self._codec.encode_str(msg)
         # noinspection PyUnresolvedReferences
         await self.connection.send(raw)
+        self._ack_frames_sent += 1
+
+    async def request(self, op: str, resource_name: str, resource_id: str,
+                      instance: Union[dict, list, None]) -> VantiqResponse:
+        """Send an operation over the websocket, returning the response correlated with it by X-Request-Id."""
+        self._request_count += 1
+        request_id = f'_request/{self._request_count}'
+        msg = {'op': op,
+               'resourceName': resource_name,
+               'resourceId': resource_id,
+               'object': instance,
+               'parameters': {'requestId': request_id}}
+        target_namespace = self.parent.get_target_namespace()
+        if target_namespace is not None:
+            msg['targetNamespace'] = target_namespace
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            # noinspection PyUnresolvedReferences
+            await self.connection.send(self._codec.encode_str(msg))
+            resp = await asyncio.wait_for(future, self._config.request_timeout)
+        except asyncio.TimeoutError:
+            raise VantiqException('io.vantiq.python.websocket.timeout',
+                                  'No response to the {0} operation was received within {1} seconds.',
+                                  [op, self._config.request_timeout]) from None
+        finally:
+            self._pending.pop(request_id, None)
+        # noinspection PyProtectedMember
+        return VantiqResponse._from_frame(resp)
+
+    def _fail_pending(self, reason: str) -> None:
+        pending = self._pending
+        self._pending = {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(VantiqException('io.vantiq.python.websocket.closed', reason, []))
 
     async def unsubscribe_all(self):
         await self.close()
         self.subscriptions = {}
         self.callbacks = {}
+        self._sub_msgs = {}
 
     async def close(self):
+        if self._closed:
+            # Already closed (e.g. by close() ending connect(), whose exit closes again)
+            return
+        self._closed = True
+        self._closing = True
+        task = self._connect_task
+        if self._lost_at is not None and task is not None and task is not asyncio.current_task() \
+                and not task.done():
+            # Stop reconnecting, rather than leaving a backoff or attempt to finish after we have closed
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._ack_batcher is not None and self.connection is not None:
+            # noinspection PyBroadException
+            try:
+                await self._ack_batcher.flush()
+            except Exception:
+                self._vlog.exception('Unable to send pending acknowledgements on close.')
+            self._ack_batcher.cancel()
         self.connected = False
+        # Messages still queued are dropped along with the subscriptions
+        for dispatcher in self._dispatchers.values():
+            dispatcher.cancel()
+        self._dispatchers = {}
         if self.connection is not None:
             # noinspection PyUnresolvedReferences
             await self.connection.close()
         self.connection = None
         self._connect_args = {}
         self.is_authenticated = False
+        self._fail_pending('The websocket connection was closed before the response was received.')
         if self.on_close_handler is not None:
             await self.on_close_handler()
+
+
+if __name__ == '__main__':
+    # Run using the importable module, so that bulk load workers can find their functions by name
+    from vantiqsdk import _main as main
+    sys.exit(main())
@@ -4,21 +4,34 @@ __license__ = "MIT License"
 __email__ = "support@vantiq.com"
 
 import asyncio
+import base64
 import logging
 from logging import config
 from datetime import datetime
+from decimal import Decimal
 import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
 import traceback
 from os.path import exists
 from typing import Union
 import urllib.parse
 
 import aiofiles
+import aiohttp
 from aioresponses import aioresponses, CallbackResult
 import pytest
+import websockets
 from yarl import URL
 
-from vantiqsdk import Vantiq, VantiqException, VantiqResources, VantiqResponse
+from vantiqsdk import SyncVantiq, Vantiq, VantiqBulkResult, VantiqException, VantiqJsonCodec, VantiqPoolConfig, VantiqResources, \
+    VantiqParam, VantiqRecordStore, VantiqResponse, VantiqResponseCache, VantiqRetryPolicy, VantiqSubscriberConfig
+# noinspection PyProtectedMember
+from vantiqsdk import _AckBatcher, _order_key, _VantiqSubscriber, _where_matches
 
 _server_url: str = 'http://example.com/'
 _access_token: str = '1234accessToken'
@@ -38,6 +51,48 @@ else:
     print('No logger.ini file found.')
 
 
+class FakeWebsocket:
+    """Stands in for the subscriber's websocket connection, recording the frames sent.
+
+    When auto_respond is set, validate and subscribe requests are accepted as a Vantiq server would.
+    """
+
+    def __init__(self, auto_respond: bool = False):
+        self.sent = []
+        self.closed = False
+        self.auto_respond = auto_respond
+        self.incoming = asyncio.Queue()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def send(self, raw):
+        frame = json.loads(raw)
+        self.sent.append(frame)
+        if self.auto_respond:
+            if frame['op'] == 'validate':
+                self.push({'status': 200})
+            elif frame['op'] == 'subscribe':
+                self.push({'status': 200, 'headers': {'X-Request-Id': frame['parameters']['requestId']}})
+
+    def push(self, frame: Union[dict, Exception]):
+        self.incoming.put_nowait(frame)
+
+    async def recv(self, decode: bool = None):
+        frame = await self.incoming.get()
+        if isinstance(frame, Exception):
+            raise frame
+        return json.dumps(frame).encode('utf-8')
+
+    async def close(self):
+        if not self.closed:
+            self.closed = True
+            self.push(websockets.ConnectionClosedOK(None, None))
+
+
 class TestMockedConnection:
 
     @pytest.fixture(autouse=True)
@@ -953,3 +1008,1532 @@ class TestMockedConnection:
             await client.authenticate(_username, _password)
             await self.check_nsusers_ops(mocked, client)
         await client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_pool_config(self, monkeypatch):
+        pool_config = VantiqPoolConfig(limit=20, limit_per_host=5, keepalive_timeout=45.0, ttl_dns_cache=300)
+        async with Vantiq(_server_url, '1', pool_config=pool_config) as client:
+            # noinspection PyProtectedMember
+            connector = client._connection._con.connector
+            assert connector.limit == 20
+            assert connector.limit_per_host == 5
+            stats = client.get_pool_stats()
+            assert stats['limit'] == 20
+            assert stats['limit_per_host'] == 5
+            assert stats['in_use'] == 0
+            assert stats['idle'] == 0
+            assert stats['in_use_per_host'] == {}
+            # Without the bookkeeping expected of the connector, the occupancy is unknown rather than zero
+            with monkeypatch.context() as m:
+                m.delattr(connector, '_acquired_per_host')
+                stats = client.get_pool_stats()
+                assert stats['limit'] == 20
+                assert stats['in_use'] is None
+                assert stats['idle'] is None
+                assert stats['in_use_per_host'] is None
+
+            with aioresponses() as mocked:
+                await client.set_access_token(_access_token)
+                mocked.get(f'http://example.com/api/v1/resources/custom/{TEST_TYPE}', status=200,
+                           body=json.dumps([]))
+                vr = await client.select(TEST_TYPE)
+                assert vr.is_success
+
+        with pytest.raises(VantiqException) as exc_info:
+            VantiqPoolConfig(limit=-1)
+        assert exc_info.value.code == 'io.vantiq.python.pool.invalidlimit'
+
+    @pytest.mark.parametrize('codec_name', ['json', 'orjson', 'msgspec', 'auto'])
+    def test_json_codecs(self, codec_name):
+        try:
+            codec = VantiqJsonCodec.create(codec_name)
+        except VantiqException as ve:
+            assert ve.code == 'io.vantiq.python.codec.unavailable'
+            pytest.skip(f'{codec_name} is not installed')
+        value = {'ts': datetime(2022, 6, 1, 12, 30, 15), 'amount': Decimal('12.5'), 'list': [1, 'a', None]}
+        encoded = codec.encode(value)
+        assert isinstance(encoded, bytes)
+        assert codec.encode_str(value) == encoded.decode('utf-8')
+        decoded = codec.decode(encoded)
+        assert decoded == {'ts': '2022-06-01T12:30:15', 'amount': 12.5, 'list': [1, 'a', None]}
+        assert codec.decode(memoryview(encoded)) == decoded
+
+    def test_json_codec_unknown(self):
+        with pytest.raises(VantiqException) as exc_info:
+            VantiqJsonCodec.create('yaml')
+        assert exc_info.value.code == 'io.vantiq.python.codec.unknown'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_select_with_alternate_codec(self):
+        try:
+            codec = VantiqJsonCodec.create('orjson')
+        except VantiqException:
+            pytest.skip('orjson is not installed')
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1', json_codec=codec) as client:
+                assert client.get_json_codec() is codec
+                await client.set_access_token(_access_token)
+                # orjson produces compact JSON, so the where clause is encoded without spaces
+                query_part = self.mock_query_part(where_part='{"id":"some_id"}')
+                mocked.get(f'http://example.com/api/v1/resources/custom/{TEST_TYPE}?{query_part}', status=200,
+                           body=json.dumps([{'id': 'some_id', 'x': 3.14159}]))
+                vr = await client.select(TEST_TYPE, None, {'id': 'some_id'})
+                assert vr.is_success
+                assert vr.body == [{'id': 'some_id', 'x': 3.14159}]
+
+                mocked.post(f'http://example.com/api/v1/resources/topics/{TEST_TOPIC}', status=200)
+                vr = await client.publish(VantiqResources.TOPICS, TEST_TOPIC, {'ts': datetime.now()})
+                assert vr.is_success
+                assert vr.body is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_select_iter(self):
+        records = [{'_id': f'id{i}', 'name': f'n{i % 3}', 'value': i} for i in range(7)]
+        requests = []
+
+        def page_callback(url, **kwargs):
+            params = kwargs['params']
+            requests.append(params)
+            assert 'count' not in params
+            assert json.loads(params['sort']) == {'name': 1, '_id': 1}
+            assert set(json.loads(params['props'])) == {'value', '_id', 'name'}
+            ordered = sorted(records, key=lambda r: (r['name'], r['_id']))
+            where = json.loads(params['where'])
+            if '$and' in where:
+                assert where['$and'][0] == {'value': {'$gte': 0}}
+                after = where['$and'][1]['$or']
+                last_name = after[0]['name']['$gt']
+                last_id = after[1]['_id']['$gt']
+                ordered = [r for r in ordered if (r['name'], r['_id']) > (last_name, last_id)]
+            else:
+                assert where == {'value': {'$gte': 0}}
+            return CallbackResult(status=200, body=json.dumps(ordered[:int(params['limit'])]))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'),
+                           callback=page_callback, repeat=True)
+                seen = []
+                async for record in client.select_iter(TEST_TYPE, properties=['value'], where={'value': {'$gte': 0}},
+                                                       sort_spec={'name': 1}, page_size=3):
+                    assert list(record.keys()) == ['value']
+                    seen.append(record['value'])
+                assert seen == [0, 3, 6, 1, 4, 2, 5]
+                # Pages of 3, 3, and 1 items
+                assert len(requests) == 3
+
+                with pytest.raises(VantiqException) as exc_info:
+                    async for _ in client.select_iter(TEST_TYPE, sort_spec={'name': 1, 'value': -1}):
+                        pass
+                assert exc_info.value.code == 'io.vantiq.python.selectiter.sortspec'
+
+
+                query_part = self.mock_query_part(sort_part='{"_id": 1}')
+                mocked.get(f'http://example.com/api/v1/resources/custom/Missing?limit=10&{query_part}', status=404,
+                           body=json.dumps([{'code': 'io.vantiq.type.unknown', 'message': 'Unknown type {0}',
+                                             'params': ['Missing']}]))
+                with pytest.raises(VantiqException) as exc_info:
+                    async for _ in client.select_iter('Missing', page_size=10):
+                        pass
+                assert exc_info.value.code == 'io.vantiq.type.unknown'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_select_iter_null_sort_values(self):
+        # Items with a missing or null sort value, which the server sorts before all others
+        records = [{'_id': 'id0', 'name': 'b'}, {'_id': 'id1'}, {'_id': 'id2', 'name': 'a'},
+                   {'_id': 'id3', 'name': None}, {'_id': 'id4', 'name': 'c'}, {'_id': 'id5'},
+                   {'_id': 'id6', 'name': 'a'}]
+
+        def page_callback(url, **kwargs):
+            # Select as the server would
+            params = kwargs['params']
+            sort = json.loads(params['sort'])
+            selected = [r for r in records if _where_matches(r, json.loads(params['where']) if 'where' in params
+                                                              else None)]
+            selected.sort(key=lambda r: (_order_key(r.get('name')), r['_id']), reverse=sort['_id'] < 0)
+            return CallbackResult(status=200, body=json.dumps(selected[:int(params['limit'])]))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'),
+                           callback=page_callback, repeat=True)
+                expected = ['id1', 'id3', 'id5', 'id2', 'id6', 'id0', 'id4']
+                for direction in (1, -1):
+                    # Pages of 2 end on items both with and without a sort value
+                    ids = [record['_id'] async for record in client.select_iter(TEST_TYPE,
+                                                                                sort_spec={'name': direction},
+                                                                                page_size=2)]
+                    assert ids == (expected if direction > 0 else list(reversed(expected)))
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_bulk_insert_upsert(self):
+        chunks = []
+        in_flight = 0
+        max_in_flight = 0
+
+        async def bulk_callback(url, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            chunk = json.loads(kwargs['data'])
+            chunks.append((url.query.get('upsert'), chunk))
+            if any(item['id'] == 'bad' for item in chunk):
+                return CallbackResult(status=400, body=json.dumps([{'code': 'io.vantiq.bad', 'message': 'Bad item',
+                                                                    'params': []}]))
+            return CallbackResult(status=200, body=json.dumps(chunk))
+
+        async def generate():
+            for i in range(4):
+                yield {'_id': f'x{i}', 'id': f'item{i}'}
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.post(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType.*$'),
+                            callback=bulk_callback, repeat=True)
+
+                items = [{'id': f'item{i}'} for i in range(10)]
+                items[4] = {'id': 'bad'}
+                result = await client.insert_many(TEST_TYPE, iter(items), chunk_size=3, concurrency=2)
+                assert isinstance(result, VantiqBulkResult)
+                assert not result.is_success
+                assert result.total == 10
+                assert result.succeeded == 7
+                assert result.failed == 3
+                assert len(result.failures) == 1
+                start, count, errors = result.failures[0]
+                assert (start, count) == (3, 3)
+                assert errors[0].code == 'io.vantiq.bad'
+                assert max_in_flight == 2
+                assert sorted(len(chunk) for _, chunk in chunks) == [1, 3, 3, 3]
+                assert all(upsert is None for upsert, _ in chunks)
+
+                chunks.clear()
+                result = await client.upsert_many(TEST_TYPE, generate(), chunk_size=3)
+                assert result.is_success
+                assert result.total == 4
+                assert all(upsert == 'true' for upsert, _ in chunks)
+                assert all('_id' not in item for _, chunk in chunks for item in chunk)
+
+                with pytest.raises(VantiqException) as exc_info:
+                    await client.insert_many(TEST_TYPE, items, chunk_size=0)
+                assert exc_info.value.code == 'io.vantiq.python.bulk.invalidsize'
+
+    @staticmethod
+    async def connect_fake_subscriber(client: Vantiq) -> (_VantiqSubscriber, FakeWebsocket):
+        websocket = FakeWebsocket()
+        subscriber = _VantiqSubscriber(client)
+        # noinspection PyProtectedMember
+        await subscriber._process_message(websocket, {'status': 200})
+        assert subscriber.connected
+        client._subscriber = subscriber
+        return subscriber, websocket
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_subscription_dispatch(self):
+        slow_messages = []
+        fast_messages = []
+        release_slow = asyncio.Event()
+
+        async def slow_callback(what: str, msg: dict):
+            await release_slow.wait()
+            slow_messages.append((what, msg.get('body')))
+
+        async def fast_callback(what: str, msg: dict):
+            if msg.get('body') == 'boom':
+                raise RuntimeError('callback failure')
+            fast_messages.append((what, msg.get('body')))
+
+        client = Vantiq(_server_url, '1', subscriber_config=VantiqSubscriberConfig(workers=1, queue_size=10))
+        await client.set_access_token(_access_token)
+        subscriber, websocket = await self.connect_fake_subscriber(client)
+
+        vr = await client.subscribe(VantiqResources.TOPICS, '/slow', None, slow_callback)
+        assert vr.is_success
+        vr = await client.subscribe(VantiqResources.TOPICS, '/fast', None, fast_callback, workers=2)
+        assert vr.is_success
+        assert [frame['resourceId'] for frame in websocket.sent] == ['/topics/slow', '/topics/fast']
+
+        for request_id in ['/topics/slow', '/topics/fast']:
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, {'status': 200, 'headers': {'X-Request-Id': request_id}})
+        for i in range(3):
+            for request_id in ['/topics/slow', '/topics/fast']:
+                # noinspection PyProtectedMember
+                await subscriber._process_message(websocket, {'status': 100, 'body': i,
+                                                              'headers': {'X-Request-Id': request_id}})
+        # noinspection PyProtectedMember
+        await subscriber._process_message(websocket, {'status': 100, 'body': 'boom',
+                                                      'headers': {'X-Request-Id': '/topics/fast'}})
+
+        # The fast subscription is served even though the slow callback has not returned
+        while len(fast_messages) < 4:
+            await asyncio.sleep(0.01)
+        assert sorted(body for what, body in fast_messages if what == 'message') == [0, 1, 2]
+        assert slow_messages == []
+        stats = client.get_subscriber_stats()
+        assert stats['connected']
+        assert stats['subscriptions']['/topics/slow']['queued'] == 3
+        assert stats['subscriptions']['/topics/fast']['workers'] == 2
+        assert stats['subscriptions']['/topics/fast']['failed'] == 1
+
+        # Messages beyond the slow subscription's queue_size do not hold up the receive loop (or the fast
+        # subscription), but are counted as overflowed
+        for i in range(3, 13):
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, {'status': 100, 'body': i,
+                                                          'headers': {'X-Request-Id': '/topics/slow'}})
+        # noinspection PyProtectedMember
+        await subscriber._process_message(websocket, {'status': 100, 'body': 3,
+                                                      'headers': {'X-Request-Id': '/topics/fast'}})
+        while len(fast_messages) < 5:
+            await asyncio.sleep(0.01)
+        stats = client.get_subscriber_stats()
+        assert stats['subscriptions']['/topics/slow']['queued'] == 13
+        assert stats['subscriptions']['/topics/slow']['overflowed'] == 3
+        assert stats['subscriptions']['/topics/fast']['overflowed'] == 0
+
+        release_slow.set()
+        while len(slow_messages) < 14:
+            await asyncio.sleep(0.01)
+        # A single worker preserves the order of delivery, and no overflowed message is lost
+        assert slow_messages == [('connect', None)] + [('message', i) for i in range(13)]
+
+        await client.close()
+        assert websocket.closed
+        stats = client.get_subscriber_stats()
+        assert not stats['connected']
+        assert stats['subscriptions'] == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_subscription_reconnect(self, monkeypatch):
+        sockets = []
+        refuse_connection = False
+
+        def fake_connect(uri, **kwargs):
+            nonlocal refuse_connection
+            if refuse_connection:
+                refuse_connection = False
+                raise ConnectionRefusedError('Connection refused')
+            websocket = FakeWebsocket(auto_respond=True)
+            sockets.append(websocket)
+            return websocket
+
+        monkeypatch.setattr(websockets, 'connect', fake_connect)
+        messages = []
+        reconnects = []
+
+        async def on_message(what: str, msg: dict):
+            messages.append((what, msg.get('body')))
+
+        async def on_reconnect(details: dict):
+            reconnects.append(details)
+
+        config = VantiqSubscriberConfig(auto_reconnect=True, reconnect_initial_delay=0.01, reconnect_max_delay=0.05,
+                                        on_reconnect=on_reconnect)
+        client = Vantiq(_server_url, '1', subscriber_config=config)
+        await client.set_access_token(_access_token)
+        await client.subscribe(VantiqResources.TOPICS, '/a', None, on_message)
+        await client.subscribe(VantiqResources.TYPES, TEST_TYPE, 'insert', on_message)
+        sockets[0].push({'status': 100, 'body': 'before', 'headers': {'X-Request-Id': '/topics/a'}})
+        while len(messages) < 3:
+            await asyncio.sleep(0.01)
+
+        # Drop the connection, failing the first attempt to reconnect
+        await client.set_access_token('newAccessToken')
+        refuse_connection = True
+        sockets[0].push(websockets.ConnectionClosedError(None, None))
+        while not reconnects:
+            await asyncio.sleep(0.01)
+
+        assert len(sockets) == 2
+        resent = sockets[1].sent
+        assert resent[0] == {'op': 'validate', 'resourceName': 'system.credentials', 'object': 'newAccessToken'}
+        assert sorted(frame['resourceId'] for frame in resent[1:]) == ['/topics/a', '/types/TestType/insert']
+        assert reconnects[0]['attempts'] == 2
+        assert reconnects[0]['subscriptions'] == 2
+        assert reconnects[0]['gap_duration'] >= reconnects[0]['reconnect_latency']
+
+        sockets[1].push({'status': 100, 'body': 'after', 'headers': {'X-Request-Id': '/topics/a'}})
+        while len(messages) < 6:
+            await asyncio.sleep(0.01)
+        assert messages.count(('connect', None)) == 4
+        assert ('message', 'before') in messages
+        assert messages[-1] == ('message', 'after')
+        stats = client.get_subscriber_stats()
+        assert stats['connected']
+        assert stats['reconnects'] == 1
+        assert not stats['reconnecting']
+
+        await client.close()
+        await asyncio.sleep(0.05)
+        # No reconnect is attempted once the client is closed
+        assert len(sockets) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_subscription_close_while_reconnecting(self, monkeypatch):
+        sockets = []
+
+        def fake_connect(uri, **kwargs):
+            websocket = FakeWebsocket(auto_respond=True)
+            sockets.append(websocket)
+            return websocket
+
+        monkeypatch.setattr(websockets, 'connect', fake_connect)
+        closes = []
+
+        async def on_close():
+            closes.append(True)
+
+        async def on_message(what: str, msg: dict):
+            pass
+
+        config = VantiqSubscriberConfig(auto_reconnect=True, reconnect_initial_delay=30, reconnect_max_delay=30)
+        client = Vantiq(_server_url, '1', subscriber_config=config)
+        await client.set_access_token(_access_token)
+        await client.subscribe(VantiqResources.TOPICS, '/a', None, on_message)
+        client.register_subscriber_on_close(on_close)
+        # noinspection PyProtectedMember
+        connect_task = client._subscriber._connect_task
+        sockets[0].push(websockets.ConnectionClosedError(None, None))
+        while not client.get_subscriber_stats()['reconnecting']:
+            await asyncio.sleep(0.01)
+
+        # Closing during the backoff stops the reconnection at once, and the close handler runs only once
+        await client.close()
+        assert connect_task.done()
+        assert closes == [True]
+        assert len(sockets) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_batched_acks(self):
+        config = VantiqSubscriberConfig(ack_batch_size=3, ack_flush_interval=0.05)
+        client = Vantiq(_server_url, '1', subscriber_config=config)
+        await client.set_access_token(_access_token)
+        client.set_target_namespace('someNamespace')
+        subscriber, websocket = await self.connect_fake_subscriber(client)
+
+        for seq in [1, 2, 4]:
+            await client.ack('/topics/a', 'sub1', {'sequenceId': seq, 'partitionId': 0})
+        # The batch is full, but 3 is missing, so only 2 is acknowledged
+        assert websocket.sent == [{'op': 'acknowledge', 'resourceName': 'events', 'resourceId': '/topics/a',
+                                   'targetNamespace': 'someNamespace',
+                                   'parameters': {'requestId': '/topics/a', 'subscriptionName': 'sub1',
+                                                  'sequenceId': 2, 'partitionId': 0}}]
+
+        await client.ack('/topics/a', 'sub1', {'sequenceId': 3, 'partitionId': 0})
+        await client.ack('/topics/a', 'sub1', {'sequenceId': 7, 'partitionId': 1})
+        await asyncio.sleep(0.1)
+        # The time threshold flushed the rest
+        acked = sorted((frame['parameters']['partitionId'], frame['parameters']['sequenceId'])
+                       for frame in websocket.sent)
+        assert acked == [(0, 2), (0, 4), (1, 7)]
+        stats = client.get_subscriber_stats()
+        assert stats['acks_received'] == 5
+        assert stats['ack_frames_sent'] == 3
+
+        await client.ack('/topics/a', 'sub1', {'sequenceId': 5, 'partitionId': 0})
+        await client.close()
+        # Pending acknowledgements are sent on close
+        assert websocket.sent[-1]['parameters']['sequenceId'] == 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_batched_acks_out_of_order(self, monkeypatch):
+        # Report gaps as stalled sooner than the default 60 seconds
+        monkeypatch.setattr(_AckBatcher, 'STALL_TIMEOUT', 0.1)
+
+        async def connect(config: VantiqSubscriberConfig):
+            client = Vantiq(_server_url, '1', subscriber_config=config)
+            await client.set_access_token(_access_token)
+            subscriber, websocket = await self.connect_fake_subscriber(client)
+            releases = {}
+
+            async def callback(what: str, msg: dict):
+                if what == 'message':
+                    body = msg['body']
+                    if body['sequenceId'] in releases:
+                        await releases[body['sequenceId']].wait()
+                    await client.ack(msg['headers']['X-Request-Id'], body['name'], body)
+
+            await client.subscribe(VantiqResources.TOPICS, '/a', None, callback)
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, {'status': 200, 'headers': {'X-Request-Id': '/topics/a'}})
+            websocket.sent.clear()
+
+            async def deliver(seq: int):
+                # noinspection PyProtectedMember
+                await subscriber._process_message(websocket, {
+                    'status': 100, 'headers': {'X-Request-Id': '/topics/a'},
+                    'body': {'name': 'sub1', 'sequenceId': seq, 'partitionId': 0}})
+
+            def acked() -> list:
+                return [frame['parameters']['sequenceId'] for frame in websocket.sent]
+
+            return client, releases, deliver, acked
+
+        client, releases, deliver, acked = await connect(
+            VantiqSubscriberConfig(workers=2, ack_batch_size=2, ack_flush_interval=0.02))
+        releases[5] = asyncio.Event()
+        await deliver(5)
+        await deliver(6)
+        await deliver(7)
+        # 6 and 7 are acknowledged (and flushed) while 5's callback is still running, so nothing can be sent
+        await asyncio.sleep(0.05)
+        assert acked() == []
+        releases[5].set()
+        while acked() != [7]:
+            await asyncio.sleep(0.01)
+
+        # A sequence id never acknowledged holds back every later acknowledgement, and is reported as stalled
+        releases[8] = asyncio.Event()
+        for seq in (8, 9, 10):
+            await deliver(seq)
+        await asyncio.sleep(0.15)
+        await deliver(11)
+        await deliver(12)
+        await asyncio.sleep(0.05)
+        assert acked() == [7]
+        stats = client.get_subscriber_stats()
+        assert stats['ack_gaps_stalled'] == 1
+        assert stats['ack_gaps_skipped'] == 0
+        assert stats['acks_received'] == 7
+        releases[8].set()
+        while acked() != [7, 12]:
+            await asyncio.sleep(0.01)
+        await client.close()
+
+        # Given an ack_gap_timeout, a sequence id never acknowledged is given up on after it
+        client, releases, deliver, acked = await connect(
+            VantiqSubscriberConfig(workers=2, ack_batch_size=2, ack_flush_interval=0.02, ack_gap_timeout=0.2))
+        releases[1] = asyncio.Event()
+        for seq in (1, 2, 3):
+            await deliver(seq)
+        await asyncio.sleep(0.05)
+        assert acked() == []
+        await asyncio.sleep(0.2)
+        await deliver(4)
+        while acked() != [4]:
+            await asyncio.sleep(0.01)
+        assert client.get_subscriber_stats()['ack_gaps_skipped'] == 1
+        releases[1].set()
+        await client.close()
+
+        # Acknowledgements that are not batched are counted too
+        client = Vantiq(_server_url, '1')
+        await client.set_access_token(_access_token)
+        await self.connect_fake_subscriber(client)
+        await client.ack('/topics/a', 'sub1', {'sequenceId': 1, 'partitionId': 0})
+        stats = client.get_subscriber_stats()
+        assert stats['acks_received'] == 1 and stats['ack_frames_sent'] == 1
+        await client.close()
+
+    @staticmethod
+    def make_jwt(expires_in: float) -> str:
+        def encode(part: dict) -> str:
+            return base64.urlsafe_b64encode(json.dumps(part).encode('utf-8')).decode('utf-8').rstrip('=')
+        return f'{encode({"alg": "HS256"})}.{encode({"exp": time.time() + expires_in})}.signature'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_token_auto_refresh(self):
+        refreshes = []
+
+        async def refresh_callback(url, **kwargs):
+            refreshes.append(kwargs['data'])
+            # Hold the refresh so that all the rejected requests wait on it
+            await asyncio.sleep(0.05)
+            return CallbackResult(status=200, body=json.dumps({'accessToken': 'new_token', 'idToken': 'id'}))
+
+        def select_callback(url, **kwargs):
+            if kwargs['headers'][aiohttp.hdrs.AUTHORIZATION] == 'Bearer new_token':
+                return CallbackResult(status=200, body=json.dumps([{'id': 'x'}]))
+            return CallbackResult(status=401, body=json.dumps([{'code': 'io.vantiq.authentication.failed',
+                                                                'message': 'Expired', 'params': []}]))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token('old_token')
+                client.set_auto_refresh()
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType.*$'),
+                           callback=select_callback, repeat=True)
+                mocked.post('http://example.com/authenticate/refresh', callback=refresh_callback, repeat=True)
+                results = await asyncio.gather(*[client.select(TEST_TYPE) for _ in range(5)])
+                assert all(vr.is_success and vr.body == [{'id': 'x'}] for vr in results)
+                assert refreshes == ['old_token']
+                stats = client.get_request_stats()
+                assert stats['token_refreshes'] == 1
+                assert stats['replayed_after_401'] == 5
+
+                # Non-idempotent operations are not replayed
+                mocked.post(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType.*$'), status=401,
+                            body=json.dumps([{'code': 'io.vantiq.authentication.failed', 'message': 'Expired',
+                                              'params': []}]))
+                vr = await client.insert(TEST_TYPE, {'id': 'y'})
+                assert vr.status_code == 401
+                assert len(refreshes) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_token_proactive_refresh(self):
+        refreshed = asyncio.Event()
+        new_token = self.make_jwt(3600)
+
+        def refresh_callback(url, **kwargs):
+            refreshed.set()
+            return CallbackResult(status=200, body=json.dumps({'accessToken': new_token, 'idToken': 'id'}))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                mocked.post('http://example.com/authenticate/refresh', callback=refresh_callback)
+                client.set_auto_refresh(refresh_margin=59.9)
+                await client.set_access_token(self.make_jwt(60))
+                await asyncio.wait_for(refreshed.wait(), 2)
+                await asyncio.sleep(0.01)
+                assert client.get_access_token() == new_token
+                assert client.get_request_stats()['token_refreshes'] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_token_proactive_refresh_short_lived(self, monkeypatch, caplog):
+        monkeypatch.setattr(Vantiq, 'MIN_REFRESH_DELAY', 0.1)
+
+        def refresh_callback(url, **kwargs):
+            # Every token issued lives for less than the refresh margin
+            return CallbackResult(status=200, body=json.dumps({'accessToken': self.make_jwt(0.4), 'idToken': 'id'}))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                mocked.post('http://example.com/authenticate/refresh', callback=refresh_callback, repeat=True)
+                with caplog.at_level(logging.WARNING):
+                    client.set_auto_refresh(refresh_margin=60)
+                    await client.set_access_token(self.make_jwt(0.4))
+                    await asyncio.sleep(0.5)
+                # Refreshed halfway through each token's lifetime, rather than continually
+                assert 1 <= client.get_request_stats()['token_refreshes'] <= 4
+                assert len([r for r in caplog.records if 'refresh margin' in r.getMessage()]) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_retry_policy(self):
+        policy = VantiqRetryPolicy(max_attempts=3, initial_backoff=0.01, jitter=False)
+        assert policy.backoff(1) == 0.01
+        assert policy.backoff(3) == 0.04
+        unavailable = json.dumps([{'code': 'io.vantiq.unavailable', 'message': 'Try later', 'params': []}])
+        type_url = re.compile(r'^http://example\.com/api/v1/resources/custom/TestType.*$')
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1', retry_policy=policy) as client:
+                await client.set_access_token(_access_token)
+                mocked.get(type_url, exception=aiohttp.ServerDisconnectedError())
+                mocked.get(type_url, status=503, body=unavailable, headers={'Retry-After': '0'})
+                mocked.get(type_url, status=200, body=json.dumps([{'id': 'x'}]))
+                vr = await client.select(TEST_TYPE)
+                assert vr.is_success
+                assert vr.body == [{'id': 'x'}]
+                stats = client.get_request_stats()
+                assert stats['retries'] == 2
+                assert stats['retried_requests'] == 1
+
+                # Gives up after max_attempts, returning the last response
+                mocked.get(type_url, status=429, body=unavailable, repeat=True)
+                vr = await client.count(TEST_TYPE)
+                assert vr.status_code == 429
+                assert client.get_request_stats()['retries_exhausted'] == 1
+
+                # Inserts are not retried unless asked
+                mocked.post(type_url, status=502, body=unavailable)
+                mocked.post(type_url, status=200, body=json.dumps({'id': 'y'}))
+                vr = await client.insert(TEST_TYPE, {'id': 'y'})
+                assert vr.status_code == 502
+                vr = await client.insert(TEST_TYPE, {'id': 'y'}, retry=True)
+                assert vr.is_success
+                assert client.get_request_stats()['retries'] == 4
+
+                # Nor are other errors
+                mocked.delete(type_url, status=404, body=unavailable)
+                vr = await client.delete_one(TEST_TYPE, 'z', retry=policy)
+                assert vr.status_code == 404
+                assert client.get_request_stats()['retries'] == 4
+
+        with pytest.raises(VantiqException) as exc_info:
+            VantiqRetryPolicy(max_attempts=0)
+        assert exc_info.value.code == 'io.vantiq.python.retrypolicy.invalid'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_response_cache(self):
+        fetches = []
+
+        def select_callback(url, **kwargs):
+            fetches.append(url.path)
+            return CallbackResult(status=200, body=json.dumps({'id': url.path.split('/')[-1], 'fetch': len(fetches)}))
+
+        cache = VantiqResponseCache([TEST_TYPE], ttl=0.2, max_entries=2)
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1', response_cache=cache) as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/.*$'), callback=select_callback,
+                           repeat=True)
+                mocked.put(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType/a$'), status=200,
+                           body=json.dumps({'id': 'a'}))
+                first = await client.select_one(TEST_TYPE, 'a')
+                first.body['changed'] = True
+                second = await client.select_one(TEST_TYPE, 'a')
+                assert second.body == {'id': 'a', 'fetch': 1}
+                assert len(fetches) == 1
+
+                # Uncached resources always go to the server
+                await client.select_one(VantiqResources.TYPES, TEST_TYPE)
+                await client.select_one(VantiqResources.TYPES, TEST_TYPE)
+                assert len(fetches) == 3
+
+                # Changes made through the client discard the entries
+                await client.update(TEST_TYPE, 'a', {'x': 1})
+                vr = await client.select_one(TEST_TYPE, 'a')
+                assert vr.body['fetch'] == 4
+
+                # Least recently used entries are evicted, and entries expire
+                await client.select_one(TEST_TYPE, 'b')
+                await client.select_one(TEST_TYPE, 'c')
+                await client.select_one(TEST_TYPE, 'a')
+                assert len(fetches) == 7
+                await asyncio.sleep(0.25)
+                await client.select_one(TEST_TYPE, 'c')
+                assert len(fetches) == 8
+
+                stats = client.get_cache_stats()
+                assert stats['hits'] == 1
+                assert stats['misses'] == 6
+                assert stats['invalidations'] == 1
+                assert stats['evictions'] == 2
+                assert stats['entries'] == 2
+
+        with pytest.raises(VantiqException) as exc_info:
+            VantiqResponseCache([TEST_TYPE], ttl=0)
+        assert exc_info.value.code == 'io.vantiq.python.responsecache.invalid'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_coalesced_reads(self):
+        fetches = []
+
+        async def select_callback(url, **kwargs):
+            fetches.append(url.path)
+            await asyncio.sleep(0.05)
+            return CallbackResult(status=200, body=json.dumps([{'id': 'x'}]), headers={'X-Total-Count': '1'})
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1', coalesce_reads=True) as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType.*$'),
+                           callback=select_callback, repeat=True)
+                results = await asyncio.gather(*[client.select(TEST_TYPE) for _ in range(10)],
+                                               client.select(TEST_TYPE, where={'id': 'x'}))
+                assert len(fetches) == 2
+                assert all(vr.is_success and vr.body == [{'id': 'x'}] for vr in results)
+                # Each caller has its own body
+                assert len({id(vr.body) for vr in results}) == len(results)
+                assert client.get_request_stats()['coalesced_reads'] == 9
+
+                # Different namespaces are not coalesced, and finished requests are not reused
+                fetches.clear()
+                first = asyncio.create_task(client.count(TEST_TYPE))
+                await asyncio.sleep(0)
+                client.set_target_namespace('other')
+                results = await asyncio.gather(first, client.count(TEST_TYPE))
+                assert [vr.count for vr in results] == [1, 1]
+                await client.count(TEST_TYPE)
+                assert len(fetches) == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_loader(self):
+        requests = []
+        records = {f'n{i}': {'name': f'n{i}', 'value': i} for i in range(5)}
+
+        def select_callback(url, **kwargs):
+            where = json.loads(kwargs['params']['where'])
+            requests.append(where)
+            found = [records[name] for name in where['name']['$in'] if name in records]
+            return CallbackResult(status=200, body=json.dumps(found))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'),
+                           callback=select_callback, repeat=True)
+                loader = client.loader(TEST_TYPE, key='name', max_batch_size=3)
+                results = await asyncio.gather(loader.load('n0'), loader.load('n1'), loader.load('n0'),
+                                               loader.load('missing'), loader.load('n4'))
+                assert [vr.body['value'] for vr in results if vr.is_success] == [0, 1, 0, 4]
+                assert results[0].body is not results[2].body
+                assert results[3].status_code == 404
+                assert results[3].errors[0].code == 'io.vantiq.python.loader.notfound'
+                # The batch filled at 3 distinct keys
+                assert requests == [{'name': {'$in': ['n0', 'n1', 'missing']}}, {'name': {'$in': ['n4']}}]
+                assert loader.stats() == {'loads': 5, 'batches': 2}
+
+                requests.clear()
+                delayed = client.loader(TEST_TYPE, key='name', batch_delay=0.02)
+                first = asyncio.create_task(delayed.load('n2'))
+                await asyncio.sleep(0.005)
+                results = await delayed.load_many(['n3', 'n2'])
+                assert (await first).body['value'] == 2
+                assert [vr.body['value'] for vr in results] == [3, 2]
+                assert requests == [{'name': {'$in': ['n2', 'n3']}}]
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_materialized_view(self):
+        records = [{'_id': 'a', 'region': 'west', 'value': 1}, {'_id': 'b', 'region': 'west', 'value': 2}]
+        loads = []
+
+        def select_callback(url, **kwargs):
+            loads.append(json.loads(kwargs['params']['where']))
+            return CallbackResult(status=200, body=json.dumps(records))
+
+        def event(operation: str, value: dict, sequence_id: int = None) -> dict:
+            body = {'path': f'/types/{TEST_TYPE}/{operation}', 'value': value}
+            if sequence_id is not None:
+                body['sequenceId'] = sequence_id
+                body['partitionId'] = 0
+            return {'status': 100, 'headers': {'X-Request-Id': f'/types/{TEST_TYPE}/{operation}'}, 'body': body}
+
+        with aioresponses() as mocked:
+            client = Vantiq(_server_url, '1')
+            await client.set_access_token(_access_token)
+            subscriber, websocket = await self.connect_fake_subscriber(client)
+            mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'),
+                       callback=select_callback, repeat=True)
+            view = await client.materialize(TEST_TYPE, where={'region': 'west'})
+            assert [frame['resourceId'] for frame in websocket.sent] == \
+                   [f'/types/{TEST_TYPE}/insert', f'/types/{TEST_TYPE}/update', f'/types/{TEST_TYPE}/delete']
+            assert len(view) == 2
+            assert view.get('a')['value'] == 1
+            for operation in ['insert', 'update', 'delete']:
+                # noinspection PyProtectedMember
+                await subscriber._process_message(websocket, {'status': 200, 'headers': {
+                    'X-Request-Id': f'/types/{TEST_TYPE}/{operation}'}})
+
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, event('insert', {'_id': 'c', 'region': 'west', 'value': 3}))
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, event('insert', {'_id': 'd', 'region': 'east', 'value': 4}))
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, event('update', {'_id': 'a', 'region': 'east', 'value': 1}))
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, event('delete', {'_id': 'b'}, sequence_id=1))
+            await asyncio.sleep(0.05)
+            assert sorted(record['_id'] for record in view) == ['c']
+            assert view.stats()['events'] == 4
+            assert len(loads) == 1
+
+            # A gap in the sequence ids reloads the view
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, event('delete', {'_id': 'c'}, sequence_id=3))
+            await asyncio.sleep(0.05)
+            assert len(loads) == 2
+            assert sorted(view.values(), key=lambda r: r['_id']) == records
+            stats = view.stats()
+            assert stats['gaps'] == 1
+            assert stats['resyncs'] == 1
+
+            # As does a subscription being reestablished
+            subscriber.subscriptions[f'/types/{TEST_TYPE}/insert'] = False
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, {'status': 200, 'headers': {
+                'X-Request-Id': f'/types/{TEST_TYPE}/insert'}})
+            await asyncio.sleep(0.05)
+            assert len(loads) == 3
+            assert loads[0] == {'region': 'west'}
+            view.create_index('value', 'sorted')
+            assert view.select({'value': {'$gte': 2}}, properties=['_id']) == [{'_id': 'b'}]
+            assert view.count({'value': {'$lt': 2}}) == 1
+
+            await view.close()
+            assert len(view) == 0
+            await client.close()
+
+        # A view that fails to load leaves no subscriptions behind
+        with aioresponses() as mocked:
+            client = Vantiq(_server_url, '1')
+            await client.set_access_token(_access_token)
+            subscriber, websocket = await self.connect_fake_subscriber(client)
+            mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'), status=500,
+                       body=json.dumps([{'code': 'io.vantiq.test.failed', 'message': 'Failed', 'params': []}]))
+            with pytest.raises(VantiqException):
+                await client.materialize(TEST_TYPE)
+            assert subscriber.subscriptions == {}
+            assert subscriber.callbacks == {}
+            # noinspection PyProtectedMember
+            assert subscriber._dispatchers == {}
+            assert [(frame['op'], frame['resourceId']) for frame in websocket.sent[-3:]] == \
+                   [('unsubscribe', f'/types/{TEST_TYPE}/{operation}') for operation in ['insert', 'update', 'delete']]
+            await client.close()
+
+        # Every condition is checked, not just those reached in evaluating an empty record
+        for where in ({'value': {'$near': [0, 0]}}, {'a': 1, 'b': {'$near': [0, 0]}},
+                      {'$or': [{'a': 1}, {'b': {'$not': {'$bogus': 1}}}]}):
+            with pytest.raises(VantiqException) as exc_info:
+                await Vantiq(_server_url, '1').materialize(TEST_TYPE, where=where)
+            assert exc_info.value.code == 'io.vantiq.python.where.unsupported'
+
+    def test_record_store(self):
+        records = [{'_id': f'id{i}', 'name': f'n{i % 3}', 'value': i, 'nested': {'flag': i % 2 == 0}}
+                   for i in range(10)]
+        records.append({'_id': 'text', 'name': 'n0', 'value': 'ten'})
+        store = VantiqRecordStore(records=records, indexes={'name': 'hash'})
+        store.create_index('value', 'sorted')
+
+        def ids(found: list) -> list:
+            return [record['_id'] for record in found]
+
+        assert ids(store.select({'name': 'n1'}, sort_spec={'value': -1})) == ['id7', 'id4', 'id1']
+        assert ids(store.select({'value': {'$gt': 3, '$lte': 5}}, sort_spec={'_id': 1})) == ['id4', 'id5']
+        # Strings are never greater than numbers
+        assert store.count({'value': {'$gt': 8}}) == 1
+        assert ids(store.select({'value': {'$gte': 'a'}})) == ['text']
+        assert store.select({'$and': [{'name': {'$in': ['n0', 'n2']}}, {'nested.flag': True}]},
+                            properties=['value'], sort_spec={'name': 1, 'value': -1}, limit=3) == \
+            [{'value': 6}, {'value': 0}, {'value': 8}]
+        assert ids(store.select({'$or': [{'value': 1}, {'name': {'$regex': '^N2', '$options': 'i'}}]},
+                                sort_spec={'value': 1})) == ['id1', 'id2', 'id5', 'id8']
+        assert store.count({'nested': {'$exists': False}}) == 1
+        assert store.count({'value': {'$not': {'$lt': 5}}}) == 6
+        assert store.count({'value': {'$nin': [1, 2, 3]}, 'name': {'$ne': 'n0'}}) == 4
+        stats = store.stats()
+        assert stats['index_lookups'] == 5
+        assert stats['scans'] == 4
+
+        store.put({'_id': 'id1', 'name': 'n0', 'value': 100})
+        store.remove('id4')
+        assert ids(store.select({'name': 'n1'}, sort_spec={'value': 1})) == ['id7']
+        assert ids(store.select({'value': {'$gte': 100}})) == ['id1']
+        assert store.get('id4') is None
+        assert len(store) == 10
+
+        # Equality compares kinds as well as values, and arrays equal each of their elements
+        typed = VantiqRecordStore(records=[{'_id': 'a', 'x': 1, 'tags': ['red', 'blue']}, {'_id': 'b', 'x': True},
+                                           {'_id': 'c', 'x': 1.0, 'tags': ['blue']}, {'_id': 'd', 'tags': 'red'}])
+        for indexes in ({}, {'x': 'hash', 'tags': 'hash'}, {'x': 'sorted', 'tags': 'sorted'}):
+            for prop, kind in indexes.items():
+                typed.create_index(prop, kind)
+            assert ids(typed.select({'x': 1}, sort_spec={'_id': 1})) == ['a', 'c']
+            assert ids(typed.select({'x': True})) == ['b']
+            assert ids(typed.select({'x': {'$in': [True, 'y']}})) == ['b']
+            assert ids(typed.select({'x': {'$ne': 1}}, sort_spec={'_id': 1})) == ['b', 'd']
+            assert ids(typed.select({'tags': 'red'}, sort_spec={'_id': 1})) == ['a', 'd']
+            assert ids(typed.select({'tags': {'$in': ['blue']}}, sort_spec={'_id': 1})) == ['a', 'c']
+            assert ids(typed.select({'tags': ['blue']})) == ['c']
+            assert ids(typed.select({'tags': {'$nin': ['red']}}, sort_spec={'_id': 1})) == ['b', 'c']
+        typed.remove('a')
+        assert ids(typed.select({'tags': 'red'})) == ['d']
+
+        with pytest.raises(VantiqException) as exc_info:
+            store.select({'value': {'$where': 'true'}})
+        assert exc_info.value.code == 'io.vantiq.python.where.unsupported'
+        # Even when there are no records to evaluate it against
+        with pytest.raises(VantiqException) as exc_info:
+            VantiqRecordStore().select({'x': {'$bogus': 1}})
+        assert exc_info.value.code == 'io.vantiq.python.where.unsupported'
+        with pytest.raises(VantiqException) as exc_info:
+            VantiqRecordStore().count({'$and': {'x': 1}})
+        assert exc_info.value.code == 'io.vantiq.python.where.invalid'
+        with pytest.raises(VantiqException) as exc_info:
+            store.create_index('value', 'btree')
+        assert exc_info.value.code == 'io.vantiq.python.recordstore.indexkind'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_prepared_queries(self):
+        selects = []
+        executions = []
+
+        def select_callback(url, **kwargs):
+            selects.append(kwargs['params'])
+            return CallbackResult(status=200, body=json.dumps([{'id': 'x'}]))
+
+        def execute_callback(url, **kwargs):
+            executions.append(kwargs['data'])
+            return CallbackResult(status=200, body=json.dumps({'ok': True}))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'),
+                           callback=select_callback, repeat=True)
+                mocked.post('http://example.com/api/v1/resources/procedures/recordReading',
+                            callback=execute_callback, repeat=True)
+                where = {'sensor': VantiqParam('sensor'),
+                         '$or': [{'ts': {'$gt': VantiqParam('since')}}, {'flags': {'$in': ['urgent']}}],
+                         'other': VantiqParam('sensor')}
+                query = client.prepare_select(TEST_TYPE, ['id'], where, {'ts': -1}, limit=5)
+                assert query.param_names == ['sensor', 'since']
+                for sensor, since in [('s1', 10), ('s "2"', {'$date': 'x'})]:
+                    vr = await query.select(sensor=sensor, since=since)
+                    assert vr.is_success
+                    # The same query as an unprepared select
+                    await client.select(TEST_TYPE, ['id'], {'sensor': sensor, '$or': [
+                        {'ts': {'$gt': since}}, {'flags': {'$in': ['urgent']}}], 'other': sensor}, {'ts': -1}, 5)
+                    assert selects[-2] == selects[-1]
+
+                with pytest.raises(VantiqException) as exc_info:
+                    await query.select(sensor='s1')
+                assert exc_info.value.code == 'io.vantiq.python.prepared.missingparam'
+                with pytest.raises(VantiqException) as exc_info:
+                    await query.select(sensor='s1', since=1, extra=2)
+                assert exc_info.value.code == 'io.vantiq.python.prepared.unknownparam'
+
+                record = client.prepare_execute('recordReading', {'sensor': 's1', 'value': VantiqParam('value')})
+                vr = await record.execute(value=[1.5, None])
+                assert vr.body == {'ok': True}
+                assert json.loads(executions[-1]) == {'sensor': 's1', 'value': [1.5, None]}
+                await record.execute(value='x')
+                assert json.loads(executions[-1]) == {'sensor': 's1', 'value': 'x'}
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_count_many(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def count_callback(url, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            where = json.loads(kwargs['params'].get('where', '{}'))
+            # The body is never decoded, so it needn't even be JSON
+            return CallbackResult(status=200, body='not json', content_type='application/json',
+                                  headers={'X-Total-Count': str(where.get('n', 100))})
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'^http://example\.com/api/v1/resources/custom/TestType\?.*$'),
+                           callback=count_callback, repeat=True)
+                vr = await client.count(TEST_TYPE, {'n': 7})
+                assert vr.is_success
+                assert vr.count == 7
+                assert vr.body == {}
+
+                results = await client.count_many(TEST_TYPE, [{'n': n} for n in range(6)] + [None], concurrency=3)
+                assert [vr.count for vr in results] == [0, 1, 2, 3, 4, 5, 100]
+                assert max_in_flight == 3
+                assert client.get_pool_stats()['in_use'] == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_execute_many(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def execute_callback(url, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            params = json.loads(kwargs['data'])
+            await asyncio.sleep(params['delay'])
+            in_flight -= 1
+            return CallbackResult(status=200, body=json.dumps(params['n'] * 10))
+
+        def generate():
+            for n, delay in enumerate([0.08, 0.01, 0.05, 0.02, 0.03]):
+                yield {'n': n, 'delay': delay}
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.post('http://example.com/api/v1/resources/procedures/score', callback=execute_callback,
+                            repeat=True)
+                results = [result async for result in client.execute_many('score', generate(), concurrency=2)]
+                assert [result.index for result in results] == [0, 1, 2, 3, 4]
+                assert [result.response.body for result in results] == [0, 10, 20, 30, 40]
+                assert all(result.is_success and result.latency >= result.params['delay'] for result in results)
+                assert max_in_flight == 2
+
+                max_in_flight = 0
+                results = [result.index async for result in client.execute_many('score', generate(), concurrency=5,
+                                                                                 ordered=False)]
+                assert results == [1, 3, 4, 2, 0]
+                assert max_in_flight == 5
+
+                # Executions that cannot be made are reported, not raised
+                results = [result async for result in client.execute_many('missing', [{'n': 1, 'delay': 0}])]
+                assert results[0].response is None
+                assert results[0].error is not None
+                assert not results[0].is_success
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_publisher(self):
+        published = []
+        in_flight = 0
+        max_in_flight = 0
+
+        async def publish_callback(url, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            msg = json.loads(kwargs['data'])
+            if msg == {'n': 'bad'}:
+                return CallbackResult(status=400, body=json.dumps([{'code': 'bad', 'message': 'bad', 'params': []}]))
+            published.append((str(url), msg))
+            return CallbackResult(status=200)
+
+        failures = []
+
+        async def on_error(resource, resource_id, msgs, failure):
+            failures.append((resource, resource_id, msgs, failure.status_code))
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.post(re.compile(r'http://example.com/api/v1/resources/topics/.*'), callback=publish_callback,
+                            repeat=True)
+                async with client.publisher(max_batch_size=4, max_in_flight=2, queue_size=3,
+                                            on_error=on_error) as publisher:
+                    for n in range(10):
+                        await publisher.publish(VantiqResources.TOPICS, '/readings', {'n': n})
+                    await publisher.publish(VantiqResources.TOPICS, '/readings', {'n': 'bad'})
+                    await publisher.flush()
+                    assert sorted(msg['n'] for _, msg in published) == list(range(10))
+                    assert max_in_flight == 2
+                    stats = publisher.stats()
+                    assert stats['sent'] == 10
+                    assert stats['failed'] == 1
+                    assert stats['queued'] == 0
+                    assert stats['requests'] == 11
+                    assert failures == [(VantiqResources.TOPICS, '/readings', [{'n': 'bad'}], 400)]
+
+                    # The queue is bounded: publish_nowait() refuses messages once it is full
+                    with pytest.raises(VantiqException) as e:
+                        for n in range(10):
+                            publisher.publish_nowait(VantiqResources.TOPICS, '/readings', {'n': n})
+                    assert e.value.code == 'io.vantiq.python.publisher.full'
+                with pytest.raises(VantiqException):
+                    await publisher.publish(VantiqResources.TOPICS, '/readings', {'n': 0})
+                # Closing flushed the messages queued
+                assert publisher.stats()['sent'] == 13
+
+                published.clear()
+                async with client.publisher(batch_mode='array', linger=0.05) as publisher:
+                    for n in range(5):
+                        await publisher.publish(VantiqResources.TOPICS, '/a' if n % 2 else '/b', {'n': n})
+                assert sorted((url.rsplit('/', 1)[1], msg) for url, msg in published) == \
+                       [('a', [{'n': 1}, {'n': 3}]), ('b', [{'n': 0}, {'n': 2}, {'n': 4}])]
+                assert publisher.stats()['requests'] == 2
+
+                # Messages arriving just as the linger ends are not lost, but sent in the next batch
+                published.clear()
+                async with client.publisher(linger=0.002) as publisher:
+                    for n in range(50):
+                        await publisher.publish(VantiqResources.TOPICS, '/readings', {'n': n})
+                        await asyncio.sleep(0.002 * (n % 3))
+                assert sorted(msg['n'] for _, msg in published) == list(range(50))
+                assert publisher.stats()['sent'] == 50
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_websocket_operations(self):
+        with pytest.raises(VantiqException) as e:
+            Vantiq(_server_url, '1', websocket_operations=['select'])
+        assert e.value.code == 'io.vantiq.python.websocketoperations.invalid'
+
+        client = Vantiq(_server_url, '1', websocket_operations=['publish', 'execute'],
+                        subscriber_config=VantiqSubscriberConfig(request_timeout=0.2))
+        await client.set_access_token(_access_token)
+        subscriber, websocket = await self.connect_fake_subscriber(client)
+
+        async def respond(frame: dict):
+            while len(websocket.sent) < 1:
+                await asyncio.sleep(0)
+            sent = websocket.sent.pop()
+            # noinspection PyProtectedMember
+            await subscriber._process_message(websocket, dict(frame, headers={
+                'X-Request-Id': sent['parameters']['requestId']}))
+            return sent
+
+        with aioresponses() as mocked:
+            # Responses are correlated by request id, so they may arrive in any order
+            publishing = asyncio.create_task(client.publish(VantiqResources.TOPICS, '/readings', {'n': 1}))
+            sent = await respond({'status': 200})
+            assert {k: sent[k] for k in ('op', 'resourceName', 'resourceId', 'object')} == \
+                   {'op': 'publish', 'resourceName': 'topics', 'resourceId': '/readings', 'object': {'n': 1}}
+            vr = await publishing
+            assert vr.is_success
+
+            executing = asyncio.create_task(client.execute('score', {'n': 2}))
+            sent = await respond({'status': 200, 'body': 20})
+            assert sent['op'] == 'execute' and sent['resourceName'] == 'procedures'
+            assert (await executing).body == 20
+
+            executing = asyncio.create_task(client.execute('score', {'n': 'bad'}))
+            await respond({'status': 400, 'body': [{'code': 'bad.param', 'message': 'Bad', 'params': []}]})
+            vr = await executing
+            assert not vr.is_success
+            assert vr.errors[0].code == 'bad.param'
+
+            # Unanswered requests time out, and a closed connection fails those pending
+            with pytest.raises(VantiqException) as e:
+                await client.execute('score', {'n': 3})
+            assert e.value.code == 'io.vantiq.python.websocket.timeout'
+            websocket.sent.clear()
+            executing = asyncio.create_task(client.execute('score', {'n': 4}))
+            while not websocket.sent:
+                await asyncio.sleep(0)
+            # noinspection PyProtectedMember
+            subscriber._fail_pending('closed')
+            with pytest.raises(VantiqException) as e:
+                await executing
+            assert e.value.code == 'io.vantiq.python.websocket.closed'
+            assert client.get_request_stats()['websocket_requests'] == 5
+
+            # Only HTTP requests are retried, so calls asking to be use HTTP
+            websocket.sent.clear()
+            mocked.post('http://example.com/api/v1/resources/topics//readings', status=200)
+            vr = await client.publish(VantiqResources.TOPICS, '/readings', {'n': 5}, retry=True)
+            assert vr.is_success
+            mocked.post('http://example.com/api/v1/resources/procedures/score', status=200, payload=50)
+            vr = await client.execute('score', {'n': 5}, retry=VantiqRetryPolicy(max_attempts=2))
+            assert vr.body == 50
+            assert websocket.sent == []
+            assert client.get_request_stats()['websocket_requests'] == 5
+
+            # Without a connection, HTTP is used
+            subscriber.connected = False
+            mocked.post('http://example.com/api/v1/resources/topics//readings', status=200)
+            vr = await client.publish(VantiqResources.TOPICS, '/readings', {'n': 5})
+            assert vr.is_success
+            assert client.get_request_stats()['websocket_requests'] == 5
+        await client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_conflating_publisher(self):
+        published = []
+
+        async def publish_callback(url, **kwargs):
+            published.append((str(url).rsplit('/', 1)[1], json.loads(kwargs['data'])))
+            return CallbackResult(status=200)
+
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                mocked.post(re.compile(r'http://example.com/api/v1/resources/topics/.*'), callback=publish_callback,
+                            repeat=True)
+                async with client.conflating_publisher(key='sensor.id', max_rate=20) as publisher:
+                    started = time.monotonic()
+                    for n in range(10):
+                        for sensor in ('s1', 's2'):
+                            await publisher.publish(VantiqResources.TOPICS, '/readings',
+                                                    {'sensor': {'id': sensor}, 'value': n})
+                        await publisher.publish(VantiqResources.TOPICS, '/other', {'sensor': {'id': 's1'}, 'value': n})
+                    await publisher.flush()
+                    # Only the latest value for each key is sent, in the order the keys were first published
+                    assert published == [('readings', {'sensor': {'id': 's1'}, 'value': 9}),
+                                         ('readings', {'sensor': {'id': 's2'}, 'value': 9}),
+                                         ('other', {'sensor': {'id': 's1'}, 'value': 9})]
+                    # No more than 20 per second
+                    assert time.monotonic() - started >= 0.1
+                    stats = publisher.stats()
+                    assert stats == {'published': 30, 'conflated': 27, 'pending': 0, 'sent': 3, 'failed': 0}
+
+                    # Values replaced while waiting for the rate limit are not sent
+                    published.clear()
+                    for n in range(3):
+                        await publisher.publish(VantiqResources.TOPICS, '/readings',
+                                                {'sensor': {'id': 's3'}, 'value': n})
+                        await asyncio.sleep(0.01)
+                assert published == [('readings', {'sensor': {'id': 's3'}, 'value': 2})]
+                assert publisher.stats()['sent'] == 4
+
+    @pytest.mark.timeout(10)
+    def test_sync_client(self):
+        loop_threads = set()
+
+        def select_callback(url, **kwargs):
+            loop_threads.add(threading.current_thread().name)
+            where = json.loads(kwargs['params'].get('where', '{}'))
+            return CallbackResult(status=200, body=json.dumps([{'name': where.get('name')}]))
+
+        with aioresponses() as mocked:
+            mocked.get(re.compile(r'http://example.com/api/v1/resources/types\?.*'), callback=select_callback,
+                       repeat=True)
+            mocked.post('http://example.com/api/v1/resources/procedures/score', status=200, body='42')
+            with SyncVantiq(_server_url, '1') as client:
+                client.set_access_token(_access_token)
+                # noinspection PyProtectedMember
+                session = client.client._connection._con
+                names = [f'type{n}' for n in range(20)]
+                results = {}
+
+                def worker(name: str):
+                    results[name] = client.select(VantiqResources.TYPES, where={'name': name}).body
+
+                threads = [threading.Thread(target=worker, args=(name,)) for name in names]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                assert results == {name: [{'name': name}] for name in names}
+                # Every call ran on the one event loop thread, sharing one session
+                assert len(loop_threads) == 1 and threading.current_thread().name not in loop_threads
+                # noinspection PyProtectedMember
+                assert client.client._connection._con is session
+                assert client.execute('score', {}).body == 42
+                assert client.run(lambda vantiq: vantiq.count(VantiqResources.TYPES)).is_success
+                # A task left running on the loop is cancelled when the client is closed
+                async def leave_running(vantiq: Vantiq):
+                    return asyncio.ensure_future(asyncio.sleep(3600))
+                left_running = client.run(leave_running)
+            with pytest.raises(VantiqException) as e:
+                client.select(VantiqResources.TYPES)
+            assert e.value.code == 'io.vantiq.python.sync.closed'
+            assert not client._thread.is_alive()
+            assert left_running.cancelled()
+
+            # Closing from several threads at once closes the client once, and operations racing it are refused or
+            # cancelled cleanly
+            client = SyncVantiq(_server_url, '1')
+            client.set_access_token(_access_token)
+            errors = []
+
+            def racer(closing: bool):
+                try:
+                    if closing:
+                        client.close()
+                    else:
+                        client.run(lambda vantiq: asyncio.sleep(3600))
+                except VantiqException as exc:
+                    if exc.code != 'io.vantiq.python.sync.closed':
+                        errors.append(exc)
+                except Exception as exc:
+                    errors.append(exc)
+
+            threads = [threading.Thread(target=racer, args=(n % 2 == 0,)) for n in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == []
+            assert not client._thread.is_alive()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(60)
+    async def test_bulk_load(self, tmp_path):
+        from aiohttp import web
+        received = []
+        auth_headers = set()
+
+        async def insert(request: web.Request):
+            items = await request.json()
+            auth_headers.add(request.headers.get('Authorization'))
+            if any(item.get('bad') for item in items):
+                return web.json_response([{'code': 'bad.item', 'message': 'Bad item', 'params': []}], status=400)
+            received.extend(items)
+            return web.json_response(items)
+
+        app = web.Application()
+        app.router.add_post('/api/v1/resources/custom/Reading', insert)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        server = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        try:
+            ndjson = tmp_path / 'readings.ndjson'
+            lines = [json.dumps({'n': n, 'bad': n == 57}) for n in range(100)]
+            # A blank line is skipped, and a malformed line is reported as a failure
+            lines[10:10] = ['', '{not json']
+            # A malformed line within the chunk containing n == 57 splits that chunk's failure in two
+            lines[57:57] = ['{also not json']
+            ndjson.write_text('\n'.join(lines) + '\n')
+            async with Vantiq(server, '1') as client:
+                with pytest.raises(VantiqException) as e:
+                    await client.bulk_load('Reading', str(ndjson))
+                assert e.value.code == 'io.vantiq.python.bulkload.notauthenticated'
+                await client.set_access_token(_access_token)
+                result = await client.bulk_load('Reading', str(ndjson), processes=2, chunk_size=5, concurrency=2)
+                assert result.total == 102
+                assert result.failed == 6
+                assert result.succeeded == 96
+                # The line after the first malformed one is record 11, and after the second (record 56) is
+                # record 57, so n == 57 is record 59.  Its chunk holds records 55 and 57-59.
+                assert [(start, count) for start, count, _ in result.failures] == [(10, 1), (55, 1), (56, 1),
+                                                                                  (57, 3)]
+                assert [failure[2][0].code for failure in result.failures] == \
+                       ['io.vantiq.python.bulkload.parse', 'bad.item', 'io.vantiq.python.bulkload.parse', 'bad.item']
+                assert sorted(item['n'] for item in received) == [n for n in range(100) if not 54 <= n < 58]
+                assert result.elapsed > 0 and result.items_per_second > 0
+                # Every worker used the parent's token
+                assert auth_headers == {'Bearer ' + _access_token}
+
+                received.clear()
+                readings_csv = tmp_path / 'readings.csv'
+                # Quoted values may contain newlines
+                readings_csv.write_bytes(b'sensor,value\r\ns1,1\r\ns2,"two\r\nlines"\r\ns3,3\r\n')
+                result = await client.bulk_load('Reading', str(readings_csv), processes=1)
+                assert result.is_success and result.succeeded == 3
+                assert received == [{'sensor': 's1', 'value': '1'}, {'sensor': 's2', 'value': 'two\r\nlines'},
+                                    {'sensor': 's3', 'value': '3'}]
+        finally:
+            await runner.cleanup()
+
+    @pytest.mark.timeout(60)
+    def test_import_time(self):
+        # Import the SDK in a fresh interpreter, timing it and noting which optional dependencies were loaded
+        sdk_dir = os.path.dirname(sys.modules[Vantiq.__module__].__file__)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([sdk_dir] + sys.path))
+
+        def import_time(script: str, module: str) -> (float, str):
+            proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], env=env, capture_output=True,
+                                  text=True, check=True)
+            for line in proc.stderr.splitlines():
+                fields = line.split('|')
+                if len(fields) == 3 and fields[2].strip() == module:
+                    return int(fields[1].strip()) / 1e6, proc.stdout.strip()
+            raise AssertionError(f'No import time reported for {module}')
+
+        sdk_time, loaded = import_time('import sys, vantiqsdk; print([m for m in ("websockets", "multiprocessing", '
+                                       '"orjson", "msgspec") if m in sys.modules])', 'vantiqsdk')
+        assert loaded == '[]'
+        # Measured on the same machine and run, aiohttp (which the SDK must import) sets the scale.  The SDK's own
+        # imports should add well under as much again.
+        aiohttp_time, _ = import_time('import aiohttp', 'aiohttp')
+        assert sdk_time < 2 * aiohttp_time
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_lazy_body(self):
+        vr = VantiqResponse(True, 200, 'application/json')
+        assert not hasattr(vr, '__dict__')
+        with pytest.raises(AttributeError):
+            vr.unexpected = True
+
+        decoded = []
+
+        class CountingCodec(VantiqJsonCodec):
+            def decode(self, data):
+                decoded.append(data)
+                return super().decode(data)
+
+        payload = json.dumps([{'name': 'a'}, {'name': 'b'}]).encode()
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1', lazy_body=True, json_codec=CountingCodec()) as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'http://example.com/api/v1/resources/types.*'), status=200, body=payload,
+                           content_type='application/json', repeat=True)
+                vr = await client.select(VantiqResources.TYPES)
+                assert vr.is_success
+                # The bytes are available untouched, and nothing is decoded until the body is wanted
+                assert vr.raw == payload
+                assert decoded == []
+                assert vr.body == [{'name': 'a'}, {'name': 'b'}]
+                assert vr.body is vr.body
+                assert len(decoded) == 1
+
+                mocked.post('http://example.com/api/v1/resources/procedures/broken', status=200, body=b'{oops',
+                            content_type='application/json')
+                vr = await client.execute('broken', {})
+                assert vr.is_success
+                with pytest.raises(VantiqException) as e:
+                    _ = vr.body
+                assert e.value.code == 'io.vantiq.python.body.decode'
+                # The failure is repeated, rather than the body silently becoming None
+                with pytest.raises(VantiqException) as e:
+                    _ = vr.body
+                assert e.value.code == 'io.vantiq.python.body.decode'
+
+            async with Vantiq(_server_url, '1') as client:
+                await client.set_access_token(_access_token)
+                vr = await client.select(VantiqResources.TYPES)
+                assert vr.raw is None
+                assert vr.body == [{'name': 'a'}, {'name': 'b'}]
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_raw_responses(self):
+        payload = json.dumps([{'name': 'a'}, {'name': 'b'}]).encode()
+        selects = 0
+
+        async def select_callback(url, **kwargs):
+            nonlocal selects
+            selects += 1
+            await asyncio.sleep(0.01)
+            return CallbackResult(status=200, body=payload, content_type='application/json')
+
+        cache = VantiqResponseCache([VantiqResources.TYPES])
+        with aioresponses() as mocked:
+            async with Vantiq(_server_url, '1', response_cache=cache) as client:
+                await client.set_access_token(_access_token)
+                mocked.get(re.compile(r'http://example.com/api/v1/resources/types.*'), callback=select_callback,
+                           repeat=True)
+                vr = await client.select(VantiqResources.TYPES, raw=True)
+                assert vr.is_success
+                assert vr.body == payload
+                assert vr.raw == payload
+                # Raw and decoded reads share the cached bytes
+                vr = await client.select(VantiqResources.TYPES)
+                assert vr.body == [{'name': 'a'}, {'name': 'b'}]
+                vr = await client.select(VantiqResources.TYPES, raw=True)
+                assert vr.body == payload
+                assert vr.raw == payload
+                assert selects == 1
+
+            async with Vantiq(_server_url, '1', coalesce_reads=True) as client:
+                await client.set_access_token(_access_token)
+                # Raw reads are coalesced only with other raw reads
+                decoded, raw, raw_again = await asyncio.gather(
+                    client.select_one(VantiqResources.TYPES, 'a'),
+                    client.select_one(VantiqResources.TYPES, 'a', raw=True),
+                    client.select_one(VantiqResources.TYPES, 'a', raw=True))
+                assert decoded.body == [{'name': 'a'}, {'name': 'b'}]
+                assert raw.body == payload and raw.raw == payload
+                assert raw_again.body == payload and raw_again.raw == payload
+                assert selects == 3
+
+                async def text_callback(url, **kwargs):
+                    await asyncio.sleep(0.01)
+                    return CallbackResult(status=200, body='plain', content_type='text/plain')
+
+                mocked.get('http://example.com/api/v1/resources/documents/notes.txt', callback=text_callback,
+                           repeat=True)
+                decoded, raw = await asyncio.gather(client.select_one(VantiqResources.DOCUMENTS, 'notes.txt'),
+                                                    client.select_one(VantiqResources.DOCUMENTS, 'notes.txt',
+                                                                      raw=True))
+                assert decoded.body == 'plain'
+                assert raw.body == b'plain' and raw.raw == b'plain'
+
+                mocked.post('http://example.com/api/v1/resources/procedures/relay', status=200, body=b'{"x": 1}',
+                            content_type='application/json')
+                vr = await client.execute('relay', {}, raw=True)
+                assert vr.body == b'{"x": 1}'
+                assert vr.raw == b'{"x": 1}'
+                mocked.post('http://example.com/api/v1/resources/sources/src/query', status=200, body=b'[1]',
+                            content_type='application/json')
+                vr = await client.query('src', {}, raw=True)
+                assert vr.body == b'[1]'
+                # Errors are still reported as VantiqErrors
+                mocked.post('http://example.com/api/v1/resources/procedures/relay', status=400,
+                            body=json.dumps([{'code': 'bad', 'message': 'Bad', 'params': []}]),
+                            content_type='application/json')
+                vr = await client.execute('relay', {}, raw=True)
+                assert not vr.is_success
+                assert vr.errors[0].code == 'bad'